@@ -17,14 +17,24 @@ if "bpy" in locals():
 	imp.reload(utilities_ui)
 	imp.reload(settings)
 	imp.reload(utilities_bake)
+	imp.reload(utilities_image)
+	imp.reload(utilities_bake_cache)
+	imp.reload(utilities_bake_dirty)
 	imp.reload(utilities_color)
 	imp.reload(utilities_texel)
 	imp.reload(utilities_uv)
 	imp.reload(utilities_meshtex)
+	imp.reload(utilities_island_cache)
+	imp.reload(utilities_uv_view)
+	imp.reload(utilities_uv_geometry)
+	imp.reload(utilities_island_signature)
+	imp.reload(utilities_bake_farm)
 	
 	imp.reload(op_align)
 	imp.reload(op_bake)
 	imp.reload(op_bake_explode)
+	imp.reload(op_bake_farm)
+	imp.reload(op_bake_changed)
 	imp.reload(op_bake_organize_names)
 	imp.reload(op_texture_preview)
 	imp.reload(op_color_assign)
@@ -44,6 +54,7 @@ if "bpy" in locals():
 	imp.reload(op_island_align_world)
 	imp.reload(op_island_mirror)
 	imp.reload(op_island_rotate_90)
+	imp.reload(op_island_stack)
 	imp.reload(op_island_straighten_edge_loops)
 	imp.reload(op_rectify)
 	imp.reload(op_select_islands_identical)
@@ -59,6 +70,7 @@ if "bpy" in locals():
 	imp.reload(op_texel_checker_map)
 	imp.reload(op_texel_density_get)
 	imp.reload(op_texel_density_set)
+	imp.reload(op_texel_density_heatmap)
 	imp.reload(op_texture_reload_all)
 	imp.reload(op_texture_save)
 	imp.reload(op_texture_open)
@@ -78,14 +90,24 @@ else:
 	from . import settings
 	from . import utilities_ui
 	from . import utilities_bake
+	from . import utilities_image
+	from . import utilities_bake_cache
+	from . import utilities_bake_dirty
 	from . import utilities_color
 	from . import utilities_texel
 	from . import utilities_uv
 	from . import utilities_meshtex
+	from . import utilities_island_cache
+	from . import utilities_uv_view
+	from . import utilities_uv_geometry
+	from . import utilities_island_signature
+	from . import utilities_bake_farm
 
 	from . import op_align
 	from . import op_bake
 	from . import op_bake_explode
+	from . import op_bake_farm
+	from . import op_bake_changed
 	from . import op_bake_organize_names
 	from . import op_texture_preview
 	from . import op_color_assign
@@ -105,6 +127,7 @@ else:
 	from . import op_island_align_world
 	from . import op_island_mirror
 	from . import op_island_rotate_90
+	from . import op_island_stack
 	from . import op_island_straighten_edge_loops
 	from . import op_rectify
 	from . import op_select_islands_identical
@@ -120,6 +143,7 @@ else:
 	from . import op_texel_checker_map
 	from . import op_texel_density_get
 	from . import op_texel_density_set
+	from . import op_texel_density_heatmap
 	from . import op_texture_reload_all
 	from . import op_texture_save
 	from . import op_texture_open
@@ -179,6 +203,13 @@ class Panel_Preferences(bpy.types.AddonPreferences):
 		name = "Image depth", 
 		default = '8'
 	)
+	bake_cache_size : IntProperty(
+		name = "Bake Cache (MB)",
+		description = "Size limit of the bake cache, least recently used bakes are removed first",
+		default = 2048,
+		min = 0,
+		max = 1024 * 1024
+	)
 
 	def draw(self, context):
 		layout = self.layout
@@ -198,6 +229,10 @@ class Panel_Preferences(bpy.types.AddonPreferences):
 			col.label(text="8 Bit images are used. Banding may appear in normal maps.")
 		elif self.bake_32bit_float == '32':
 			col.label(text="32 Bit images are used. Images may require dithering to 8 bit.")
+
+		box.separator()
+		col = box.column(align=True)
+		col.prop(self, "bake_cache_size")
 		
 		
 		if not hasattr(bpy.types,"ShaderNodeBevel"):
@@ -328,6 +363,69 @@ class op_select_bake_type(bpy.types.Operator):
 
 
 
+class op_bake_queue_add(bpy.types.Operator):
+	bl_idname = "uv.textools_bake_queue_add"
+	bl_label = "Queue"
+	bl_description = "Add the current bake mode to the bake queue"
+
+	@classmethod
+	def poll(cls, context):
+		return utilities_ui.get_bake_mode() not in bpy.context.scene.texToolsSettings.bake_queue.split(',')
+
+	def execute(self, context):
+		queue = [mode for mode in bpy.context.scene.texToolsSettings.bake_queue.split(',') if mode != ""]
+		queue.append(utilities_ui.get_bake_mode())
+		bpy.context.scene.texToolsSettings.bake_queue = ",".join(queue)
+		return {'FINISHED'}
+
+
+
+class op_bake_cache_clear(bpy.types.Operator):
+	bl_idname = "uv.textools_bake_cache_clear"
+	bl_label = "Clear Cache"
+	bl_description = "Remove all images from the bake cache"
+
+	@classmethod
+	def poll(cls, context):
+		return True
+
+	def execute(self, context):
+		utilities_bake_cache.clear()
+		return {'FINISHED'}
+
+
+
+class op_bake_queue_clear(bpy.types.Operator):
+	bl_idname = "uv.textools_bake_queue_clear"
+	bl_label = "Clear Queue"
+	bl_description = "Remove all bake modes from the bake queue"
+
+	@classmethod
+	def poll(cls, context):
+		return True
+
+	def execute(self, context):
+		bpy.context.scene.texToolsSettings.bake_queue = ""
+		return {'FINISHED'}
+
+
+
+class op_texel_density_heatmap_clear(bpy.types.Operator):
+	bl_idname = "uv.textools_texel_density_heatmap_clear"
+	bl_label = "Clear Heatmap"
+	bl_description = "Remove the texel density heatmap colors and restore the viewport shading"
+	bl_options = {'REGISTER', 'UNDO'}
+
+	@classmethod
+	def poll(cls, context):
+		return True
+
+	def execute(self, context):
+		op_texel_density_heatmap.clear()
+		return {'FINISHED'}
+
+
+
 def on_dropdown_size(self, context):
 	# Help: http://elfnor.com/drop-down-and-button-select-menus-for-blender-operator-add-ons.html
 	size = int(bpy.context.scene.texToolsSettings.size_dropdown)
@@ -500,11 +598,45 @@ class TexToolsSettings(bpy.types.PropertyGroup):
 		('2', '2x', 'Render 2x and downsample'), 
 		('4', '4x', 'Render 2x and downsample')], name = "AA", default = '1'
 	)
+	bake_tile_size : EnumProperty(items= 
+		[('0', 'None', 'Bake the whole image at once'), 
+		('1024', '1024', 'Bake in tiles of 1024 pixels, downsampled tile by tile'), 
+		('2048', '2048', 'Bake in tiles of 2048 pixels, downsampled tile by tile'), 
+		('4096', '4096', 'Bake in tiles of 4096 pixels, downsampled tile by tile')], name = "Tiles", default = '0'
+	)
+	bake_filter : EnumProperty(items= 
+		[('BOX', 'Box', 'Average the supersampled pixels (Fast)'), 
+		('LANCZOS', 'Lanczos', 'Sharper downsampling with a Lanczos filter')], name = "Filter", default = 'BOX'
+	)
 	bake_freeze_selection : BoolProperty(
 		name="Lock",
 		description="Lock baking sets, don't change with selection",
 		default = False
 	)
+	bake_use_cache : BoolProperty(
+		name="Cache",
+		description="Reuse earlier bakes of unchanged sets and settings from the bake cache",
+		default = False
+	)
+	bake_queue : StringProperty(
+		name="Queue",
+		description="Comma separated bake modes to bake in one go",
+		default = ""
+	)
+	bake_farm_workers : IntProperty(
+		name = "Workers",
+		description = "Number of background Blender processes baking in parallel",
+		default = 2,
+		min = 1,
+		max = 64
+	)
+	bake_farm_threads : IntProperty(
+		name = "Threads",
+		description = "Render threads per worker, 0 splits the CPU cores evenly between the workers",
+		default = 0,
+		min = 0,
+		max = 256
+	)
 	texel_mode_scale : EnumProperty(items= 
 		[('ISLAND', 'Islands', 'Scale UV islands to match Texel Density'), 
 		('ALL', 'Combined', 'Scale all UVs together to match Texel Density')], 
@@ -826,6 +958,21 @@ class PANEL_PT_LAYOUT(bpy.types.Panel):
 		row.operator(op_texel_density_set.op.bl_idname, text="Apply", icon = 'FACESEL')
 		row.prop(context.scene.texToolsSettings, "texel_mode_scale", text = "", expand=False)
 
+		# Stats of the last heatmap
+		stats = settings.texel_density_stats
+		row = col.row(align=True)
+		row.operator(op_texel_density_heatmap.op.bl_idname, text="Heatmap", icon = 'COLOR')
+		if stats:
+			row.operator(op_texel_density_heatmap_clear.bl_idname, text = "", icon = 'X')
+
+		if stats:
+			c = col.box().column(align=True)
+			c.label(text="Min {:.1f}  Median {:.1f}  Max {:.1f}".format(stats['min'], stats['median'], stats['max']))
+			for label, count in stats['histogram']:
+				row = c.row(align=True)
+				row.label(text=label)
+				row.label(text="{}x  {:.0%}".format(count, count / stats['count']))
+
 		#---------- Selection ------------
 		
 
@@ -842,6 +989,8 @@ class PANEL_PT_LAYOUT(bpy.types.Panel):
 		row.operator(op_select_islands_outline.op.bl_idname, text="Bounds", icon_value = icon_get("op_select_islands_outline"))
 		row.operator(op_select_islands_flipped.op.bl_idname, text="Flipped", icon_value = icon_get('op_select_islands_flipped'))
 
+		col.operator(op_island_stack.op.bl_idname, text="Stack Identical", icon_value = icon_get("op_select_islands_identical"))
+
 		col.separator()
 		col.operator(op_smoothing_uv_islands.op.bl_idname, text="UV Smoothing", icon_value = icon_get("op_smoothing_uv_islands"))
 		
@@ -869,7 +1018,7 @@ class PANEL_PT_BAKE(bpy.types.Panel):
 
 		if not (bpy.context.scene.texToolsSettings.bake_freeze_selection and len(settings.sets) > 0):
 			# Update sets
-			settings.sets = utilities_bake.get_bake_sets()
+			settings.sets = utilities_bake.get_bake_sets_cached()
 
 
 		# Bake Button
@@ -883,6 +1032,35 @@ class PANEL_PT_BAKE(bpy.types.Panel):
 		row.scale_y = 1.75
 		row.operator(op_bake.op.bl_idname, text = "Bake {}x".format(count), icon_value = icon_get("op_bake"));
 
+		# Sets changed since their last bake
+		count_dirty = len([set for set in settings.sets if any(utilities_bake_dirty.is_dirty(set, mode) for mode in op_bake.get_queue(bpy.context.scene.texToolsSettings.bake_queue))])
+		row = col.row(align=True)
+		row.active = count_dirty > 0
+		row.operator(op_bake_changed.op.bl_idname, text = "Bake Changed {}x".format(count_dirty), icon = 'FILE_REFRESH').queue = bpy.context.scene.texToolsSettings.bake_queue
+
+		# Queue of bake modes
+		queue = [mode for mode in bpy.context.scene.texToolsSettings.bake_queue.split(',') if mode != ""]
+		row = col.row(align=True)
+		row.operator(op_bake_queue_add.bl_idname, text = "Queue", icon = 'ADD')
+		if len(queue) > 0:
+			row.operator(op_bake.op.bl_idname, text = "Bake Queue {}x".format(len(queue))).queue = bpy.context.scene.texToolsSettings.bake_queue
+			row.operator(op_bake_queue_clear.bl_idname, text = "", icon = 'X')
+			col.label(text = ", ".join(queue))
+
+		# Reuse unchanged bakes
+		row = col.row(align=True)
+		row.prop(context.scene.texToolsSettings, "bake_use_cache", icon = 'FILE_CACHE')
+		row.operator(op_bake_cache_clear.bl_idname, text = "", icon = 'TRASH')
+
+		# Background workers
+		row = col.row(align=True)
+		if settings.bake_farm:
+			row.label(text = "Baking on {}x workers...".format(len(settings.bake_farm.processes)), icon = 'TIME')
+		else:
+			row.operator(op_bake_farm.op.bl_idname, text = "Farm", icon = 'NETWORK_DRIVE').queue = bpy.context.scene.texToolsSettings.bake_queue
+		row.prop(context.scene.texToolsSettings, "bake_farm_workers", text = "")
+		row.prop(context.scene.texToolsSettings, "bake_farm_threads", text = "")
+
 		# anti aliasing
 		col.prop(context.scene.texToolsSettings, "bake_sampling", icon_value =icon_get("bake_anti_alias"))
 		
@@ -892,6 +1070,10 @@ class PANEL_PT_BAKE(bpy.types.Panel):
 			size_x = bpy.context.scene.texToolsSettings.size[0] * size_aa
 			size_y = bpy.context.scene.texToolsSettings.size[1] * size_aa
 			col.label(text="Bake   {} x {}".format(size_x, size_y), icon='ERROR')
+			col.prop(context.scene.texToolsSettings, "bake_filter")
+
+		# Tiles cap the memory of supersampled bakes
+		col.prop(context.scene.texToolsSettings, "bake_tile_size")
 
 
 		if bpy.app.debug_value != 0:
@@ -909,7 +1091,7 @@ class PANEL_PT_BAKE(bpy.types.Panel):
 		row.scale_y = 1.5
 		row.operator(op_texture_preview.op.bl_idname, text = "Preview Texture", icon_value = icon_get("op_texture_preview"));
 		
-		images = utilities_bake.get_baked_images(settings.sets)
+		images = utilities_bake.get_baked_images_cached(settings.sets)
 		
 		if len(images) > 0:
 
@@ -1348,6 +1530,7 @@ def menu_IMAGE_select(self, context):
 	layout.separator()
 	layout.operator(op_select_islands_identical.op.bl_idname, text="Similar", icon_value = icon_get("op_select_islands_identical"))
 	layout.operator(op_select_islands_overlap.op.bl_idname, text="Overlap", icon_value = icon_get("op_select_islands_overlap"))
+	layout.operator(op_select_islands_overlap.op.bl_idname, text="Self Overlap", icon_value = icon_get("op_select_islands_overlap")).mode = 'SELF'
 	layout.operator(op_select_islands_outline.op.bl_idname, text="Bounds", icon_value = icon_get("op_select_islands_outline"))
 	layout.operator(op_select_islands_flipped.op.bl_idname, text="Flipped", icon_value = icon_get('op_select_islands_flipped'))
 	
@@ -1393,6 +1576,10 @@ classes = (
 	op_disable_uv_sync,
 	op_select_bake_set,
 	op_select_bake_type,
+	op_bake_queue_add,
+	op_bake_queue_clear,
+	op_bake_cache_clear,
+	op_texel_density_heatmap_clear,
 	PANEL_PT_UNITS,
 	PANEL_PT_LAYOUT,
 	PANEL_PT_BAKE,
@@ -1414,9 +1601,15 @@ def register():
 
 	#GUI Utilities
 	utilities_ui.register()
+	utilities_island_cache.register()
+	utilities_texel.register()
+	utilities_bake_dirty.register()
+	utilities_bake.register()
 	op_align.register()
 	op_bake.register()
 	op_bake_explode.register()
+	op_bake_farm.register()
+	op_bake_changed.register()
 	op_bake_organize_names.register()
 	op_texture_preview.register()
 	op_color_assign.register()
@@ -1436,6 +1629,7 @@ def register():
 	op_island_align_world.register()
 	op_island_mirror.register()
 	op_island_rotate_90.register()
+	op_island_stack.register()
 	op_island_straighten_edge_loops.register()
 	op_rectify.register()
 	op_select_islands_identical.register()
@@ -1451,6 +1645,7 @@ def register():
 	op_texel_checker_map.register()
 	op_texel_density_get.register()
 	op_texel_density_set.register()
+	op_texel_density_heatmap.register()
 	op_texture_reload_all.register()
 	op_texture_save.register()
 	op_texture_open.register()
@@ -1534,6 +1729,8 @@ def unregister():
 	op_align.unregister()
 	op_bake.unregister()
 	op_bake_explode.unregister()
+	op_bake_farm.unregister()
+	op_bake_changed.unregister()
 	op_bake_organize_names.unregister()
 	op_texture_preview.unregister()
 	op_color_assign.unregister()
@@ -1553,6 +1750,7 @@ def unregister():
 	op_island_align_world.unregister()
 	op_island_mirror.unregister()
 	op_island_rotate_90.unregister()
+	op_island_stack.unregister()
 	op_island_straighten_edge_loops.unregister()
 	op_rectify.unregister()
 	op_select_islands_identical.unregister()
@@ -1568,6 +1766,7 @@ def unregister():
 	op_texel_checker_map.unregister()
 	op_texel_density_get.unregister()
 	op_texel_density_set.unregister()
+	op_texel_density_heatmap.unregister()
 	op_texture_reload_all.unregister()
 	op_texture_save.unregister()
 	op_texture_open.unregister()
@@ -1583,6 +1782,10 @@ def unregister():
 	op_uv_size_get.unregister()
 
 	utilities_ui.unregister()
+	utilities_island_cache.unregister()
+	utilities_texel.unregister()
+	utilities_bake_dirty.unregister()
+	utilities_bake.unregister()
 
 	for cla in classes:
 		bpy.utils.unregister_class(cla)
@@ -6,6 +6,8 @@ from collections import defaultdict
 from math import pi
 
 from . import utilities_uv
+from . import utilities_island_cache
+from . import utilities_uv_view
 
 
 class op(bpy.types.Operator):
@@ -56,69 +58,64 @@ def align(context, direction):
 	if bpy.context.space_data.pivot_point != 'CENTER':
 		bpy.context.space_data.pivot_point = 'CENTER'
 
-	#B-Mesh
-	obj = bpy.context.active_object
-	bm = bmesh.from_edit_mesh(obj.data);
-	uv_layer = bm.loops.layers.uv.verify();
-
-	if len(obj.data.uv_layers) == 0:
+	# All objects in edit mode share one bounds frame
+	objects = utilities_uv.get_edit_objects()
+	if len(objects) == 0:
 		print("There is no UV channel or UV data set")
 		return
 
 	# Collect BBox sizes
-	boundsAll = utilities_uv.getSelectionBBox()
+	boundsAll = utilities_uv.getSelectionBBox(objects)
 
 	mode = bpy.context.scene.tool_settings.uv_select_mode
 	if mode == 'FACE' or mode == 'ISLAND':
 		print("____ Align Islands")
 		
 		#Collect UV islands
-		islands = utilities_uv.getSelectionIslands()
-
-		for island in islands:
-			
-			bpy.ops.uv.select_all(action='DESELECT')
-			utilities_uv.set_selected_uv_faces(island)
-			bounds = utilities_uv.getSelectionBBox()
-
-			# print("Island "+str(len(island))+"x faces, delta: "+str(delta.y))
-
-			if direction == "bottom":
-				delta = boundsAll['min'] - bounds['min'] 
-				bpy.ops.transform.translate(value=(0, delta.y, 0))
-			elif direction == "top":
-				delta = boundsAll['max'] - bounds['max']
-				bpy.ops.transform.translate(value=(0, delta.y, 0))
-			elif direction == "left":
-				delta = boundsAll['min'] - bounds['min'] 
-				bpy.ops.transform.translate(value=(delta.x, 0, 0))
-			elif direction == "right":
-				delta = boundsAll['max'] - bounds['max']
-				bpy.ops.transform.translate(value=(delta.x, 0, 0))
-			else:
-				print("Unkown direction: "+str(direction))
+		for obj, islands, view in utilities_uv.get_edit_islands(objects):
+			islands_bounds = view.get_island_bboxes(islands)
+
+			# Offset per island, applied together in a single write
+			offsets = []
+			for bounds in islands_bounds:
+				if direction == "bottom":
+					delta = boundsAll['min'] - bounds['min'] 
+					offsets.append((0, delta.y))
+				elif direction == "top":
+					delta = boundsAll['max'] - bounds['max']
+					offsets.append((0, delta.y))
+				elif direction == "left":
+					delta = boundsAll['min'] - bounds['min'] 
+					offsets.append((delta.x, 0))
+				elif direction == "right":
+					delta = boundsAll['max'] - bounds['max']
+					offsets.append((delta.x, 0))
+				else:
+					print("Unkown direction: "+str(direction))
+					offsets.append((0, 0))
+
+			view.transform_islands(islands, offsets=offsets)
+			view.write()
+
+			# Islands only moved, keep them cached for the next operation
+			utilities_island_cache.refresh(obj)
 
 
 	elif mode == 'EDGE' or mode == 'VERTEX':
 		print("____ Align Verts")
 
-		for f in bm.faces:
-			if f.select:
-				for l in f.loops:
-					luv = l[uv_layer]
-					if luv.select:
-						# print("Idx: "+str(luv.uv))
-						if direction == "top":
-							luv.uv[1] = boundsAll['max'].y
-						elif direction == "bottom":
-							luv.uv[1] = boundsAll['min'].y
-						elif direction == "left":
-							luv.uv[0] = boundsAll['min'].x
-						elif direction == "right":
-							luv.uv[0] = boundsAll['max'].x
-
-
-		bmesh.update_edit_mesh(obj.data)
+		for obj in objects:
+			view = utilities_uv_view.UVMeshView(obj)
+			mask = view.get_selected_loops()
+			if direction == "top":
+				view.uvs[mask, 1] = boundsAll['max'].y
+			elif direction == "bottom":
+				view.uvs[mask, 1] = boundsAll['min'].y
+			elif direction == "left":
+				view.uvs[mask, 0] = boundsAll['min'].x
+			elif direction == "right":
+				view.uvs[mask, 0] = boundsAll['max'].x
+			view.write()
 
 	#Restore selection
 	utilities_uv.selection_restore()
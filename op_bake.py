@@ -1,12 +1,16 @@
 import bpy
 import os
 import bmesh
+import numpy as np
 from mathutils import Vector
 from collections import defaultdict
 from math import pi
 from random import random
 
 from . import utilities_ui
+from . import utilities_image
+from . import utilities_bake_cache
+from . import utilities_bake_dirty
 from . import settings
 from . import utilities_bake as ub #Use shorthand ub = utitlites_bake
 
@@ -44,6 +48,8 @@ class op(bpy.types.Operator):
 	bl_label = "Bake"
 	bl_description = "Bake selected objects"
 
+	queue : bpy.props.StringProperty(name="Queue", description="Comma separated bake modes, the current bake mode if empty", default="")
+
 	@classmethod
 	def poll(cls, context):
 		if len(settings.sets) == 0:
@@ -51,11 +57,12 @@ class op(bpy.types.Operator):
 		return True
 
 	def execute(self, context):
-		bake_mode = utilities_ui.get_bake_mode()
+		queue = get_queue(self.queue)
 
-		if bake_mode not in modes:
-			self.report({'ERROR_INVALID_INPUT'}, "Uknown mode '{}' only available: '{}'".format(bake_mode, ", ".join(modes.keys() )) )
-			return
+		for bake_mode in queue:
+			if bake_mode not in modes:
+				self.report({'ERROR_INVALID_INPUT'}, "Uknown mode '{}' only available: '{}'".format(bake_mode, ", ".join(modes.keys() )) )
+				return {'CANCELLED'}
 
 		# Store Selection
 		selected_objects 	= [obj for obj in bpy.context.selected_objects]
@@ -63,16 +70,19 @@ class op(bpy.types.Operator):
 		ub.store_bake_settings()
 
 		# Render sets
-		bake(
+		images = bake(
 			self = self, 
-			mode = bake_mode,
+			queue = queue,
 			size = bpy.context.scene.texToolsSettings.size, 
 
 			bake_single = bpy.context.scene.texToolsSettings.bake_force_single,
 			sampling_scale = int(bpy.context.scene.texToolsSettings.bake_sampling),
 			samples = bpy.context.scene.texToolsSettings.bake_samples,
-			ray_distance = bpy.context.scene.texToolsSettings.bake_ray_distance
+			ray_distance = bpy.context.scene.texToolsSettings.bake_ray_distance,
+			tile_size = int(bpy.context.scene.texToolsSettings.bake_tile_size)
 		)
+		if images is not None:
+			utilities_bake_dirty.mark_baked(settings.sets, queue)
 		
 		# Restore selection
 		ub.restore_bake_settings()
@@ -86,168 +96,329 @@ class op(bpy.types.Operator):
 
 
 
-def bake(self, mode, size, bake_single, sampling_scale, samples, ray_distance):
+def get_queue(text=""):
+	"""Bake modes of a comma separated queue, the current bake mode if empty"""
+	queue = [mode.strip() for mode in text.split(',') if mode.strip() != ""]
+	if len(queue) == 0:
+		queue = [utilities_ui.get_bake_mode()]
+	return queue
+
 
-	print("Bake '{}'".format(mode))
 
-	bpy.context.scene.render.engine = modes[mode].engine #Switch render engine
+def bake(self, queue, size, bake_single, sampling_scale, samples, ray_distance, sets=None, tile_size=0):
+	"""Bake all sets once per mode of the queue.
+	Sets are validated and their materials stored once, each mode only swaps the bake material, image and bake type.
+	Modes that read the original materials get them back in bulk first, everything is restored once at the end.
+	Returns the baked images, None if a set can't be baked"""
+	if sets is None:
+		sets = settings.sets
 
 	# Disable edit mode
 	if bpy.context.view_layer.objects.active != None and bpy.context.object.mode != 'OBJECT':
 	 	bpy.ops.object.mode_set(mode='OBJECT')
 
+	for set in sets:
+		if not is_valid_set(self, set):
+			return None
+
+	# Cache keys of the untouched scene, before materials are renamed and swapped
+	keys = {}
+	if bpy.context.scene.texToolsSettings.bake_use_cache:
+		# Objects are hashed once, their digests are shared by all modes
+		digests = {}
+		for mode in queue:
+			keys[mode] = utilities_bake_cache.get_keys(modes[mode], mode, sets, bake_single, size, sampling_scale, samples, ray_distance, tile_size, digests)
+
+	# Store materials of all objects once for the entire queue
 	ub.store_materials_clear()
+	for set in sets:
+		objects = set.objects_low
+		if (len(set.objects_high) + len(set.objects_float)) > 0:
+			objects = objects + set.objects_high + set.objects_float
+		for obj in objects:
+			ub.store_materials(obj)
+
+	material_empty = None
+	if "TT_bake_node" in bpy.data.materials:
+		material_empty = bpy.data.materials["TT_bake_node"]
+	else:
+		material_empty = bpy.data.materials.new(name="TT_bake_node")
 
-	# Get the baking sets / pairs
-	sets = settings.sets
+	images = []
+	vertex_colors = {}
+	for mode in queue:
+		print("Bake '{}'".format(mode))
 
-	render_width = sampling_scale * size[0]
-	render_height = sampling_scale * size[1]
+		bpy.context.scene.render.engine = modes[mode].engine #Switch render engine
+		material_loaded = get_material(mode)
 
-	for s in range(0,len(sets)):
-		set = sets[s]
+		# Diffuse and material IDs read the original materials, other modes without a bake material
+		# leave the high poly materials in place. Bake materials of earlier modes must not remain.
+		if mode != queue[0] and (mode in ('diffuse', 'id_material') or modes[mode].material == ""):
+			ub.reset_materials()
+
+		# Images in the cache skip the bake of their sets
+		cached = {}
+		for name, key in keys.get(mode, {}).items():
+			image = utilities_bake_cache.load(key, name)
+			if image:
+				cached[name] = image
+
+		for s in range(0,len(sets)):
+			name = get_image_name(mode, sets, s, bake_single)
+			if name in cached:
+				image = cached[name]
+			else:
+				image = bake_set(mode, sets, s, size, bake_single, sampling_scale, samples, ray_distance, material_loaded, material_empty, vertex_colors, tile_size)
+				# Single texture mode finishes its image with the last set
+				if mode in keys and (not bake_single or s == len(sets)-1):
+					utilities_bake_cache.store(keys[mode][name], image)
 
-		# Get image name
-		name_texture = "{}_{}".format(set.name, mode)
-		if bake_single:
-			name_texture = "{}_{}".format(sets[0].name, mode)# In Single mode bake into same texture
-		path = bpy.path.abspath("//{}.tga".format(name_texture))
+			if image not in images:
+				images.append(image)
 
-		# Requires 1+ low poly objects
-		if len(set.objects_low) == 0:
-			self.report({'ERROR_INVALID_INPUT'}, "No low poly object as part of the '{}' set".format(set.name) )
-			return
+	# Restore non node materials
+	ub.restore_materials()
 
-		# Check for UV maps
-		for obj in set.objects_low:
-			if not obj.data.uv_layers or len(obj.data.uv_layers) == 0:
-				self.report({'ERROR_INVALID_INPUT'}, "No UV map available for '{}'".format(obj.name))
-				return
+	return images
 
-		# Check for cage inconsistencies
-		if len(set.objects_cage) > 0 and (len(set.objects_low) != len(set.objects_cage)):
-			self.report({'ERROR_INVALID_INPUT'}, "{}x cage objects do not match {}x low poly objects for '{}'".format(len(set.objects_cage), len(set.objects_low), obj.name))
-			return
 
-		# Get Materials
-		material_loaded = get_material(mode)
-		material_empty = None
-		if "TT_bake_node" in bpy.data.materials:
-			material_empty = bpy.data.materials["TT_bake_node"]
-		else:
-			material_empty = bpy.data.materials.new(name="TT_bake_node")
 
+def is_valid_set(self, set):
+	# Requires 1+ low poly objects
+	if len(set.objects_low) == 0:
+		self.report({'ERROR_INVALID_INPUT'}, "No low poly object as part of the '{}' set".format(set.name) )
+		return False
+
+	# Check for UV maps
+	for obj in set.objects_low:
+		if not obj.data.uv_layers or len(obj.data.uv_layers) == 0:
+			self.report({'ERROR_INVALID_INPUT'}, "No UV map available for '{}'".format(obj.name))
+			return False
+
+	# Check for cage inconsistencies
+	if len(set.objects_cage) > 0 and (len(set.objects_low) != len(set.objects_cage)):
+		self.report({'ERROR_INVALID_INPUT'}, "{}x cage objects do not match {}x low poly objects for '{}'".format(len(set.objects_cage), len(set.objects_low), set.name))
+		return False
+
+	return True
 
-		# Assign Materials to Objects
-		if (len(set.objects_high) + len(set.objects_float)) == 0:
-			# Low poly bake: Assign material to lowpoly
-			for obj in set.objects_low:
-				assign_vertex_color(mode, obj)
-				assign_material(mode, obj, material_loaded, material_empty)
-		else:
-			# High to low poly: Low poly require empty material to bake into image
-			for obj in set.objects_low:
-				assign_material(mode, obj, None, material_empty)
 
-			# Assign material to highpoly
-			for obj in (set.objects_high+set.objects_float):
-				assign_vertex_color(mode, obj)
-				assign_material(mode, obj, material_loaded)
 
+def bake_set(mode, sets, s, size, bake_single, sampling_scale, samples, ray_distance, material_loaded, material_empty, vertex_colors, tile_size=0):
+	set = sets[s]
+
+	render_width = sampling_scale * size[0]
+	render_height = sampling_scale * size[1]
+
+	# Large supersampled images are baked in tiles straight into the final size
+	is_tiled = tile_size > 0 and (render_width > tile_size or render_height > tile_size)
 
-		# Setup Image
-		is_clear = (not bake_single) or (bake_single and s==0)
+	# Get image name
+	name_texture = get_image_name(mode, sets, s, bake_single)
+	path = bpy.path.abspath("//{}.tga".format(name_texture))
+
+	# Assign Materials to Objects
+	if (len(set.objects_high) + len(set.objects_float)) == 0:
+		# Low poly bake: Assign material to lowpoly
+		for obj in set.objects_low:
+			assign_vertex_color(mode, obj, vertex_colors)
+			assign_material(mode, obj, material_loaded, material_empty)
+	else:
+		# High to low poly: Low poly require empty material to bake into image
+		for obj in set.objects_low:
+			assign_material(mode, obj, None, material_empty)
+
+		# Assign material to highpoly
+		for obj in (set.objects_high+set.objects_float):
+			assign_vertex_color(mode, obj, vertex_colors)
+			assign_material(mode, obj, material_loaded)
+
+
+	# Setup Image
+	is_clear = (not bake_single) or (bake_single and s==0)
+	if is_tiled:
+		image = setup_image(mode, name_texture, size[0], size[1], path, is_clear)
+	else:
 		image = setup_image(mode, name_texture, render_width, render_height, path, is_clear)
 
+	print("Bake '{}' = {}".format(set.name, path))
+
+	# Hide all cage objects i nrender
+	for obj_cage in set.objects_cage:
+		obj_cage.hide_render = True
+
+	if is_tiled:
+		bake_tiled(mode, set, image, size, sampling_scale, tile_size, samples, ray_distance)
+	else:
 		# Assign bake node to Material
 		setup_image_bake_node(set.objects_low[0], image)
-		
+		bake_objects(mode, set, image, sampling_scale, samples, ray_distance)
 
-		print("Bake '{}' = {}".format(set.name, path))
+	# Restore renderable for cage objects
+	for obj_cage in set.objects_cage:
+		obj_cage.hide_render = False
 
-		# Hide all cage objects i nrender
-		for obj_cage in set.objects_cage:
-			obj_cage.hide_render = True
 
-		# Bake each low poly object in this set
-		for i in range(len(set.objects_low)):
-			obj_low = set.objects_low[i]
-			obj_cage = None if i >= len(set.objects_cage) else set.objects_cage[i]
+	# Downsample image?
+	if not is_tiled and (not bake_single or (bake_single and s == len(sets)-1)):
+		# When baking single, only downsample on last bake
+		if render_width != size[0] or render_height != size[1]:
+			utilities_image.resample_image(image, size[0], size[1], bpy.context.scene.texToolsSettings.bake_filter)
+	
+	# Apply composite nodes on final image result
+	if modes[mode].composite:
+		apply_composite(image, modes[mode].composite, bpy.context.scene.texToolsSettings.bake_curvature_size)
 
-			# Disable hide render
-			obj_low.hide_render = False
+	# image.save()
+	return image
 
-			bpy.ops.object.select_all(action='DESELECT')
-			obj_low.select_set(True)
-			bpy.context.view_layer.objects.active = obj_low
 
-			if modes[mode].engine == 'BLENDER_RENDER':
-				# Assign image to texture faces
-				bpy.ops.object.mode_set(mode='EDIT')
-				bpy.ops.mesh.select_all(action='SELECT')
 
-				for area in bpy.context.screen.areas:
-					if area.type == 'IMAGE_EDITOR':
-						area.spaces[0].image = image
-				# bpy.data.screens['UV Editing'].areas[1].spaces[0].image = image
+def get_image_name(mode, sets, s, bake_single):
+	if bake_single:
+		return "{}_{}".format(sets[0].name, mode)# In Single mode bake into same texture
+	return "{}_{}".format(sets[s].name, mode)
+
+
+
+def bake_objects(mode, set, image, sampling_scale, samples, ray_distance):
+	# Bake each low poly object in this set
+	for i in range(len(set.objects_low)):
+		obj_low = set.objects_low[i]
+		obj_cage = None if i >= len(set.objects_cage) else set.objects_cage[i]
+
+		# Disable hide render
+		obj_low.hide_render = False
+
+		bpy.ops.object.select_all(action='DESELECT')
+		obj_low.select_set(True)
+		bpy.context.view_layer.objects.active = obj_low
+
+		if modes[mode].engine == 'BLENDER_RENDER':
+			# Assign image to texture faces
+			bpy.ops.object.mode_set(mode='EDIT')
+			bpy.ops.mesh.select_all(action='SELECT')
+
+			set_image_editor_image(image)
+			# bpy.data.screens['UV Editing'].areas[1].spaces[0].image = image
+
 
+			bpy.ops.object.mode_set(mode='OBJECT')
 
-				bpy.ops.object.mode_set(mode='OBJECT')
+		for obj_high in (set.objects_high):
+			obj_high.select_set(True)
 
-			for obj_high in (set.objects_high):
+		cycles_bake(
+			mode, 
+			bpy.context.scene.texToolsSettings.padding,
+			sampling_scale, 
+			samples, 
+			ray_distance,
+			 len(set.objects_high) > 0, 
+			 obj_cage
+		)
+
+		# Bake Floaters seperate bake
+		if len(set.objects_float) > 0:
+			bpy.ops.object.select_all(action='DESELECT')
+			for obj_high in (set.objects_float):
 				obj_high.select_set(True)
+			obj_low.select_set(True)
 
 			cycles_bake(
 				mode, 
-				bpy.context.scene.texToolsSettings.padding,
+				0,
 				sampling_scale, 
 				samples, 
-				ray_distance,
-				 len(set.objects_high) > 0, 
-				 obj_cage
+				ray_distance, 
+				len(set.objects_float) > 0,
+				obj_cage
 			)
 
-			# Bake Floaters seperate bake
-			if len(set.objects_float) > 0:
-				bpy.ops.object.select_all(action='DESELECT')
-				for obj_high in (set.objects_float):
-					obj_high.select_set(True)
-				obj_low.select_set(True)
-
-				cycles_bake(
-					mode, 
-					0,
-					sampling_scale, 
-					samples, 
-					ray_distance, 
-					len(set.objects_float) > 0,
-					obj_cage
-				)
-
-			# Set background image (CYCLES & BLENDER_RENDER)
-			for area in bpy.context.screen.areas:
-				if area.type == 'IMAGE_EDITOR':
-					area.spaces[0].image = image
-
-		# Restore renderable for cage objects
-		for obj_cage in set.objects_cage:
-			obj_cage.hide_render = False
-
-
-		# Downsample image?
-		if not bake_single or (bake_single and s == len(sets)-1):
-			# When baking single, only downsample on last bake
-			if render_width != size[0] or render_height != size[1]:
-				image.scale(size[0],size[1])
-		
-		# Apply composite nodes on final image result
-		if modes[mode].composite:
-			apply_composite(image, modes[mode].composite, bpy.context.scene.texToolsSettings.bake_curvature_size)
+		# Set background image (CYCLES & BLENDER_RENDER)
+		set_image_editor_image(image)
+
+
+
+def bake_tiled(mode, set, image, size, sampling_scale, tile_size, samples, ray_distance):
+	"""Bake the set tile by tile at supersampled resolution and downsample each tile into the final size image.
+	The low poly UVs are remapped so that each tile fills the bake image, faces outside the tile are clipped by the bake.
+	Peak memory is bound by the tile size instead of the whole supersampled image."""
+	width, height = size[0], size[1]
+	step = max(1, tile_size // sampling_scale)
+	# Overlap tiles by the bake margin and the filter taps, neither may reach a seam
+	margin = bpy.context.scene.texToolsSettings.padding * sampling_scale
+	border = int(np.ceil(margin / sampling_scale)) + utilities_image.get_filter_support(bpy.context.scene.texToolsSettings.bake_filter)
+
+	pixels = utilities_image.get_pixels(image)
+	uvs = {obj : get_uvs(obj) for obj in set.objects_low}
+	# Tiles share their buffers, only edge tiles of another size allocate
+	buffer_tile = None
+	buffer_result = None
+	buffers_resample = {}
+
+	tile = bpy.data.images.new("TT_bake_tile", width=1, height=1, float_buffer=image.is_float)
+	tile.colorspace_settings.name = image.colorspace_settings.name
+	setup_image_bake_node(set.objects_low[0], tile)
+
+	try:
+		for y in range(0, height, step):
+			for x in range(0, width, step):
+				x_min, y_min = max(0, x - border), max(0, y - border)
+				x_max, y_max = min(width, x + step + border), min(height, y + step + border)
+				print("Bake tile {} x {}".format(x, y))
+
+				# Start from the current result so sets in single texture mode keep earlier bakes
+				region = pixels[y_min:y_max, x_min:x_max]
+				tile.scale((x_max - x_min) * sampling_scale, (y_max - y_min) * sampling_scale)
+				buffer_tile = utilities_image.upsample_nearest(region, sampling_scale, buffer_tile)
+				utilities_image.set_pixels(tile, buffer_tile)
+
+				for obj, uv in uvs.items():
+					set_uvs(obj, (uv * (width, height) - (x_min, y_min)) / (x_max - x_min, y_max - y_min))
+
+				bake_objects(mode, set, tile, sampling_scale, samples, ray_distance)
+
+				# Filter the tile down and keep it without its border
+				buffer_tile = utilities_image.get_pixels(tile, buffer_tile)
+				buffer_result = utilities_image.resample(buffer_tile, x_max - x_min, y_max - y_min, bpy.context.scene.texToolsSettings.bake_filter, buffer_result, buffers_resample)
+				pixels[y:y+step, x:x+step] = buffer_result[y - y_min : y - y_min + step, x - x_min : x - x_min + step]
+
+		utilities_image.set_pixels(image, pixels)
+
+	finally:
+		# A failed or cancelled bake must not leave remapped UVs or the tile behind
+		for obj, uv in uvs.items():
+			set_uvs(obj, uv)
+		setup_image_bake_node(set.objects_low[0], image)
+		bpy.data.images.remove(tile)
+
+	set_image_editor_image(image)
 
-		# image.save()
 
-	# Restore non node materials
-	ub.restore_materials()
+
+def get_uvs(obj):
+	uv_layer = obj.data.uv_layers.active
+	uvs = np.empty((len(uv_layer.data), 2), dtype=np.float32)
+	uv_layer.data.foreach_get('uv', uvs.ravel())
+	return uvs
+
+
+
+def set_uvs(obj, uvs):
+	obj.data.uv_layers.active.data.foreach_set('uv', np.asarray(uvs, dtype=np.float32).ravel())
+	obj.data.update()
+
+
+
+def set_image_editor_image(image):
+	# No screen when baking in background mode
+	if not bpy.context.screen:
+		return
+	for area in bpy.context.screen.areas:
+		if area.type == 'IMAGE_EDITOR':
+			area.spaces[0].image = image
 
 
 
@@ -285,8 +456,7 @@ def apply_composite(image, scene_name, size):
 		image_render_result = get_last_item("Render Result", bpy.data.images)
 
 		#Copy pixels
-		image.pixels = image_viewer_node.pixels[:]
-		image.update()
+		utilities_image.copy_pixels(image_viewer_node, image)
 
 		if image_viewer_node:
 			bpy.data.images.remove(image_viewer_node)
@@ -397,13 +567,19 @@ def setup_image_bake_node(obj, image):
 
 
 
-def assign_vertex_color(mode, obj):
+def assign_vertex_color(mode, obj, vertex_colors=None):
 	if modes[mode].setVColor:
+		# Skip objects that already carry the vertex colors of this method from a previous mode
+		if vertex_colors is not None and vertex_colors.get(obj) == modes[mode].setVColor:
+			return
 		modes[mode].setVColor(obj)
+		if vertex_colors is not None:
+			vertex_colors[obj] = modes[mode].setVColor
 
 
 
 def assign_material(mode, obj, material_bake=None, material_empty=None):
+	# Materials are stored once by bake() before any mode assigns its own
 	ub.store_materials(obj)
 
 	bpy.context.view_layer.objects.active = obj
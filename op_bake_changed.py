@@ -0,0 +1,179 @@
+import bpy
+import numpy as np
+
+from . import settings
+from . import op_bake
+from . import utilities_image
+from . import utilities_bake_dirty
+from . import utilities_bake as ub
+
+
+class op(bpy.types.Operator):
+	bl_idname = "uv.textools_bake_changed"
+	bl_label = "Bake Changed"
+	bl_description = "Bake only the sets that changed geometry, transform or material since their last bake"
+
+	queue : bpy.props.StringProperty(name="Queue", description="Comma separated bake modes, the current bake mode if empty", default="")
+
+	@classmethod
+	def poll(cls, context):
+		if len(settings.sets) == 0:
+			return False
+		return True
+
+	def execute(self, context):
+		queue = op_bake.get_queue(self.queue)
+		for bake_mode in queue:
+			if bake_mode not in op_bake.modes:
+				self.report({'ERROR_INVALID_INPUT'}, "Uknown mode '{}' only available: '{}'".format(bake_mode, ", ".join(op_bake.modes.keys() )) )
+				return {'CANCELLED'}
+
+		# Store Selection
+		selected_objects 	= [obj for obj in bpy.context.selected_objects]
+		active_object 		= bpy.context.view_layer.objects.active
+		ub.store_bake_settings()
+
+		count = bake_changed(
+			self = self,
+			queue = queue,
+			size = bpy.context.scene.texToolsSettings.size,
+			bake_single = bpy.context.scene.texToolsSettings.bake_force_single,
+			sampling_scale = int(bpy.context.scene.texToolsSettings.bake_sampling),
+			samples = bpy.context.scene.texToolsSettings.bake_samples,
+			ray_distance = bpy.context.scene.texToolsSettings.bake_ray_distance,
+			tile_size = int(bpy.context.scene.texToolsSettings.bake_tile_size)
+		)
+
+		# Restore selection
+		ub.restore_bake_settings()
+		bpy.ops.object.select_all(action='DESELECT')
+		for obj in selected_objects:
+			obj.select_set(True)
+		if active_object:
+			bpy.context.view_layer.objects.active = active_object
+
+		if count is not None:
+			self.report({'INFO'}, "Baked {}x changed sets".format(count))
+		return {'FINISHED'}
+
+
+
+def bake_changed(self, queue, size, bake_single, sampling_scale, samples, ray_distance, tile_size):
+	"""Bake the dirty sets of each mode, returns the number of baked sets or None on errors"""
+	sets = settings.sets
+
+	# Modes with the same dirty sets bake as one queue
+	groups = {}
+	for mode in queue:
+		names = tuple(set.name for set in utilities_bake_dirty.get_dirty(sets, mode))
+		if len(names) > 0:
+			groups.setdefault(names, []).append(mode)
+
+	count = 0
+	for names, group in groups.items():
+		dirty = [set for set in sets if set.name in names]
+		if bake_single and len(dirty) < len(sets):
+			images = bake_single_changed(self, group, sets, dirty, size, sampling_scale, samples, ray_distance, tile_size)
+		else:
+			images = op_bake.bake(self, group, size, bake_single, sampling_scale, samples, ray_distance, dirty, tile_size)
+		if images is None:
+			return None
+
+		utilities_bake_dirty.mark_baked(dirty, group)
+		count+= len(dirty)
+
+	return count
+
+
+
+def bake_single_changed(self, queue, sets, dirty, size, sampling_scale, samples, ray_distance, tile_size):
+	"""Bake the changed sets into images of their own and composite them into the single texture.
+	Only the pixels of the old and new UV triangles of the changed sets are replaced, the other sets keep their bake."""
+	width, height = size[0], size[1]
+
+	# Without a finished single texture of every mode all sets need to bake
+	singles = {}
+	for mode in queue:
+		image = bpy.data.images.get(op_bake.get_image_name(mode, sets, 0, True))
+		if image is None or image.size[0] != width or image.size[1] != height:
+			return op_bake.bake(self, queue, size, True, sampling_scale, samples, ray_distance, sets, tile_size)
+		singles[mode] = image
+
+	# Free the single texture names, the first set bakes into the same name on its own
+	for mode, image in singles.items():
+		image.name = "TT_single_{}".format(mode)
+
+	# Per set images of earlier bakes make way for the parts and get their names back afterwards
+	kept = []
+	for mode in queue:
+		for s in range(len(dirty)):
+			image = bpy.data.images.get(op_bake.get_image_name(mode, dirty, s, False))
+			if image:
+				kept.append((image, image.name))
+				image.name = "TT_keep_{}".format(image.name)
+
+	# Names come back even when the bake or the compositing fails
+	try:
+		images = composite_changed(self, queue, sets, dirty, singles, size, sampling_scale, samples, ray_distance, tile_size)
+	finally:
+		for mode in queue:
+			for s in range(len(dirty)):
+				part = bpy.data.images.get(op_bake.get_image_name(mode, dirty, s, False))
+				if part:
+					bpy.data.images.remove(part)
+		for mode, image in singles.items():
+			image.name = op_bake.get_image_name(mode, sets, 0, True)
+		for image, name in kept:
+			image.name = name
+
+	if images is None:
+		return None
+	op_bake.set_image_editor_image(images[0])
+	return images
+
+
+
+def composite_changed(self, queue, sets, dirty, singles, size, sampling_scale, samples, ray_distance, tile_size):
+	"""Bake the changed sets into per set parts and copy their pixels into the single textures"""
+	width, height = size[0], size[1]
+	parts = op_bake.bake(self, queue, size, False, sampling_scale, samples, ray_distance, dirty, tile_size)
+	if parts is None:
+		return None
+
+	# Pixels of the unchanged sets stay as they are, margins only fill around them
+	mask_clean = np.zeros((height, width), dtype=bool)
+	for set in sets:
+		if set not in dirty:
+			mask_clean|= utilities_image.get_triangles_mask(utilities_bake_dirty.baked_uvs.get(set.name, []), width, height)
+
+	# Margins around the old and the new UV triangles
+	padding = bpy.context.scene.texToolsSettings.padding
+	mask_old = utilities_image.get_triangles_mask(utilities_bake_dirty.baked_uvs.get(dirty[0].name, []), width, height)
+	for set in dirty[1:]:
+		mask_old|= utilities_image.get_triangles_mask(utilities_bake_dirty.baked_uvs.get(set.name, []), width, height)
+	mask_old = utilities_image.dilate_mask(mask_old, padding) & ~mask_clean
+	masks_new = [utilities_image.dilate_mask(utilities_image.get_triangles_mask(utilities_bake_dirty.get_uv_triangles(set), width, height), padding) & ~mask_clean for set in dirty]
+
+	images = []
+	buffer = None
+	for mode, image in singles.items():
+		pixels = utilities_image.get_pixels(image)
+		pixels[mask_old] = op_bake.modes[mode].color
+
+		for s in range(len(dirty)):
+			part = bpy.data.images[op_bake.get_image_name(mode, dirty, s, False)]
+			buffer = utilities_image.get_pixels(part, buffer)
+			pixels[masks_new[s]] = buffer[masks_new[s]]
+
+		utilities_image.set_pixels(image, pixels)
+		images.append(image)
+
+	return images
+
+
+
+def register():
+	bpy.utils.register_class(op)
+
+def unregister():
+	bpy.utils.unregister_class(op)
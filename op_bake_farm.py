@@ -0,0 +1,93 @@
+import bpy
+
+from . import settings
+from . import op_bake
+from . import utilities_bake_farm
+from . import utilities_bake_dirty
+
+
+class op(bpy.types.Operator):
+	bl_idname = "uv.textools_bake_farm"
+	bl_label = "Bake Farm"
+	bl_description = "Bake the sets in parallel background Blender processes, Esc to cancel"
+
+	queue : bpy.props.StringProperty(name="Queue", description="Comma separated bake modes, the current bake mode if empty", default="")
+
+	_timer = None
+
+	@classmethod
+	def poll(cls, context):
+		if len(settings.sets) == 0:
+			return False
+		# One farm at a time
+		if settings.bake_farm:
+			return False
+		if not bpy.app.binary_path:
+			return False
+		return True
+
+
+	def execute(self, context):
+		queue = op_bake.get_queue(self.queue)
+		for bake_mode in queue:
+			if bake_mode not in op_bake.modes:
+				self.report({'ERROR_INVALID_INPUT'}, "Uknown mode '{}' only available: '{}'".format(bake_mode, ", ".join(op_bake.modes.keys() )) )
+				return {'CANCELLED'}
+
+		# Edit mode changes are only saved from object mode
+		if bpy.context.view_layer.objects.active != None and bpy.context.object.mode != 'OBJECT':
+			bpy.ops.object.mode_set(mode='OBJECT')
+
+		settings.bake_farm = utilities_bake_farm.Bake_farm(
+			queue,
+			settings.sets,
+			bpy.context.scene.texToolsSettings.bake_farm_workers,
+			bpy.context.scene.texToolsSettings.bake_farm_threads
+		)
+		settings.bake_farm.start()
+		self.report({'INFO'}, "Baking {}x sets on {}x workers".format(len(settings.sets), len(settings.bake_farm.processes)))
+
+		self._timer = context.window_manager.event_timer_add(0.5, window=context.window)
+		context.window_manager.modal_handler_add(self)
+		return {'RUNNING_MODAL'}
+
+
+	def modal(self, context, event):
+		farm = settings.bake_farm
+		if event.type == 'ESC':
+			farm.stop()
+			self.finish(context)
+			self.report({'WARNING'}, "Bake farm cancelled")
+			return {'CANCELLED'}
+
+		if event.type != 'TIMER' or not farm.is_done():
+			# Keep the interface responsive while the workers bake
+			return {'PASS_THROUGH'}
+
+		images, missing, failed = farm.collect()
+		self.finish(context)
+
+		if len(images) > 0:
+			op_bake.set_image_editor_image(images[0])
+		if len(failed) > 0:
+			code, log = failed[0]
+			self.report({'ERROR'}, "Bake worker failed with exit code {}, see '{}' ({}x workers failed)".format(code, log, len(failed)))
+		elif len(missing) > 0:
+			self.report({'ERROR'}, "Failed to bake {}x images, see logs in '{}'".format(len(missing), farm.directory))
+		else:
+			utilities_bake_dirty.mark_baked(farm.sets, farm.queue, farm.snapshot)
+			self.report({'INFO'}, "Baked {}x images".format(len(images)))
+		return {'FINISHED'}
+
+
+	def finish(self, context):
+		context.window_manager.event_timer_remove(self._timer)
+		settings.bake_farm = None
+
+
+
+def register():
+	bpy.utils.register_class(op)
+
+def unregister():
+	bpy.utils.unregister_class(op)
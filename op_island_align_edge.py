@@ -7,6 +7,7 @@ from collections import defaultdict
 from math import pi
 
 from . import utilities_uv
+from . import utilities_uv_view
 
 class op(bpy.types.Operator):
 	bl_idname = "uv.textools_island_align_edge"
@@ -60,83 +61,37 @@ class op(bpy.types.Operator):
 def main(context):
 	print("Executing operator_island_align_edge")
 
-	bm = bmesh.from_edit_mesh(bpy.context.active_object.data)
-	uv_layer = bm.loops.layers.uv.verify()
-	
-	faces_selected = [];
-	for face in bm.faces:
-		if face.select:
-			for loop in face.loops:
-				if loop[uv_layer].select:
-					faces_selected.append(face)
-					break
-	
-	print("faces_selected: "+str(len(faces_selected)))
-
-	# Collect 2 uv verts for each island
-	face_uvs = {}
-	for face in faces_selected:
-		uvs = []
-		for loop in face.loops:
-			if loop[uv_layer].select:
-				uvs.append(loop[uv_layer])
-				if len(uvs) >= 2:
-					break
-		if len(uvs) >= 2:
-			face_uvs[face] = uvs
-
-	faces_islands = {}
-	faces_unparsed = faces_selected.copy()
-	for face in face_uvs:
-		if face in faces_unparsed:
+	# Every object in edit mode, islands come from the shared island pass
+	for obj, islands, view in utilities_uv.get_edit_islands():
+		bm = bmesh.from_edit_mesh(obj.data)
+		uv_layer = bm.loops.layers.uv.verify()
 
-			bpy.ops.uv.select_all(action='DESELECT')
-			face_uvs[face][0].select_set = True 
-			bpy.ops.uv.select_linked()#extend=False)#Extend selection
-			
-			#Collect faces
-			faces_island = [face];
-			for f in faces_unparsed:
-				if f != face and f.select and f.loops[0][uv_layer].select:
-					print("append "+str(f.index))
-					faces_island.append(f)
-			for f in faces_island:
-				faces_unparsed.remove(f)
+		island_loops = view.get_island_loops(islands)
 
-			#Assign Faces to island
-			faces_islands[face] = faces_island
-
-	print("Sets: {}x".format(len(faces_islands)))
-
-	# Align each island to its edges
-	for face in faces_islands:
-		align_island(face_uvs[face][0].uv, face_uvs[face][1].uv, faces_islands[face])
+		print("Sets: {}x".format(len(islands)))
 
+		# Align each island to the first face with a selected UV edge
+		for index in range(len(islands)):
+			for face in islands[index]:
+				uvs = [loop[uv_layer].uv.copy() for loop in face.loops if loop[uv_layer].select]
+				if len(uvs) >= 2:
+					align_island(uvs[0], uvs[1], view, island_loops[index])
+					break
 
-def align_island(uv_vert0, uv_vert1, faces):
-	bm = bmesh.from_edit_mesh(bpy.context.active_object.data)
-	uv_layer = bm.loops.layers.uv.verify()
+		view.write()
 
-	print("Align {}x faces".format(len(faces)))
 
-	# Select faces
-	bpy.ops.uv.select_all(action='DESELECT')
-	for face in faces:
-		for loop in face.loops:
-			loop[uv_layer].select = True
+def align_island(uv_vert0, uv_vert1, view, loops):
+	print("Align {}x loops".format(len(loops)))
 
 	diff = uv_vert1 - uv_vert0
 	angle = math.atan2(diff.y, diff.x)%(math.pi/2)
 
-	bpy.ops.uv.select_linked()#extend=False)
-
-	bpy.context.space_data.pivot_point = 'CURSOR'
-	bpy.ops.uv.cursor_set(location=uv_vert0 + diff/2)
-
 	if angle >= (math.pi/4):
 		angle = angle - (math.pi/2)
 
-	bpy.ops.transform.rotate(value=angle, axis=(-0, -0, -1), constraint_axis=(False, False, False), orient_type='GLOBAL', mirror=False, proportional='DISABLED')
+	# Rotate clockwise around the edge center
+	view.transform(loops, utilities_uv_view.get_matrix_rotation(-angle), uv_vert0 + diff/2)
 
 def register():
 	bpy.utils.register_class(op)
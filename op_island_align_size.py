@@ -7,6 +7,8 @@ from collections import defaultdict
 from math import pi
 
 from . import utilities_uv
+from . import utilities_island_cache
+from . import utilities_uv_view
 
 class op(bpy.types.Operator):
 	bl_idname = "uv.textools_island_align_size"
@@ -57,76 +59,80 @@ class op(bpy.types.Operator):
 
 
 def main(context, mode, padding):
-
-	bm = bmesh.from_edit_mesh(bpy.context.active_object.data)
-	uv_layer = bm.loops.layers.uv.verify()
 	
 	# Face mode
 	bpy.context.scene.tool_settings.uv_select_mode = 'FACE'
 
-	islands = utilities_uv.getSelectionIslands()
+	# Islands of all objects in edit mode, sorted and placed together
+	edit_islands = utilities_uv.get_edit_islands()
 	islands_size = {}
 	islands_center = {}
 
-	# Collect bounds
-	for i in range(0, len(islands)):
-
-		bpy.ops.uv.select_all(action='DESELECT')
-		utilities_uv.set_selected_uv_faces(islands[i])
+	# Collect bounds, keyed by (object index, island index)
+	islands_bounds = {}
+	for o in range(len(edit_islands)):
+		obj, islands, view = edit_islands[o]
+		bboxes = view.get_island_bboxes(islands)
+		for i in range(0, len(islands)):
+			bounds = bboxes[i]
+			islands_bounds[(o, i)] = bounds
+			islands_size[(o, i)]= bounds['width'] if mode == 'WIDTH' else bounds['height']
+			islands_center[(o, i)] = bounds['center'].x if mode =='WIDTH' else bounds['center'].y
 
-		# Collect BBox sizes
-		bounds = utilities_uv.getSelectionBBox()
-		islands_size[i]= bounds['width'] if mode == 'WIDTH' else bounds['height']
-		islands_center[i] = bounds['center'].x if mode =='WIDTH' else bounds['center'].y
+	if len(islands_size) == 0:
+		return
 
 	# Sort largest to smallest
 	sorted_size = sorted(islands_size.items(), key=operator.itemgetter(1))#Sort by values, store tuples
 	sorted_size.reverse()
 
-	# Apply size to match largest
-	for i in range(0, len(islands)):
-		index = sorted_size[i][0]
-		scale = sorted_size[0][1] / islands_size[index]
-
-		bpy.ops.uv.select_all(action='DESELECT')
-		utilities_uv.set_selected_uv_faces(islands[index])
-
-		bpy.ops.transform.resize(value=(scale, scale, 1), constraint_axis=(True, True, False), orient_type='GLOBAL')
-
-
 	# Sort by position 
 	sorted_center = sorted(islands_center.items(), key=operator.itemgetter(1))
 
-	# Set position in order
+	# Scale each island around its bounds center to match the largest, then set position in order
+	matrices = [[None]*len(islands) for obj, islands, view in edit_islands]
+	pivots = [[None]*len(islands) for obj, islands, view in edit_islands]
+	offsets = [[None]*len(islands) for obj, islands, view in edit_islands]
 	offset = None
-	for i in range(0, len(islands)):
-		index = sorted_size[i][0]
-		
-		bpy.ops.uv.select_all(action='DESELECT')
-		utilities_uv.set_selected_uv_faces(islands[index])
+	for i in range(0, len(sorted_size)):
+		o, index = sorted_size[i][0]
+		bounds = islands_bounds[(o, index)]
+		scale = sorted_size[0][1] / islands_size[(o, index)]
 
-		bounds = utilities_uv.getSelectionBBox()
+		# Bounds after scaling
+		pivot = (bounds['min'] + bounds['max']) / 2
+		bounds_min = pivot + (bounds['min'] - pivot) * scale
+		bounds_max = pivot + (bounds['max'] - pivot) * scale
 
+		delta = Vector((0,0))
 		if i > 0:
 			if mode == 'HEIGHT':
-				delta = offset - bounds['min']
-				delta.y-= bounds['height']
+				delta = offset - bounds_min
+				delta.y-= bounds_max.y - bounds_min.y
 				delta.x+= padding
-				bpy.ops.transform.translate(value=(delta.x, delta.y, 0))
 			else:
-				delta = offset - bounds['max']
-				delta.x+= bounds['width']
+				delta = offset - bounds_max
+				delta.x+= bounds_max.x - bounds_min.x
 				delta.y-= padding
-				bpy.ops.transform.translate(value=(delta.x, delta.y, 0))
-			
 
-			utilities_uv.set_selected_uv_faces(islands[index])
-			bounds = utilities_uv.getSelectionBBox()
+		matrices[o][index] = utilities_uv_view.get_matrix_scale(scale, scale)
+		pivots[o][index] = pivot
+		offsets[o][index] = delta
 
 		if mode == 'HEIGHT':
-			offset = bounds['max']
+			offset = bounds_max + delta
 		else:
-			offset = bounds['min']
+			offset = bounds_min + delta
+
+	for o in range(len(edit_islands)):
+		obj, islands, view = edit_islands[o]
+		if len(islands) == 0:
+			continue
+		view.transform_islands(islands, offsets=offsets[o], matrices=matrices[o], pivots=pivots[o])
+		view.write()
+
+		# Islands only moved and scaled, keep them cached for the next operation
+		utilities_island_cache.refresh(obj)
 
 def register():
 	bpy.utils.register_class(op)
@@ -8,6 +8,9 @@ from collections import defaultdict
 
 
 from . import utilities_uv
+from . import utilities_island_cache
+from . import utilities_uv_view
+from . import utilities_uv_geometry
 import imp
 imp.reload(utilities_uv)
 
@@ -68,105 +71,81 @@ def main(context, isVertical, padding):
 	if bpy.context.scene.tool_settings.uv_select_mode is not 'FACE' or 'ISLAND':
 		bpy.context.scene.tool_settings.uv_select_mode = 'FACE'
 
-	bm = bmesh.from_edit_mesh(bpy.context.active_object.data);
-	uv_layer = bm.loops.layers.uv.verify();
-	
+	# All objects in edit mode share one bounds frame and one sorted row
+	objects = utilities_uv.get_edit_objects()
+	boundsAll = utilities_uv.getSelectionBBox(objects)
 
-	boundsAll = utilities_uv.getSelectionBBox()
 
-
-	islands = utilities_uv.getSelectionIslands()
+	edit_islands = utilities_uv.get_edit_islands(objects)
 	allSizes = {}	#https://stackoverflow.com/questions/613183/sort-a-python-dictionary-by-value
 	allBounds = {}
 
-	print("Islands: "+str(len(islands))+"x")
-
-	bpy.context.window_manager.progress_begin(0, len(islands))
+	print("Islands: "+str(sum(len(islands) for obj, islands, view in edit_islands))+"x")
 
-	#Rotate to minimal bounds
-	for i in range(0, len(islands)):
-		alignIslandMinimalBounds(uv_layer, islands[i])
+	count = 0
+	for o in range(len(edit_islands)):
+		obj, islands, view = edit_islands[o]
+		if len(islands) == 0:
+			continue
 
-		# Collect BBox sizes
-		bounds = utilities_uv.getSelectionBBox()
-		allSizes[i] = max(bounds['width'], bounds['height']) + i*0.000001;#Make each size unique
-		allBounds[i] = bounds;
-		print("Rotate compact:  "+str(allSizes[i]))
+		# Rotate to minimal bounds, solved per island from its convex hull
+		islands_bounds = view.get_island_bounds(islands)
+		matrices = []
+		for uvs in view.get_island_uvs(islands):
+			matrices.append(get_matrix_minimal_bounds(uvs))
 
-		bpy.context.window_manager.progress_update(i)
+		center = (islands_bounds['min'] + islands_bounds['max']) / 2
+		view.transform_islands(islands, matrices=matrices, pivots=center)
 
-	bpy.context.window_manager.progress_end()
+		# Collect BBox sizes of all rotated islands at once
+		islands_bounds = view.get_island_bboxes(islands)
+		for i in range(0, len(islands)):
+			bounds = islands_bounds[i]
+			allSizes[(o, i)] = max(bounds['width'], bounds['height']) + count*0.000001;#Make each size unique
+			allBounds[(o, i)] = bounds;
+			count+= 1
 
 
 	#Position by sorted size in row
 	sortedSizes = sorted(allSizes.items(), key=operator.itemgetter(1))#Sort by values, store tuples
 	sortedSizes.reverse()
 	offset = 0.0
+	offsets = [[None]*len(islands) for obj, islands, view in edit_islands]
 	for sortedSize in sortedSizes:
-		index = sortedSize[0]
-		island = islands[index]
-		bounds = allBounds[index]
-
-		#Select Island
-		bpy.ops.uv.select_all(action='DESELECT')
-		utilities_uv.set_selected_uv_faces(island)
+		o, index = sortedSize[0]
+		bounds = allBounds[(o, index)]
 		
 		#Offset Island
+		delta = Vector((boundsAll['min'].x - bounds['min'].x, boundsAll['max'].y - bounds['max'].y));
 		if(isVertical):
-			delta = Vector((boundsAll['min'].x - bounds['min'].x, boundsAll['max'].y - bounds['max'].y));
-			bpy.ops.transform.translate(value=(delta.x, delta.y-offset, 0))
+			offsets[o][index] = (delta.x, delta.y-offset)
 			offset += bounds['height']+padding
 		else:
-			print("Horizontal")
-			delta = Vector((boundsAll['min'].x - bounds['min'].x, boundsAll['max'].y - bounds['max'].y));
-			bpy.ops.transform.translate(value=(delta.x+offset, delta.y, 0))
+			offsets[o][index] = (delta.x+offset, delta.y)
 			offset += bounds['width']+padding
 
+	for o in range(len(edit_islands)):
+		obj, islands, view = edit_islands[o]
+		if len(islands) == 0:
+			continue
+		view.transform_islands(islands, offsets=offsets[o])
+		view.write()
+
+		# Islands only moved and rotated, keep them cached for the next operation
+		utilities_island_cache.refresh(obj)
 
 	#Restore selection
 	utilities_uv.selection_restore()
 
 
-def alignIslandMinimalBounds(uv_layer, faces):
-	# Select Island
-	bpy.ops.uv.select_all(action='DESELECT')
-	utilities_uv.set_selected_uv_faces(faces)
-
-	steps = 8
-	angle = 45;	# Starting Angle, half each step
+def get_matrix_minimal_bounds(uvs):
+	"""Rotation matrix that aligns the minimum area rectangle of the UVs, wider than high"""
+	angle, width, height = utilities_uv_geometry.get_min_area_rect(uvs)
+	if width < height:
+		angle+= math.pi / 2
+	return utilities_uv_view.get_matrix_rotation(angle)
 
-	bboxPrevious = utilities_uv.getSelectionBBox()
 
-	for i in range(0, steps):
-		# Rotate right
-		bpy.ops.transform.rotate(value=(angle * math.pi / 180), axis=(0, 0, 1))
-		bbox = utilities_uv.getSelectionBBox()
-
-		if i == 0:
-			sizeA = bboxPrevious['width'] * bboxPrevious['height']
-			sizeB = bbox['width'] * bbox['height']
-			if abs(bbox['width'] - bbox['height']) <= 0.0001 and sizeA < sizeB:
-				# print("Already squared")
-				bpy.ops.transform.rotate(value=(-angle * math.pi / 180), axis=(0, 0, 1))
-				break;
-
-
-		if bbox['minLength'] < bboxPrevious['minLength']:
-			bboxPrevious = bbox;	# Success
-		else:
-			# Rotate Left
-			bpy.ops.transform.rotate(value=(-angle*2 * math.pi / 180), axis=(0, 0, 1))
-			bbox = utilities_uv.getSelectionBBox()
-			if bbox['minLength'] < bboxPrevious['minLength']:
-				bboxPrevious = bbox;	# Success
-			else:
-				# Restore angle of this iteration
-				bpy.ops.transform.rotate(value=(angle * math.pi / 180), axis=(0, 0, 1))
-
-		angle = angle / 2
-
-	if bboxPrevious['width'] < bboxPrevious['height']:
-		bpy.ops.transform.rotate(value=(90 * math.pi / 180), axis=(0, 0, 1))
 
 def register():
 	bpy.utils.register_class(op)
@@ -3,12 +3,14 @@ import os
 import bmesh
 import math
 import operator
+import numpy as np
 
 from mathutils import Vector
 from collections import defaultdict
 from itertools import chain # 'flattens' collection of iterables
 
 from . import utilities_uv
+from . import utilities_uv_view
 
 
 
@@ -64,52 +66,55 @@ def main(context):
 	#Store selection
 	utilities_uv.selection_store()
 
-	bm = bmesh.from_edit_mesh(bpy.context.active_object.data)
-	uv_layer = bm.loops.layers.uv.verify()
-
 	#Only in Face or Island mode
 	if bpy.context.scene.tool_settings.uv_select_mode is not 'FACE' or 'ISLAND':
 		bpy.context.scene.tool_settings.uv_select_mode = 'FACE'
 
-	obj  = bpy.context.object
-	bm = bmesh.from_edit_mesh(bpy.context.active_object.data);
-	uv_layer = bm.loops.layers.uv.verify();
-	
-	islands = utilities_uv.getSelectionIslands()
+	# Every object in edit mode, one BMesh and island set each
+	for obj, islands, view in utilities_uv.get_edit_islands():
+		bm = bmesh.from_edit_mesh(obj.data);
+		uv_layer = bm.loops.layers.uv.verify();
+		# Vert indices of the BMesh match the view only once updated after topology edits
+		bm.verts.index_update()
 
-	
+		island_loops = view.get_island_loops(islands)
 
-	for faces in islands:
-		# Get average viewport normal of UV island
-		avg_normal = Vector((0,0,0))
-		for face in faces:
-			avg_normal+=face.normal
-		avg_normal/=len(faces)
+		for index in range(len(islands)):
+			faces = islands[index]
+			loops = island_loops[index]
 
-		# avg_normal = (obj.matrix_world*avg_normal).normalized()
+			# Get average viewport normal of UV island
+			avg_normal = Vector((0,0,0))
+			for face in faces:
+				avg_normal+=face.normal
+			avg_normal/=len(faces)
 
-		# Which Side
-		x = 0
-		y = 1
-		z = 2
-		max_size = max(abs(avg_normal.x), abs(avg_normal.y), abs(avg_normal.z))
-		
-		# Use multiple steps
-		for i in range(3):
-			if(abs(avg_normal.x) == max_size):
-				print("x normal")
-				align_island(obj, bm, uv_layer, faces, y, z, avg_normal.x < 0, False)
+			# avg_normal = (obj.matrix_world*avg_normal).normalized()
+
+			# Which Side
+			x = 0
+			y = 1
+			z = 2
+			max_size = max(abs(avg_normal.x), abs(avg_normal.y), abs(avg_normal.z))
+			
+			# Use multiple steps
+			for i in range(3):
+				if(abs(avg_normal.x) == max_size):
+					print("x normal")
+					align_island(obj, bm, uv_layer, faces, y, z, avg_normal.x < 0, False, view, loops)
 
-			elif(abs(avg_normal.y) == max_size):
-				print("y normal")
-				align_island(obj, bm, uv_layer, faces, x, z, avg_normal.y > 0, False)
+				elif(abs(avg_normal.y) == max_size):
+					print("y normal")
+					align_island(obj, bm, uv_layer, faces, x, z, avg_normal.y > 0, False, view, loops)
 
-			elif(abs(avg_normal.z) == max_size):
-				print("z normal")
-				align_island(obj, bm, uv_layer, faces, x, y, False, avg_normal.z < 0)
+				elif(abs(avg_normal.z) == max_size):
+					print("z normal")
+					align_island(obj, bm, uv_layer, faces, x, y, False, avg_normal.z < 0, view, loops)
 
-		print("align island: faces {}x n:{}, max:{}".format(len(faces), avg_normal, max_size))
+			print("align island: faces {}x n:{}, max:{}".format(len(faces), avg_normal, max_size))
 
+		# All islands rotated in the view, one write per object
+		view.write()
 	
 
 	#Restore selection
@@ -117,7 +122,7 @@ def main(context):
 
 
 
-def align_island(obj, bm, uv_layer, faces, x=0, y=1, flip_x=False, flip_y=False):
+def align_island(obj, bm, uv_layer, faces, x=0, y=1, flip_x=False, flip_y=False, view=None, loops=None):
 
 	# Find lowest and highest verts
 	minmax_val  = [0,0]
@@ -132,16 +137,15 @@ def align_island(obj, bm, uv_layer, faces, x=0, y=1, flip_x=False, flip_y=False)
 		
 
 
-	# Collect UV to Vert
-	vert_to_uv = utilities_uv.get_vert_to_uv(bm, uv_layer)
-	uv_to_vert = utilities_uv.get_uv_to_vert(bm, uv_layer)
+	# Loop of each vert within the island, UVs come from the view so earlier passes count
+	vert_to_loop = dict(zip(view.loop_vert[loops].tolist(), loops.tolist()))
 
-	processed_edges = []
+	processed_edges = set()
 	edges = []
 	for face in faces:
 		for edge in face.edges:
 			if edge not in processed_edges:
-				processed_edges.append(edge)
+				processed_edges.add(edge)
 				delta = edge.verts[0].co -edge.verts[1].co
 				max_side = max(abs(delta.x), abs(delta.y), abs(delta.z))
 
@@ -154,8 +158,8 @@ def align_island(obj, bm, uv_layer, faces, x=0, y=1, flip_x=False, flip_y=False)
 
 	avg_angle = 0
 	for edge in edges:
-		uv0 = vert_to_uv[ edge.verts[0] ][0]
-		uv1 = vert_to_uv[ edge.verts[1] ][0]
+		uv0 = view.uvs[ vert_to_loop[edge.verts[0].index] ]
+		uv1 = view.uvs[ vert_to_loop[edge.verts[1].index] ]
 		delta_verts = Vector((
 			edge.verts[1].co[x] - edge.verts[0].co[x],
 			edge.verts[1].co[y] - edge.verts[0].co[y]
@@ -171,8 +175,8 @@ def align_island(obj, bm, uv_layer, faces, x=0, y=1, flip_x=False, flip_y=False)
 			
 
 		delta_uvs = Vector((
-			uv1.uv.x - uv0.uv.x,
-			uv1.uv.y - uv0.uv.y
+			uv1[0] - uv0[0],
+			uv1[1] - uv0[1]
 		))
 		a0 = math.atan2(delta_verts.y, delta_verts.x) - math.pi/2
 		a1 = math.atan2(delta_uvs.y, delta_uvs.x) - math.pi/2
@@ -189,14 +193,9 @@ def align_island(obj, bm, uv_layer, faces, x=0, y=1, flip_x=False, flip_y=False)
 	avg_angle/=len(edges) # - math.pi/2
 	print("Turn {:.1f}".format(avg_angle * 180/math.pi))
 	
-	bpy.ops.uv.select_all(action='DESELECT')
-	for face in faces:
-		for loop in face.loops:
-			loop[uv_layer].select = True
-
-
-	bpy.context.space_data.pivot_point = 'MEDIAN'
-	bpy.ops.transform.rotate(value=avg_angle, axis=(0, 0, 1))
+	# Rotate the island loops around their median, the caller writes the view once
+	pivot = view.uvs[loops].mean(axis=0, dtype=np.float64)
+	view.transform(loops, utilities_uv_view.get_matrix_rotation(avg_angle), pivot)
 	# bpy.ops.transform.rotate(value=0.58191, axis=(-0, -0, -1), constraint_axis=(False, False, False), constraint_orientation='GLOBAL', mirror=False, proportional='DISABLED', proportional_edit_falloff='SPHERE', proportional_size=0.0267348)
 
 
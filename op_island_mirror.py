@@ -8,6 +8,7 @@ from collections import defaultdict
 from itertools import chain # 'flattens' collection of iterables
 
 from . import utilities_uv
+from . import utilities_uv_geometry
 
 
 
@@ -597,22 +598,10 @@ def mirror_verts(verts_middle, verts_A, verts_B, isAToB):
 
 	# find UV vert blobs , see which ones are same spot
 	def collect_clusters(uvs):
-		groups = []
-		for uv in uvs:
-			if len(groups) == 0:
-				groups.append([uv])
-			else:
-				isMerged = False
-				for group in groups:
-					d = (uv.uv - group[0].uv).length
-					if d <= 0.0000001:
-						#Merge
-						group.append(uv)
-						isMerged = True;
-						break;
-				if not isMerged:
-					#New Group
-					groups.append([uv])
+		ids, count = utilities_uv_geometry.get_clusters([uv.uv for uv in uvs])
+		groups = [[] for i in range(count)]
+		for uv, id in zip(uvs, ids.tolist()):
+			groups[id].append(uv)
 		return groups
 
 	
@@ -7,6 +7,7 @@ from collections import defaultdict
 from math import pi
 
 from . import utilities_uv
+from . import utilities_uv_view
 
 class op(bpy.types.Operator):
 	bl_idname = "uv.textools_island_rotate_90"
@@ -61,18 +62,23 @@ def main(context, angle):
 	bpy.ops.uv.select_linked()#extend=False)
 
 	#Bounds
-	bounds_initial = utilities_uv.getSelectionBBox()
-	bpy.ops.transform.rotate(value=angle, axis=(-0, -0, -1), constraint_axis=(False, False, False), proportional='DISABLED')
+	view = utilities_uv_view.UVMeshView(bpy.context.active_object)
+	mask = view.get_selected_loops()
+	bounds_initial = view.get_bbox(mask)
+
+	# Positive angles rotate clockwise
+	view.transform(mask, utilities_uv_view.get_matrix_rotation(-angle), bounds_initial['center'])
 
 	#Align rotation to top left|right
-	bounds_post = utilities_uv.getSelectionBBox()
+	bounds_post = view.get_bbox(mask)
 	dy = bounds_post['max'].y - bounds_initial['max'].y
 	dx = 0
 	if angle > 0:
 		dx = bounds_post['max'].x - bounds_initial['max'].x
 	else:
 		dx = bounds_post['min'].x - bounds_initial['min'].x
-	bpy.ops.transform.translate(value=(-dx, -dy, 0), constraint_axis=(False, False, False), proportional='DISABLED')
+	view.transform(mask, offset=(-dx, -dy))
+	view.write()
 
 
 	#Restore selection
@@ -0,0 +1,140 @@
+import bpy
+import bmesh
+import numpy as np
+from collections import defaultdict
+
+from . import utilities_uv
+from . import utilities_uv_view
+from . import utilities_uv_geometry
+from . import utilities_island_cache
+from . import utilities_island_signature
+
+
+class op(bpy.types.Operator):
+	bl_idname = "uv.textools_island_stack"
+	bl_label = "Stack Identical"
+	bl_description = "Stack selected UV islands with identical topology onto each other"
+	bl_options = {'REGISTER', 'UNDO'}
+
+	is_mirror : bpy.props.BoolProperty(name="Allow Mirror", description="Allow mirrored islands to stack flipped", default=False)
+	tolerance : bpy.props.FloatProperty(name="Tolerance", description="Largest RMS distance of the stacked UVs relative to the island UV size, islands of other shapes stay in place", default=0.05, min=0, max=1)
+
+	@classmethod
+	def poll(cls, context):
+		if not bpy.context.active_object:
+			return False
+
+		if bpy.context.active_object.type != 'MESH':
+			return False
+
+		#Only in Edit mode
+		if bpy.context.active_object.mode != 'EDIT':
+			return False
+
+		#Only in UV editor mode
+		if bpy.context.area.type != 'IMAGE_EDITOR':
+			return False
+
+		##Requires UV map
+		if not bpy.context.object.data.uv_layers:
+			return False
+
+		#Not in Synced mode
+		if bpy.context.scene.tool_settings.use_uv_select_sync:
+			return False
+
+		return True
+
+
+	def execute(self, context):
+		stack(self, context, self.is_mirror, self.tolerance)
+		return {'FINISHED'}
+
+
+
+def stack(self, context, is_mirror, tolerance):
+	# Selected islands of all objects in edit mode
+	edit_islands = utilities_uv.get_edit_islands()
+	views = {}
+	signatures = []
+	for obj, islands, view in edit_islands:
+		views[obj] = view
+		for island in islands:
+			signatures.append(utilities_island_signature.Island_signature(island, obj))
+
+	# Per object: duplicate islands with their transforms
+	transforms = defaultdict(list)
+	count_stacked = 0
+	count_skipped = 0
+	for group in utilities_island_signature.get_identical_groups(signatures):
+		master = group[0]
+		for other in group[1:]:
+			transform = get_transform(master, other, views, is_mirror, tolerance)
+			if transform:
+				transforms[other.obj].append((other.faces, transform))
+				count_stacked+= 1
+			else:
+				count_skipped+= 1
+
+	# One bulk write per object
+	for obj, items in transforms.items():
+		view = views[obj]
+		view.transform_islands(
+			[faces for faces, transform in items],
+			matrices=[transform[0] for faces, transform in items],
+			pivots=[transform[1] for faces, transform in items],
+			offsets=[transform[2] for faces, transform in items]
+		)
+		view.write()
+
+		# Islands only moved, keep them cached for the next operation
+		utilities_island_cache.refresh(obj)
+
+	if count_skipped > 0:
+		self.report({'INFO'}, "Stacked {}x islands, {}x of the same topology differ in shape".format(count_stacked, count_skipped))
+	else:
+		self.report({'INFO'}, "Stacked {}x islands".format(count_stacked))
+
+
+
+def get_transform(master, other, views, is_mirror, tolerance=0.05, epsilon=0.000001):
+	"""Best rigid transform of the other island onto the master over all topology matches.
+	None when even the best fit is off by more than tolerance times the UV size of the master (RMS distance)."""
+	view_master = views[master.obj]
+	view_other = views[other.obj]
+
+	best = None
+	size = 0
+	for matches in utilities_island_signature.get_loop_matches(master, other, is_mirror):
+		loops_master = np.array([get_loop_index(view_master, loop) for loop, _ in matches])
+		loops_other = np.array([get_loop_index(view_other, loop) for _, loop in matches])
+		if best is None:
+			uvs = view_master.uvs[loops_master]
+			size = float(np.linalg.norm(uvs.max(axis=0) - uvs.min(axis=0)))
+
+		transform = utilities_uv_geometry.get_rigid_transform(view_other.uvs[loops_other], view_master.uvs[loops_master], is_mirror)
+		if best is None or transform[3] < best[3]:
+			best = transform
+
+		# Nothing beats an exact fit, skip the remaining seeds and corner offsets
+		if best[3] <= (epsilon * size)**2:
+			break
+
+	if best is None or best[3] > (tolerance * size)**2:
+		return None
+	return best
+
+
+
+def get_loop_index(view, loop):
+	"""Index of a BMLoop in the UV view, mesh loops follow the BMesh face and corner order"""
+	face = loop.face
+	return view.face_start[face.index] + list(face.loops).index(loop)
+
+
+
+def register():
+	bpy.utils.register_class(op)
+
+def unregister():
+	bpy.utils.unregister_class(op)
@@ -6,6 +6,7 @@ from collections import defaultdict
 from math import pi
 import math
 from . import utilities_uv
+from . import utilities_uv_geometry
 from . import utilities_texel
 from . import utilities_meshtex
 
@@ -77,9 +78,10 @@ def create_uv_mesh(self, obj):
 				stretch_to_bounds=True
 			)
 		elif mode == 'EDIT':
-			# Iron Faces
-			bpy.ops.uv.unwrap(method='ANGLE_BASED', margin=0)
-			bpy.ops.uv.textools_unwrap_faces_iron()
+			# Iron Faces, shares this selection snapshot instead of storing its own
+			with utilities_uv.selection_preserved([obj]):
+				bpy.ops.uv.unwrap(method='ANGLE_BASED', margin=0)
+				bpy.ops.uv.textools_unwrap_faces_iron()
 
 	
 	bm = bmesh.from_edit_mesh(obj.data)
@@ -94,6 +96,7 @@ def create_uv_mesh(self, obj):
 	clusters = []
 	uv_to_clusters = {}
 	vert_to_clusters = {}
+	loops_selected = []
 
 	face_area_view = 0
 	face_area_uv = 0
@@ -118,27 +121,21 @@ def create_uv_mesh(self, obj):
 			))
 
 			for i in range(len(face.loops)):
-				v = face.loops[i]
-				uv = Get_UVSet(uvs, bm, uv_layer, face.index, i)
-
-				# 	# clusters
-				isMerged = False
-				for cluster in clusters:
-					d = (uv.pos() - cluster.uvs[0].pos()).length
-					if d <= 0.0000001:
-						#Merge
-						cluster.append(uv)
-						uv_to_clusters[uv] = cluster
-						if v not in vert_to_clusters:
-							vert_to_clusters[v] = cluster
-						isMerged = True;
-						break;
-				if not isMerged:
-					#New Group
-					clusters.append( UVCluster(v, [uv]) )
-					uv_to_clusters[uv] = clusters[-1]
-					if v not in vert_to_clusters:
-						vert_to_clusters[v] = clusters[-1]
+				loops_selected.append( (face.loops[i], Get_UVSet(uvs, bm, uv_layer, face.index, i)) )
+
+	# Merge coincident UVs into clusters with a spatial hash
+	cluster_ids, count = utilities_uv_geometry.get_clusters([uv.pos() for v, uv in loops_selected])
+	clusters = [None]*count
+	for (v, uv), id in zip(loops_selected, cluster_ids.tolist()):
+		if clusters[id] is None:
+			#New Group
+			clusters[id] = UVCluster(v, [uv])
+		else:
+			#Merge
+			clusters[id].append(uv)
+		uv_to_clusters[uv] = clusters[id]
+		if v not in vert_to_clusters:
+			vert_to_clusters[v] = clusters[id]
 	
 	scale = face_area_view / face_area_uv
 
@@ -147,6 +144,7 @@ def create_uv_mesh(self, obj):
 	print("UV Vert Clusters {}x".format(len(clusters)))
 
 	m_vert_cluster = []
+	m_cluster_index = {}
 	m_verts_org = []
 	m_verts_A = []
 	m_verts_B = []
@@ -161,11 +159,12 @@ def create_uv_mesh(self, obj):
 				c = uv_to_clusters[ uv ]
 
 				index = 0
-				if c in m_vert_cluster:
-					index = m_vert_cluster.index(c)
+				if c in m_cluster_index:
+					index = m_cluster_index[c]
 
 				else:
 					index = len(m_vert_cluster)
+					m_cluster_index[c] = index
 					m_vert_cluster.append(c)
 					m_verts_org.append(v)
 
@@ -6,6 +6,7 @@ from collections import defaultdict
 from math import pi
 
 from . import utilities_uv
+from . import utilities_uv_view
 import imp
 imp.reload(utilities_uv)
 
@@ -44,19 +45,22 @@ class op(bpy.types.Operator):
 
 	def execute(self, context):
 		
-		select_flipped(context)
+		select_flipped(self, context)
 		return {'FINISHED'}
 
 
 
-def select_flipped(context):
-	bm = bmesh.from_edit_mesh(bpy.context.active_object.data)
-	uv_layer = bm.loops.layers.uv.verify()
-
+def select_flipped(self, context):
 	bpy.context.scene.tool_settings.uv_select_mode = 'FACE'
 	bpy.ops.uv.select_all(action='SELECT')
 
-	islands = utilities_uv.getSelectionIslands()
+	# Flip ratio of all islands of all objects in edit mode, collected before the selection is cleared
+	edit_islands = []
+	for obj, islands, view in utilities_uv.get_edit_islands():
+		bm = bmesh.from_edit_mesh(obj.data)
+		uv_layer = bm.loops.layers.uv.verify()
+		ratios = view.get_island_flip_ratios(islands)
+		edit_islands.extend(zip(islands, ratios.tolist(), [uv_layer]*len(islands)))
 	
 
 	bpy.context.scene.tool_settings.uv_select_mode = 'FACE'
@@ -64,32 +68,18 @@ def select_flipped(context):
 	bpy.ops.uv.select_all(action='DESELECT')
 
 
-	for island in islands:
-
-		is_flipped = False
-		for face in island:
-			if is_flipped:
-				break
-
-			# Using 'Sum of Edges' to detect counter clockwise https://stackoverflow.com/questions/1165647/how-to-determine-if-a-list-of-polygon-points-are-in-clockwise-order
-			sum = 0
-			count = len(face.loops)
-			for i in range(count):
-				uv_A = face.loops[i][uv_layer].uv
-				uv_B = face.loops[(i+1)%count][uv_layer].uv
-				sum += (uv_B.x - uv_A.x) * (uv_B.y + uv_A.y)
-
-			if sum > 0:
-				# Flipped
-				is_flipped = True
-				break
-
-		# Select Island if flipped
-		if is_flipped:
+	count = 0
+	for island, ratio, uv_layer in edit_islands:
+		# Select Island if any face is flipped
+		if ratio > 0:
+			print("Flipped island: {}x faces, {:.0%} flipped".format(len(island), ratio))
+			count+= 1
 			for face in island:
 				for loop in face.loops:
 					loop[uv_layer].select = True
 
+	self.report({'INFO'}, "Flipped islands: {}x of {}x".format(count, len(edit_islands)))
+
 
 
 
@@ -99,18 +89,9 @@ class Island_bounds:
 	min = Vector([0,0])
 	max = Vector([0,0])
 
-	def __init__(self, faces):
-		bm = bmesh.from_edit_mesh(bpy.context.active_object.data);
-		uv_layer = bm.loops.layers.uv.verify();
-		
-		# Collect topology stats
+	def __init__(self, faces, bounds):
+		# Bounds of all islands are collected at once, see UVMeshView.get_island_bboxes
 		self.faces = faces
-
-		#Select Island
-		bpy.ops.uv.select_all(action='DESELECT')
-		utilities_uv.set_selected_uv_faces(faces)
-
-		bounds = utilities_uv.getSelectionBBox()
 		self.center = bounds['center']
 		self.min = bounds['min']
 		self.max = bounds['max']
@@ -6,6 +6,7 @@ from collections import defaultdict
 from math import pi
 
 from . import utilities_uv
+from . import utilities_island_signature
 
 
 class op(bpy.types.Operator):
@@ -47,85 +48,41 @@ class op(bpy.types.Operator):
 
 
 def swap(self, context):
+	objects = utilities_uv.get_edit_objects()
 
-	bm = bmesh.from_edit_mesh(bpy.context.active_object.data)
-	uv_layer = bm.loops.layers.uv.verify()
-
-	# Get selected island
-	islands = utilities_uv.getSelectionIslands()
+	# Get selected island, from any object in edit mode
+	islands = [(obj, island) for obj, islands, view in utilities_uv.get_edit_islands(objects) for island in islands]
 
 	if len(islands) != 1:
 		self.report({'ERROR_INVALID_INPUT'}, "Please select only 1 UV Island")
 		return
 	
-	island_stats_source = Island_stats(islands[0])
+	island_source = utilities_island_signature.Island_signature(islands[0][1], islands[0][0])
 
 	bpy.context.scene.tool_settings.uv_select_mode = 'FACE'
 	bpy.ops.uv.select_all(action='SELECT')
 
-	islands_all = utilities_uv.getSelectionIslands()
-	islands_equal = []
-	for island in islands_all:
-		island_stats = Island_stats(island)
+	# Index the islands of all objects by topology, only the matching bucket is compared
+	signatures = []
+	for obj, islands_all, view in utilities_uv.get_edit_islands(objects):
+		for island in islands_all:
+			signatures.append(utilities_island_signature.Island_signature(island, obj))
+	index = utilities_island_signature.get_index(signatures)
 
-		if island_stats_source.isEqual(island_stats):
-			islands_equal.append(island_stats.faces)
+	islands_equal = [signature for signature in index.get(island_source.key, []) if island_source.isEqual(signature)]
 
 	print("Islands: "+str(len(islands_equal))+"x")
 
 	bpy.ops.uv.select_all(action='DESELECT')
-	for island in islands_equal:
-		for face in island:
+	for signature in islands_equal:
+		uv_layer = bmesh.from_edit_mesh(signature.obj.data).loops.layers.uv.verify()
+		for face in signature.faces:
 			for loop in face.loops:
 				if not loop[uv_layer].select:
 					loop[uv_layer].select = True
 
 
 
-class Island_stats:
-	countFaces = 0
-	countVerts = 0
-	faces = []
-	area = 0
-	countLinkedEdges = 0
-	countLinkedFaces = 0
-	
-
-	def __init__(self, faces):
-		bm = bmesh.from_edit_mesh(bpy.context.active_object.data);
-		uv_layer = bm.loops.layers.uv.verify();
-		
-		# Collect topology stats
-		self.faces = faces
-		verts = []
-		for face in faces:
-			self.countFaces+=1
-			self.area+=face.calc_area()
-
-			for loop in face.loops:
-				if loop.vert not in verts:
-					verts.append(loop.vert)
-					self.countVerts+=1
-					self.countLinkedEdges+= len(loop.vert.link_edges)
-					self.countLinkedFaces+= len(loop.vert.link_faces)
-		
-	def isEqual(self, other):
-		if self.countVerts != other.countVerts:
-			return False
-		if self.countFaces != other.countFaces:
-			return False
-
-		if self.countLinkedEdges != other.countLinkedEdges:
-			return False
-		if self.countLinkedFaces != other.countLinkedFaces:
-			return False
-
-		# area needs to be 90%+ identical
-		if min(self.area, other.area)/max(self.area, other.area) < 0.7:
-			return False
-
-		return True
-
 def register():
 	bpy.utils.register_class(op)
 
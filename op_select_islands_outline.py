@@ -7,6 +7,7 @@ from math import pi
 
 from . import utilities_uv
 from . import utilities_ui
+from . import utilities_uv_view
 
 class op(bpy.types.Operator):
 	bl_idname = "uv.textools_select_islands_outline"
@@ -43,37 +44,21 @@ def select_outline(context):
 
 	bpy.context.scene.tool_settings.use_uv_select_sync = False
 
-	bm = bmesh.from_edit_mesh(bpy.context.active_object.data);
-	uv_layer = bm.loops.layers.uv.verify();
-
 	bpy.ops.mesh.select_mode(use_extend=False, use_expand=False, type='EDGE')
 	bpy.ops.mesh.select_all(action='DESELECT')
 
-	# Store previous edge seams
-	edges_seam = [edge for edge in bm.edges if edge.seam]
-	
-
-	contextViewUV = utilities_ui.GetContextViewUV()
-	if not contextViewUV:
-		self.report({'ERROR_INVALID_INPUT'}, "This tool requires an available UV/Image view.")
-		return
+	# Island border edges straight from the UV layer, no seams or UV editor needed
+	obj = bpy.context.active_object
+	edges_islands = utilities_uv_view.UVMeshView(obj).get_boundary_edges()
 
-	# Create seams from islands
-	bpy.ops.uv.seams_from_islands(contextViewUV)
-	edges_islands = [edge for edge in bm.edges if edge.seam]
-
-	# Clear seams
-	for edge in edges_islands:
-		edge.seam = False
+	bm = bmesh.from_edit_mesh(obj.data);
+	bm.edges.ensure_lookup_table()
 
 	# Select island edges
-	bpy.ops.mesh.select_all(action='DESELECT')
-	for edge in edges_islands:
-		edge.select = True
+	for index in edges_islands.tolist():
+		bm.edges[index].select = True
 
-	# Restore seam selection
-	for edge in edges_seam:
-		edge.seam = True
+	bmesh.update_edit_mesh(obj.data, loop_triangles=False, destructive=False)
 
 def register():
 	bpy.utils.register_class(op)
@@ -1,11 +1,14 @@
 import bpy
 import bmesh
 import operator
+import numpy as np
 from mathutils import Vector
 from collections import defaultdict
 from math import pi
 
 from . import utilities_uv
+from . import utilities_uv_view
+from . import utilities_uv_geometry
 import imp
 imp.reload(utilities_uv)
 
@@ -15,6 +18,19 @@ class op(bpy.types.Operator):
 	bl_description = "Select all overlapping UV islands"
 	bl_options = {'REGISTER', 'UNDO'}
 
+	mode : bpy.props.EnumProperty(items=
+		[('ISLANDS', 'Islands', 'Select islands that overlap other islands'),
+		('SELF', 'Self Overlap', 'Select faces that overlap faces of their own island')],
+		name = "Mode",
+		default = 'ISLANDS'
+	)
+	method : bpy.props.EnumProperty(items=
+		[('GRID', 'Grid', 'Uniform grid of the UV triangles, exact for any face size'),
+		('RASTER', 'Raster', 'Coverage raster at the texture size, faster on dense meshes but misses faces smaller than a pixel')],
+		name = "Method",
+		default = 'GRID'
+	)
+
 	@classmethod
 	def poll(cls, context):
 		if not bpy.context.active_object:
@@ -44,7 +60,10 @@ class op(bpy.types.Operator):
 
 	def execute(self, context):
 		
-		selectOverlap(context)
+		if self.mode == 'SELF':
+			select_self_overlap(self, context, self.method)
+		else:
+			selectOverlap(context)
 		return {'FINISHED'}
 
 
@@ -54,35 +73,53 @@ def selectOverlap(context):
 
 	# https://developer.blender.org/D2865
 
-	bm = bmesh.from_edit_mesh(bpy.context.active_object.data)
-	uv_layer = bm.loops.layers.uv.verify()
-
 	bpy.context.scene.tool_settings.uv_select_mode = 'FACE'
 	bpy.ops.uv.select_all(action='SELECT')
 
-	islands_all = utilities_uv.getSelectionIslands()
-	# count = len(islands_all)
-
+	# Islands of all objects in edit mode are compared with each other
 	islands_bounds = []
-	for island in islands_all:
-		islands_bounds.append( Island_bounds( island ) )
-	
+	triangles = []
+	triangles_island = []
+	bounds_min = []
+	bounds_max = []
+	for obj, islands_all, view in utilities_uv.get_edit_islands():
+		bboxes = view.get_island_bboxes(islands_all)
+		for island, bounds in zip(islands_all, bboxes):
+			islands_bounds.append( Island_bounds( island, bounds, obj ) )
+			bounds_min.append(bounds['min'])
+			bounds_max.append(bounds['max'])
+
+		# Loop triangles in UV space, tagged with their island index across all objects
+		loop_island = view.get_loop_islands(islands_all)
+		loop_triangles, triangle_face = view.get_loop_triangles()
+		triangle_island = loop_island[loop_triangles[:,0]]
+		is_island = triangle_island >= 0
+		triangles.append(view.uvs[loop_triangles[is_island]])
+		triangles_island.append(triangle_island[is_island] + len(islands_bounds) - len(islands_all))
+
+	if len(islands_bounds) == 0:
+		return
+
+	overlaps = utilities_uv_geometry.get_island_overlaps(
+		np.concatenate(triangles), np.concatenate(triangles_island),
+		np.array(bounds_min).reshape(-1, 2), np.array(bounds_max).reshape(-1, 2)
+	)
+	linked = defaultdict(set)
+	for a, b in overlaps.tolist():
+		linked[a].add(b)
+		linked[b].add(a)
 
-	groups = []
-	unmatched = islands_bounds.copy()
 
-	for islandA in islands_bounds:
-		if islandA in unmatched:
+	groups = []
+	unmatched = set(range(len(islands_bounds)))
 
-			group = [islandA]
-			for islandB in unmatched:
-				if islandA != islandB and islandA.isEqual(islandB):
-					group.append(islandB)
+	for indexA in range(len(islands_bounds)):
+		if indexA in unmatched:
 
-			for item in group:
-				unmatched.remove(item)
+			group = [indexA] + sorted(linked[indexA] & unmatched)
+			unmatched.difference_update(group)
 
-			groups.append(group)
+			groups.append([islands_bounds[index] for index in group])
 
 			print("Group: {} islands, unmatched: {}x".format(len(group), len(unmatched)))
 		# groups.append(  )
@@ -92,7 +129,7 @@ def selectOverlap(context):
 	for group in groups:
 		if len(group) > 1:
 			for i in range(1, len(group)):
-				utilities_uv.set_selected_uv_faces( group[i].faces )
+				group[i].select()
 
 
 	print("Groups: "+str(len(groups)))
@@ -100,42 +137,69 @@ def selectOverlap(context):
 
 
 
+def select_self_overlap(self, context, method):
+	print("Execute op_select_islands_overlap self overlap")
+
+	bpy.context.scene.tool_settings.uv_select_mode = 'FACE'
+	bpy.ops.uv.select_all(action='SELECT')
+
+	# Raster at the texture size
+	resolution = max(bpy.context.scene.texToolsSettings.size[0], bpy.context.scene.texToolsSettings.size[1])
+
+	# Folded faces per object, each island only tests against itself
+	faces_overlap = []
+	for obj, islands_all, view in utilities_uv.get_edit_islands():
+		face_island = view.get_face_islands(islands_all)
+		loop_triangles, triangle_face = view.get_loop_triangles()
+		triangle_island = face_island[triangle_face]
+		is_island = triangle_island >= 0
+
+		faces = utilities_uv_geometry.get_self_overlaps(
+			view.uvs[loop_triangles[is_island]], triangle_face[is_island], triangle_island[is_island],
+			method, resolution
+		)
+		faces_overlap.append((obj, faces))
+
+	bpy.ops.uv.select_all(action='DESELECT')
+	count = 0
+	for obj, faces in faces_overlap:
+		bm = bmesh.from_edit_mesh(obj.data)
+		uv_layer = bm.loops.layers.uv.verify()
+		bm.faces.ensure_lookup_table()
+		for index in faces.tolist():
+			for loop in bm.faces[index].loops:
+				loop[uv_layer].select = True
+		count+= len(faces)
+
+	self.report({'INFO'}, "Self overlapping faces: {}x".format(count))
+
+
+
+
 class Island_bounds:
 	faces = []
+	obj = None
 	center = Vector([0,0])
 	min = Vector([0,0])
 	max = Vector([0,0])
 
-	def __init__(self, faces):
-		bm = bmesh.from_edit_mesh(bpy.context.active_object.data);
-		uv_layer = bm.loops.layers.uv.verify();
-		
-		# Collect topology stats
+	def __init__(self, faces, bounds, obj=None):
+		# Bounds of all islands are collected at once, see UVMeshView.get_island_bboxes
 		self.faces = faces
-
-		#Select Island
-		bpy.ops.uv.select_all(action='DESELECT')
-		utilities_uv.set_selected_uv_faces(faces)
-
-		bounds = utilities_uv.getSelectionBBox()
+		self.obj = obj if obj else bpy.context.active_object
 		self.center = bounds['center']
 		self.min = bounds['min']
 		self.max = bounds['max']
 
 
-		
-	def isEqual(A, B):
-
-		# Bounding Box AABB intersection?
-		min_x = max(A.min.x, B.min.x)
-		min_y = max(A.min.y, B.min.y)
-		max_x = min(A.max.x, B.max.x)
-		max_y = min(A.max.y, B.max.y)
-		if not (max_x < min_x or max_y < min_y):
-			return True
-		
 
-		return False
+	def select(self):
+		uv_layer = bmesh.from_edit_mesh(self.obj.data).loops.layers.uv.verify()
+		for face in self.faces:
+			for loop in face.loops:
+				loop[uv_layer].select = True
+
+
 
 def register():
 	bpy.utils.register_class(op)
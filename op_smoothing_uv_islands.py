@@ -2,12 +2,14 @@ import bpy
 import bmesh
 import operator
 import math
+import numpy as np
 from mathutils import Vector
 from collections import defaultdict
 
 
 from . import utilities_uv
 from . import utilities_ui
+from . import utilities_uv_view
 
 class op(bpy.types.Operator):
 	bl_idname = "uv.textools_smoothing_uv_islands"
@@ -36,34 +38,28 @@ class op(bpy.types.Operator):
 
 
 def smooth_uv_islands(self, context):
-	if bpy.context.active_object.mode != 'EDIT':
-		bpy.ops.object.mode_set(mode='EDIT')
+	# Mesh data is edited directly in object mode
+	if bpy.context.active_object.mode != 'OBJECT':
+		bpy.ops.object.mode_set(mode='OBJECT')
 
-	bm = bmesh.from_edit_mesh(bpy.context.active_object.data);
-	uv_layer = bm.loops.layers.uv.verify();
+	mesh = bpy.context.active_object.data
 
-	# Smooth everything
-	bpy.ops.mesh.select_mode(use_extend=False, use_expand=False, type='FACE')
-	bpy.ops.mesh.select_all(action='SELECT')
-	bpy.ops.mesh.faces_shade_smooth()
-	bpy.ops.mesh.mark_sharp(clear=True)
+	# Smooth everything, hard edges on the UV island borders
+	view = utilities_uv_view.UVMeshView(bpy.context.active_object)
+	sharp = np.zeros(len(mesh.edges), dtype=bool)
+	sharp[view.get_boundary_edges()] = True
 
-	# Select Edges
-	bpy.ops.mesh.select_all(action='DESELECT')
-	bpy.ops.mesh.select_mode(use_extend=False, use_expand=False, type='EDGE')
-	bpy.ops.uv.textools_select_islands_outline()
-	bpy.ops.mesh.mark_sharp()
-	bpy.ops.mesh.select_all(action='DESELECT')
+	mesh.polygons.foreach_set('use_smooth', np.ones(len(mesh.polygons), dtype=bool))
+	mesh.edges.foreach_set('use_edge_sharp', sharp)
 	
 	# Apply Edge split modifier
-	bpy.context.object.data.use_auto_smooth = True
-	bpy.context.object.data.auto_smooth_angle = math.pi
+	mesh.use_auto_smooth = True
+	mesh.auto_smooth_angle = math.pi
+	mesh.update()
 
 	# bpy.ops.object.modifier_add(type='EDGE_SPLIT')
 	# bpy.context.object.modifiers["EdgeSplit"].use_edge_angle = False
 
-	bpy.ops.object.mode_set(mode='OBJECT')
-
 def register():
 	bpy.utils.register_class(op)
 
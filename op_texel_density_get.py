@@ -2,6 +2,7 @@ import bpy
 import bmesh
 import operator
 import math
+import numpy as np
 
 from . import utilities_texel
 
@@ -49,7 +50,6 @@ class op(bpy.types.Operator):
 def get_texel_density(self, context):
 	print("Get texel density")
 
-	edit_mode = bpy.context.object.mode == 'EDIT'
 	object_faces = utilities_texel.get_selected_object_faces()
 
 	# Warning: No valid input objects
@@ -74,52 +74,16 @@ def get_texel_density(self, context):
 	sum_area_vt = 0
 	sum_area_uv = 0
 
-	# Get area for each triangle in view and UV
+	# Get area of all faces in world and UV space, read in bulk without switching modes
 	for obj in object_faces:
-		bpy.ops.object.mode_set(mode='OBJECT')
-		bpy.ops.object.select_all(action='DESELECT')
-		bpy.context.view_layer.objects.active = obj
-		obj.select_set(True)
-
-		# Find image of object
-		image = object_images[obj]
+		image = object_images[obj] if obj in object_images else None
 		if image:
-			bpy.ops.object.mode_set(mode='EDIT')
-			bm = bmesh.from_edit_mesh(obj.data)
-			uv_layer = bm.loops.layers.uv.verify()
-			bm.faces.ensure_lookup_table()
-			
-			for index in object_faces[obj]:
-				face = bm.faces[index]
-
-				# Triangle Verts
-				triangle_uv = [loop[uv_layer].uv for loop in face.loops ]
-				triangle_vt = [vert.co for vert in face.verts]
-
-				#Triangle Areas
-				face_area_vt = utilities_texel.get_area_triangle(
-					triangle_vt[0], 
-					triangle_vt[1], 
-					triangle_vt[2] 
-				)
-				face_area_uv = utilities_texel.get_area_triangle_uv(
-					triangle_uv[0], 
-					triangle_uv[1], 
-					triangle_uv[2],
-					image.size[0],
-					image.size[1]
-				)
-				sum_area_vt+= math.sqrt( face_area_vt )
-				sum_area_uv+= math.sqrt( face_area_uv ) * min(image.size[0], image.size[1])
-
-	# Restore selection
-	bpy.ops.object.mode_set(mode='OBJECT')
-	bpy.ops.object.select_all(action='DESELECT')
-	for obj in object_faces:
-		obj.select_set(True)
-	bpy.context.view_layer.objects.active = list(object_faces.keys())[0]
-	if edit_mode:
-		bpy.ops.object.mode_set(mode='EDIT')
+			density = utilities_texel.Texel_density(obj, image.size[0], image.size[1])
+			face_group = np.full(len(density.area_vt), -1, dtype=np.int32)
+			face_group[object_faces[obj]] = 0
+			sum_vt, sum_uv = density.get_sums(face_group, 1)
+			sum_area_vt+= sum_vt[0]
+			sum_area_uv+= sum_uv[0]
 
 	# print("Sum verts area {}".format(sum_area_vt))
 	# print("Sum texture area {}".format(sum_area_uv))
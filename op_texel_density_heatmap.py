@@ -0,0 +1,161 @@
+import bpy
+import numpy as np
+
+from . import settings
+from . import utilities_texel
+
+
+# Name of the face corner color layer
+layer_name = "TT_texel_density"
+
+# Histogram bins of the ratio to the target density
+histogram_edges = [0.25, 0.5, 0.8, 1.25, 2.0, 4.0]
+histogram_labels = ["< ¼", "¼ - ½", "½ - 0.8", "≈ 1", "1.25 - 2", "2 - 4", "> 4"]
+
+# Solid shading color type per 3D view space before the heatmap, restored by clear()
+color_types = {}
+
+
+
+class op(bpy.types.Operator):
+	bl_idname = "uv.textools_texel_density_heatmap"
+	bl_label = "Density Heatmap"
+	bl_description = "Color faces by their texel density relative to the target density"
+	bl_options = {'REGISTER', 'UNDO'}
+
+	@classmethod
+	def poll(cls, context):
+		if len(get_valid_objects()) == 0:
+			return False
+
+		if bpy.context.scene.texToolsSettings.texel_density <= 0:
+			return False
+
+		return True
+
+	def execute(self, context):
+		heatmap(self, context, bpy.context.scene.texToolsSettings.texel_density)
+		return {'FINISHED'}
+
+
+
+def heatmap(self, context, density):
+	# Color layers are written on the mesh data, edit mode would overwrite them
+	previous_mode = bpy.context.object.mode if bpy.context.object else 'OBJECT'
+	if previous_mode != 'OBJECT':
+		bpy.ops.object.mode_set(mode='OBJECT')
+
+	ratios = []
+	for obj in get_valid_objects():
+		# Texture of the object or the TexTools size
+		image = utilities_texel.get_object_texture_image(obj)
+		if image:
+			size_x, size_y = image.size[0], image.size[1]
+		else:
+			size_x, size_y = bpy.context.scene.texToolsSettings.size[0], bpy.context.scene.texToolsSettings.size[1]
+
+		density_faces = utilities_texel.Texel_density(obj, size_x, size_y).get_faces()
+		ratio = density_faces / density
+		set_face_colors(obj, get_colors(ratio))
+		ratios.append(ratio[density_faces > 0])
+
+	if previous_mode != 'OBJECT':
+		bpy.ops.object.mode_set(mode=previous_mode)
+
+	# Show vertex colors in solid shading, keep the previous color type until the heatmap is cleared
+	for area in bpy.context.screen.areas:
+		if area.type == 'VIEW_3D':
+			for space in area.spaces:
+				if space.type == 'VIEW_3D':
+					if space.as_pointer() not in color_types:
+						color_types[space.as_pointer()] = space.shading.color_type
+					space.shading.color_type = 'VERTEX'
+
+	settings.texel_density_stats = get_stats(np.concatenate(ratios) if ratios else np.zeros(0), density)
+	if settings.texel_density_stats:
+		self.report({'INFO'}, "Texel density median {:.2f}x target".format(settings.texel_density_stats['ratio']))
+
+
+
+def clear():
+	"""Remove the heatmap colors and stats, restore the solid shading color types"""
+	for screen in bpy.data.screens:
+		for area in screen.areas:
+			if area.type == 'VIEW_3D':
+				for space in area.spaces:
+					if space.type == 'VIEW_3D' and space.as_pointer() in color_types:
+						space.shading.color_type = color_types[space.as_pointer()]
+	color_types.clear()
+
+	for mesh in bpy.data.meshes:
+		layer = mesh.vertex_colors.get(layer_name)
+		if layer:
+			mesh.vertex_colors.remove(layer)
+
+	settings.texel_density_stats = None
+
+
+
+def get_colors(ratio):
+	"""False color ramp per face, blue for half the target density and below, green on target, red for double and above"""
+	t = np.clip(np.log2(np.maximum(ratio, 0.000001)), -1, 1)
+	colors = np.zeros((len(ratio), 4), dtype=np.float32)
+	colors[:,0] = np.clip(t, 0, 1)
+	colors[:,1] = 1 - np.abs(t)
+	colors[:,2] = np.clip(-t, 0, 1)
+	colors[:,3] = 1
+
+	# Faces without area in gray
+	colors[ratio <= 0, :3] = 0.5
+	return colors
+
+
+
+def set_face_colors(obj, colors):
+	"""Write one color per face into all of its face corners"""
+	mesh = obj.data
+	layer = mesh.vertex_colors.get(layer_name)
+	if layer is None:
+		layer = mesh.vertex_colors.new(name=layer_name)
+	layer.active = True
+
+	face_total = np.empty(len(mesh.polygons), dtype=np.int32)
+	mesh.polygons.foreach_get('loop_total', face_total)
+	layer.data.foreach_set('color', np.repeat(colors, face_total, axis=0).ravel())
+	mesh.update()
+
+
+
+def get_stats(ratio, density):
+	"""Min, max and median density and a histogram of the ratio to the target, None without faces"""
+	if len(ratio) == 0:
+		return None
+
+	counts = np.bincount(np.digitize(ratio, histogram_edges), minlength=len(histogram_labels))
+	return {
+		'min' : float(ratio.min()) * density,
+		'max' : float(ratio.max()) * density,
+		'median' : float(np.median(ratio)) * density,
+		'ratio' : float(np.median(ratio)),
+		'count' : len(ratio),
+		'histogram' : list(zip(histogram_labels, counts.tolist()))
+	}
+
+
+
+def get_valid_objects():
+	# Collect Objects
+	objects = []
+	for obj in bpy.context.selected_objects:
+		if obj.type == 'MESH' and obj.data.uv_layers:
+			objects.append(obj)
+
+	return objects
+
+
+
+def register():
+	bpy.utils.register_class(op)
+
+def unregister():
+	bpy.utils.unregister_class(op)
@@ -2,12 +2,14 @@ import bpy
 import bmesh
 import operator
 import math
+import numpy as np
 from mathutils import Vector
 from collections import defaultdict
 
 
 from . import utilities_texel
 from . import utilities_uv
+from . import utilities_uv_view
 
 class op(bpy.types.Operator):
 	bl_idname = "uv.textools_texel_density_set"
@@ -58,18 +60,22 @@ def set_texel_density(self, context, mode, density):
 	print("Set texel density!")
 
 	is_edit = bpy.context.object.mode == 'EDIT'
-	is_sync = bpy.context.scene.tool_settings.use_uv_select_sync
-	object_faces = utilities_texel.get_selected_object_faces()
+
+	# Objects in edit mode scale their selected faces, otherwise all selected objects scale all faces
+	if is_edit:
+		objects = utilities_uv.get_edit_objects()
+	else:
+		objects = [obj for obj in bpy.context.selected_objects if obj.type == 'MESH' and obj.data.uv_layers]
 
 
 	# Warning: No valid input objects
-	if len(object_faces) == 0:
+	if len(objects) == 0:
 		self.report({'ERROR_INVALID_INPUT'}, "No valid meshes or UV maps" )
 		return
 
 	# Collect Images / textures
 	object_images = {}
-	for obj in object_faces:
+	for obj in objects:
 		image = utilities_texel.get_object_texture_image(obj)
 		if image:
 			object_images[obj] = image
@@ -80,111 +86,62 @@ def set_texel_density(self, context, mode, density):
 		return
 
 
-	for obj in object_faces:
-		bpy.ops.object.mode_set(mode='OBJECT')
-		bpy.ops.object.select_all(action='DESELECT')
-		bpy.context.view_layer.objects.active = obj
-		obj.select_set(True)
-
-		# Find image of object
+	# Scale every object directly, no selection changes or transform operators
+	for obj in objects:
+		if obj not in object_images:
+			continue
 		image = object_images[obj]
-		if image:
-			bpy.ops.object.mode_set(mode='EDIT')
-			bpy.context.scene.tool_settings.use_uv_select_sync = False
-
-			# Store selection
-			utilities_uv.selection_store()
 
+		if is_edit:
 			bm = bmesh.from_edit_mesh(obj.data)
-			uv_layer = bm.loops.layers.uv.verify()
-
-			# Collect groups of faces to scale together
-			group_faces = []
-			if is_edit:
-				# Collect selected faces as islands
-				bm.faces.ensure_lookup_table()
-				bpy.ops.uv.select_all(action='SELECT')
-				group_faces = utilities_uv.getSelectionIslands()
-
-			elif mode == 'ALL':
-				# Scale all UV's together
-				group_faces = [bm.faces]
-
-			elif mode == 'ISLAND':
-				# Scale each UV idland centered
-				bpy.ops.mesh.select_all(action='SELECT')
-				bpy.ops.uv.select_all(action='SELECT')
-				group_faces = utilities_uv.getSelectionIslands()
-
-			print("group_faces {}x".format(len(group_faces)))
-
-
-			for group in group_faces:
-				# Get triangle areas
-				sum_area_vt = 0
-				sum_area_uv = 0
-				for face in group:
-					# Triangle Verts
-					triangle_uv = [loop[uv_layer].uv for loop in face.loops ]
-					triangle_vt = [obj.matrix_world * vert.co for vert in face.verts]
-
-					#Triangle Areas
-					face_area_vt = utilities_texel.get_area_triangle(
-						triangle_vt[0], 
-						triangle_vt[1], 
-						triangle_vt[2] 
-					)
-					face_area_uv = utilities_texel.get_area_triangle_uv(
-						triangle_uv[0], 
-						triangle_uv[1], 
-						triangle_uv[2],
-						image.size[0],
-						image.size[1]
-					)
-					
-					sum_area_vt+= math.sqrt( face_area_vt )
-					sum_area_uv+= math.sqrt( face_area_uv ) * min(image.size[0], image.size[1])
-
-				# Apply scale to group
-				print("scale: {:.2f} {:.2f} {:.2f} ".format(density, sum_area_uv, sum_area_vt))
-				scale = 0
-				if density > 0 and sum_area_uv > 0 and sum_area_vt > 0:
-					scale = density / (sum_area_uv / sum_area_vt)
-
-				# Set Scale Origin to Island or top left
-				if mode == 'ISLAND':
-					bpy.context.space_data.pivot_point = 'MEDIAN'
-				elif mode == 'ALL':
-					bpy.context.space_data.pivot_point = 'CURSOR'
-					bpy.ops.uv.cursor_set(location=(0, 1))
-
-				# Select Face loops and scale
-				bpy.ops.uv.select_all(action='DESELECT')
-				bpy.context.scene.tool_settings.uv_select_mode = 'VERTEX'
-				for face in group:
-					for loop in face.loops:
-						loop[uv_layer].select_set(True)
-
-				print("Scale: {} {}x".format(scale, len(group)))
-				bpy.ops.transform.resize(value=(scale, scale, 1), proportional='DISABLED')
-
-			# Restore selection
-			utilities_uv.selection_restore()
-
-	# Restore selection
-	bpy.ops.object.mode_set(mode='OBJECT')
-	bpy.ops.object.select_all(action='DESELECT')
-	for obj in object_faces:
-		obj.select_set(True)
-	bpy.context.view_layer.objects.active = list(object_faces.keys())[0]
-
-	# Restore edit mode
-	if is_edit:
-		bpy.ops.object.mode_set(mode='EDIT')
-
-	# Restore sync mode
-	if is_sync:
-		bpy.context.scene.tool_settings.use_uv_select_sync = True
+		else:
+			bm = bmesh.new()
+			bm.from_mesh(obj.data)
+		uv_layer = bm.loops.layers.uv.verify()
+		bm.faces.index_update()
+
+		# Collect groups of faces to scale together
+		group_faces = []
+		if is_edit:
+			# Collect selected faces as islands
+			group_faces = utilities_uv.get_islands(bm, uv_layer, [face for face in bm.faces if face.select])
+
+		elif mode == 'ALL':
+			# Scale all UV's together
+			group_faces = [list(bm.faces)]
+
+		elif mode == 'ISLAND':
+			# Scale each UV idland centered
+			group_faces = utilities_uv.get_islands(bm, uv_layer)
+
+		print("group_faces {}x".format(len(group_faces)))
+
+		if len(group_faces) > 0:
+			view = utilities_uv_view.UVMeshView(obj)
+			groups_center = view.get_island_bounds(group_faces)['center']
+
+			# Density of each group from the bulk face areas
+			density_faces = utilities_texel.Texel_density(obj, image.size[0], image.size[1])
+			groups_density = density_faces.get_groups(view.get_face_islands(group_faces), len(group_faces))
+
+			scales = np.zeros(len(group_faces))
+			if density > 0:
+				np.divide(density, groups_density, out=scales, where=groups_density > 0)
+
+			# Set Scale Origin to Island or top left
+			if mode == 'ISLAND':
+				pivots = groups_center
+			else:
+				pivots = np.tile((0.0, 1.0), (len(group_faces), 1))
+
+			print("Scale {}: {}".format(obj.name, scales))
+			matrices = scales[:,None,None] * np.eye(2)
+
+			view.transform_islands(group_faces, matrices=matrices, pivots=pivots)
+			view.write()
+
+		if not is_edit:
+			bm.free()
 
 def register():
 	bpy.utils.register_class(op)
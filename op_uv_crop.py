@@ -6,6 +6,7 @@ from collections import defaultdict
 from math import pi
 
 from . import utilities_uv
+from . import utilities_uv_view
 from . import utilities_ui
 
 class op(bpy.types.Operator):
@@ -43,25 +44,22 @@ class op(bpy.types.Operator):
 
 
 def crop(self, context):
-	bm = bmesh.from_edit_mesh(bpy.context.active_object.data);
-	uv_layer = bm.loops.layers.uv.verify();
-
 	padding = utilities_ui.get_padding()
 
 	
-	# Scale to fit bounds
-	bbox = utilities_uv.getSelectionBBox()
+	# Scale to fit bounds, the selection of all objects in edit mode shares one frame
+	views = [utilities_uv_view.UVMeshView(obj) for obj in utilities_uv.get_edit_objects()]
+	bbox = utilities_uv_view.get_bbox_views(views)
 	scale_u = (1.0-padding) / bbox['width']
 	scale_v = (1.0-padding) / bbox['height']
 	scale = min(scale_u, scale_v)
 
-	bpy.ops.transform.resize(value=(scale, scale, scale), constraint_axis=(False, False, False), mirror=False, proportional='DISABLED')
-
-	# Reposition
-	bbox = utilities_uv.getSelectionBBox()
-
-	delta_position = Vector((padding/2,1-padding/2)) - Vector((bbox['min'].x, bbox['min'].y + bbox['height']))
-	bpy.ops.transform.translate(value=(delta_position.x, delta_position.y, 0))
+	# Scale around the top left corner and move it to the padded top left of the UV space
+	pivot = Vector((bbox['min'].x, bbox['max'].y))
+	delta_position = Vector((padding/2,1-padding/2)) - pivot
+	for view in views:
+		view.transform(view.get_selected_loops(), utilities_uv_view.get_matrix_scale(scale, scale), pivot, delta_position)
+		view.write()
 
 def register():
 	bpy.utils.register_class(op)
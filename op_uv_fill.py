@@ -1,5 +1,6 @@
 import bpy
 import bmesh
+import numpy as np
 import operator
 import math
 
@@ -8,6 +9,8 @@ from collections import defaultdict
 
 
 from . import utilities_uv
+from . import utilities_uv_view
+from . import utilities_uv_geometry
 from . import utilities_ui
 
 class op(bpy.types.Operator):
@@ -50,66 +53,34 @@ def fill(self, context):
 	#Store selection
 	utilities_uv.selection_store()
 
-	bm = bmesh.from_edit_mesh(bpy.context.active_object.data);
-	uv_layer = bm.loops.layers.uv.verify();
-
-	
-	# 1.) Rotate minimal bounds (less than 45 degrees rotation)
-	steps = 8
-	angle = 45;	# Starting Angle, half each step
-	bboxPrevious = utilities_uv.getSelectionBBox()
+	# Selection of all objects in edit mode is filled as one
+	views = [utilities_uv_view.UVMeshView(obj) for obj in utilities_uv.get_edit_objects()]
+	masks = [view.get_selected_loops() for view in views]
+	uvs = np.concatenate([view.uvs[mask] for view, mask in zip(views, masks)])
+	if len(uvs) == 0:
+		utilities_uv.selection_restore()
+		return
 	
-	for i in range(0, steps):
-		# Rotate right
-		bpy.ops.transform.rotate(value=(angle * math.pi / 180), axis=(0, 0, 1))
-		bbox = utilities_uv.getSelectionBBox()
-
-
-		print("Rotate {}, diff le: {}".format(angle, bbox['height'] - bboxPrevious['height']))
-
-
-		if i == 0:
-			# Check if already squared
-			sizeA = bboxPrevious['width'] * bboxPrevious['height']
-			sizeB = bbox['width'] * bbox['height']
-			if abs(bbox['width'] - bbox['height']) <= 0.0001 and sizeA < sizeB:
-				bpy.ops.transform.rotate(value=(-angle * math.pi / 180), axis=(0, 0, 1))
-				break;
+	# 1.) Rotate to the minimum area rectangle of the selection, wider than high
+	bbox = utilities_uv_view.get_bbox_uvs(uvs)
 
-		if bbox['minLength'] < bboxPrevious['minLength']:
-			bboxPrevious = bbox;	# Success
-		else:
-			# Rotate Left
-			bpy.ops.transform.rotate(value=(-angle*2 * math.pi / 180), axis=(0, 0, 1))
-			bbox = utilities_uv.getSelectionBBox()
-			if bbox['minLength'] < bboxPrevious['minLength']:
-				bboxPrevious = bbox;	# Success
-			else:
-				# Restore angle of this iteration
-				bpy.ops.transform.rotate(value=(angle * math.pi / 180), axis=(0, 0, 1))
+	angle, width, height = utilities_uv_geometry.get_min_area_rect(uvs)
+	if width < height:
+		angle+= math.pi / 2
+	for view, mask in zip(views, masks):
+		view.transform(mask, utilities_uv_view.get_matrix_rotation(angle), (bbox['min'] + bbox['max']) / 2)
 
-		angle = angle / 2
-
-	if bboxPrevious['width'] < bboxPrevious['height']:
-		bpy.ops.transform.rotate(value=(90 * math.pi / 180), axis=(0, 0, 1))
-
-	# 2.) Match width and height to UV bounds
-	bbox = utilities_uv.getSelectionBBox()
+	# 2.) Match width and height to UV bounds, scaling from the min corner lands it at (0,0)
+	bbox = utilities_uv_view.get_bbox_views(views)
 
 	scale_x = 1.0 / bbox['width']
 	scale_y = 1.0 / bbox['height']
 		
 	print("Scale {} | {}".format(scale_x, scale_y))
 
-	bpy.context.space_data.pivot_point = 'CENTER'
-	bpy.ops.transform.resize(value=(scale_x, scale_y, 1), constraint_axis=(False, False, False), orient_type='GLOBAL', proportional='DISABLED')
-
-
-	bbox = utilities_uv.getSelectionBBox()
-	offset_x = -bbox['min'].x
-	offset_y = -bbox['min'].y
-	
-	bpy.ops.transform.translate(value=(offset_x, offset_y, 0), constraint_axis=(False, False, False), orient_type='GLOBAL', proportional='DISABLED')
+	for view, mask in zip(views, masks):
+		view.transform(mask, utilities_uv_view.get_matrix_scale(scale_x, scale_y), bbox['min'], -bbox['min'])
+		view.write()
 
 	#Restore selection
 	utilities_uv.selection_restore()
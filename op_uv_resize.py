@@ -6,6 +6,7 @@ from collections import defaultdict
 from math import pi
 
 from . import utilities_uv
+from . import utilities_uv_view
 from . import utilities_ui
 from . import utilities_texel
 
@@ -192,24 +193,25 @@ class op(bpy.types.Operator):
 
 def resize_uv(self, context, mode, size_A, size_B):
 
-	# Set pivot
-	bpy.context.space_data.pivot_point = 'CURSOR'
+	# Pivot corner
+	pivot = Vector([0,0])
 	if mode == 'TL':
-		bpy.ops.uv.cursor_set(location=Vector([0,1]))
+		pivot = Vector([0,1])
 	elif mode == 'TR':
-		bpy.ops.uv.cursor_set(location=Vector([1,1]))
+		pivot = Vector([1,1])
 	elif mode == 'BL':
-		bpy.ops.uv.cursor_set(location=Vector([0,0]))
+		pivot = Vector([0,0])
 	elif mode == 'BR':
-		bpy.ops.uv.cursor_set(location=Vector([1,0]))
+		pivot = Vector([1,0])
 
-	# Select all UV faces
-	bpy.ops.uv.select_all(action='SELECT')
+	# Resize all visible UV faces
+	view = utilities_uv_view.UVMeshView(bpy.context.active_object)
+	mask = view.face_select[view.loop_face]
 
-	# Resize
 	scale_x = size_A.x / size_B.x
 	scale_y = size_A.y / size_B.y
-	bpy.ops.transform.resize(value=(scale_x, scale_y, 1.0), proportional='DISABLED')
+	view.transform(mask, utilities_uv_view.get_matrix_scale(scale_x, scale_y), pivot)
+	view.write()
 
 
 
@@ -2,16 +2,13 @@ import bpy
 import bmesh
 import operator
 
-selection_uv_mode = '';
-selection_uv_loops = []
-selection_uv_pivot = '';
-selection_uv_pivot_pos = (0,0)
+selection_snapshots = []	# utilities_uv.Selection_snapshot per object
+selection_depth = 0
 
-selection_mode = [False, False, True];
-selection_vert_indexies = []
-selection_face_indexies = []
+texel_density_stats = None	# op_texel_density_heatmap.get_stats() of the last heatmap
 
 bake_render_engine = ''
 bake_objects_hide_render = [] 
 bake_cycles_samples = 1
+bake_farm = None	# utilities_bake_farm.Bake_farm while its workers run
 sets = []
\ No newline at end of file
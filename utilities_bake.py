@@ -1,11 +1,13 @@
 import bpy
 import bmesh
+import numpy as np
 import operator
 import time
 from mathutils import Vector
 from collections import defaultdict
 from math import pi
 from mathutils import Color
+from bpy.app.handlers import persistent
 
 from . import settings
 from . import utilities_color
@@ -118,13 +120,19 @@ def restore_bake_settings():
 
 stored_materials = {}
 stored_material_faces = {}
+stored_material_indices = {}
 def store_materials_clear():
 	stored_materials.clear()
 	stored_material_faces.clear()
+	stored_material_indices.clear()
 
 
 
 def store_materials(obj):
+	# Keep the first backup, later calls would store the bake materials
+	if obj in stored_materials:
+		return
+
 	stored_materials[obj] = []
 	stored_material_faces[obj] = []
 
@@ -152,6 +160,22 @@ def store_materials(obj):
 	# Back to object mode
 	bpy.ops.object.mode_set(mode='OBJECT')
 
+	# Face assignments in bulk for reset_materials()
+	stored_material_indices[obj] = np.empty(len(obj.data.polygons), dtype=np.int32)
+	obj.data.polygons.foreach_get('material_index', stored_material_indices[obj])
+
+
+
+def reset_materials():
+	"""Put the stored materials and face assignments back without leaving object mode, materials keep their backup names"""
+	for obj in stored_materials:
+		materials = stored_materials[obj]
+		for index in range(len(obj.material_slots)):
+			obj.material_slots[index].material = materials[index] if index < len(materials) else None
+
+		obj.data.polygons.foreach_set('material_index', stored_material_indices[obj])
+		obj.data.update()
+
 
 
 def restore_materials():
@@ -164,16 +188,16 @@ def restore_materials():
 		# Restore slots
 		for index in range(len(stored_materials[obj])):
 			material = stored_materials[obj][index]
-			faces = stored_material_faces[obj][index]
+			faces = set(stored_material_faces[obj][index])
 			
 			if material:
 				material.name = material.name.replace("backup_","")
-				obj.material_slots[index].material = material
+			obj.material_slots[index].material = material
 
-				# Face material indexies
-				for face in bm.faces:
-					if face.index in faces:
-						face.material_index = index
+			# Face material indexies, empty slots too as bake materials move all faces to the first slot
+			for face in bm.faces:
+				if face.index in faces:
+					face.material_index = index
 
 		# Back to object mode
 		bpy.ops.object.mode_set(mode='OBJECT')
@@ -236,7 +260,7 @@ def get_set_name(obj):
 
 
 
-def get_object_type(obj):
+def get_object_type(obj, is_multi=None):
 
 	name = get_set_name_base(obj)
 
@@ -253,7 +277,9 @@ def get_object_type(obj):
 				return 'float'
 
 	# Detect by modifiers (Only if more than 1 object selected)
-	if len(bpy.context.selected_objects) > 1:
+	if is_multi is None:
+		is_multi = len(bpy.context.selected_objects) > 1
+	if is_multi:
 		if obj.modifiers:
 			for modifier in obj.modifiers:
 				if modifier.type == 'SUBSURF' and modifier.render_levels > 0:
@@ -301,51 +327,24 @@ def get_baked_images(sets):
 
 
 def get_bake_sets():
+	is_multi = len(bpy.context.selected_objects) > 1
+
+	# Group by names, each name is parsed once
+	groups = defaultdict(list)
 	filtered = {}
 	for obj in bpy.context.selected_objects:
 		if obj.type == 'MESH':
-			filtered[obj] = get_object_type(obj)
-	
-	groups = []
-	# Group by names
-	for obj in filtered:
-		name = get_set_name(obj)
-
-		if len(groups)==0:
-			groups.append([obj])
-		else:
-			isFound = False
-			for group in groups:
-				groupName = get_set_name(group[0])
-				if name == groupName:
-					group.append(obj)
-					isFound = True
-					break
-
-			if not isFound:
-				groups.append([obj])
+			filtered[obj] = get_object_type(obj, is_multi)
+			groups[get_set_name(obj)].append(obj)
 
 	# Sort groups alphabetically
-	keys = [get_set_name(group[0]) for group in groups]
-	keys.sort()
-	sorted_groups = []
-	for key in keys:
-		for group in groups:
-			if key == get_set_name(group[0]):
-				sorted_groups.append(group)
-				break
-				
-	groups = sorted_groups			
-	# print("Keys: "+", ".join(keys))
-
-
 	bake_sets = []
-	for group in groups:
+	for name in sorted(groups.keys()):
 		low = []
 		high = []
 		cage = []
 		float = []
-		for obj in group:
+		for obj in groups[name]:
 			if filtered[obj] == 'low':
 				low.append(obj)
 			elif filtered[obj] == 'high':
@@ -355,14 +354,90 @@ def get_bake_sets():
 			elif filtered[obj] == 'float':
 				float.append(obj)
 
-
-		name = get_set_name(group[0])
 		bake_sets.append(BakeSet(name, low, cage, high, float))
 
 	return bake_sets
 
 
 
+# Memoized get_bake_sets() and get_baked_images() for panel redraws
+index = {
+	'is_dirty' : True,
+	'selection' : None,
+	'sets' : [],
+	'images_key' : None,
+	'images' : []
+}
+
+
+
+def get_bake_sets_cached():
+	"""Bake sets of the selection, only rebuilt when the selection or the scene changed"""
+	selection = tuple(obj.name for obj in bpy.context.selected_objects)
+	if index['is_dirty'] or index['selection'] != selection:
+		index['sets'] = get_bake_sets()
+		index['selection'] = selection
+		index['is_dirty'] = False
+		index['images_key'] = None
+	return index['sets']
+
+
+
+def get_baked_images_cached(sets):
+	key = (tuple(set.name for set in sets), len(bpy.data.images))
+	if index['images_key'] != key:
+		index['images'] = get_baked_images(sets)
+		index['images_key'] = key
+	return index['images']
+
+
+
+@persistent
+def on_depsgraph_update(scene, depsgraph=None):
+	if depsgraph is None:
+		depsgraph = bpy.context.evaluated_depsgraph_get()
+
+	# Names, parents, collections and modifiers decide the sets, images their textures
+	for update in depsgraph.updates:
+		if isinstance(update.id, (bpy.types.Object, bpy.types.Collection, bpy.types.Scene)):
+			index['is_dirty'] = True
+		if isinstance(update.id, (bpy.types.Object, bpy.types.Collection, bpy.types.Scene, bpy.types.Image)):
+			index['images_key'] = None
+
+
+
+@persistent
+def on_load(dummy):
+	"""Undo and redo reload the data blocks too, the memoized sets would keep stale Object references"""
+	settings.sets = []
+	index['is_dirty'] = True
+	index['sets'] = []
+	index['images'] = []
+	index['images_key'] = None
+
+
+
+def register():
+	bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update)
+	bpy.app.handlers.load_post.append(on_load)
+	bpy.app.handlers.undo_post.append(on_load)
+	bpy.app.handlers.redo_post.append(on_load)
+
+
+
+def unregister():
+	if on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+		bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update)
+	if on_load in bpy.app.handlers.load_post:
+		bpy.app.handlers.load_post.remove(on_load)
+	if on_load in bpy.app.handlers.undo_post:
+		bpy.app.handlers.undo_post.remove(on_load)
+	if on_load in bpy.app.handlers.redo_post:
+		bpy.app.handlers.redo_post.remove(on_load)
+	on_load(None)
+
+
+
 class BakeSet:
 	objects_low = []	#low poly geometry
 	objects_cage = []	#Cage low poly geometry
@@ -0,0 +1,248 @@
+import bpy
+import os
+import hashlib
+import numpy as np
+
+from . import utilities_image
+
+
+# Bump when the bake output changes for the same input
+version = 1
+
+
+
+def get_directory():
+	return bpy.utils.user_resource('DATAFILES', path="textools_bake_cache", create=True)
+
+
+
+def get_preferences():
+	return bpy.context.preferences.addons[__package__].preferences
+
+
+
+def get_keys(bake_mode, mode, sets, bake_single, size, sampling_scale, samples, ray_distance, tile_size, digests=None):
+	"""Cache key per image name, a hash of everything that affects the baked pixels.
+	In single texture mode the one image depends on all sets.
+	Pass the same digests dict for all modes of a queue to hash each object only once."""
+	scene_settings = bpy.context.scene.texToolsSettings
+	preferences = get_preferences()
+	depsgraph = bpy.context.evaluated_depsgraph_get()
+
+	# Bake settings shared by all images of this mode
+	common = hashlib.sha256()
+	common.update(repr((
+		version,
+		tuple(bpy.app.version),
+		mode,
+		bake_mode.material, bake_mode.type, bake_mode.normal_space, tuple(bake_mode.color), bake_mode.engine, bake_mode.composite,
+		[(param, get_value(getattr(scene_settings, param))) for param in bake_mode.params],
+		tuple(size), sampling_scale, samples, ray_distance, tile_size,
+		scene_settings.padding, scene_settings.bake_filter,
+		preferences.swizzle_y_coordinate, preferences.bake_32bit_float
+	)).encode())
+
+	if digests is None:
+		digests = {}
+
+	# Ambient occlusion traces against every visible object of the scene
+	if bake_mode.type == 'AO':
+		world = bpy.context.scene.world
+		common.update(repr(world.light_settings.distance if world else None).encode())
+		names = {obj.name for set in sets for obj in (set.objects_low + set.objects_cage + set.objects_high + set.objects_float)}
+		for obj in sorted(bpy.context.view_layer.objects, key=lambda obj: obj.name):
+			if obj.type == 'MESH' and obj.name not in names and obj.visible_get() and not obj.hide_render:
+				common.update(obj.name.encode())
+				common.update(get_digest(obj, depsgraph, True, digests))
+
+	keys = {}
+	hashes = {}
+	for set in sets:
+		name = "{}_{}".format(sets[0].name if bake_single else set.name, mode)
+		if name not in hashes:
+			hashes[name] = common.copy()
+		update_set(hashes[name], set, depsgraph, bake_mode.setVColor is None, digests)
+
+	for name, hash in hashes.items():
+		keys[name] = hash.hexdigest()
+	return keys
+
+
+
+def update_set(hash, set, depsgraph, use_vertex_colors=True, digests=None):
+	if digests is None:
+		digests = {}
+	for role, objects in (('low', set.objects_low), ('cage', set.objects_cage), ('high', set.objects_high), ('float', set.objects_float)):
+		hash.update(role.encode())
+		for obj in objects:
+			hash.update(get_digest(obj, depsgraph, use_vertex_colors, digests))
+
+
+
+def get_digest(obj, depsgraph, use_vertex_colors, digests):
+	"""Digest of update_object(), computed once per object and vertex color variant"""
+	key = (obj.name, use_vertex_colors)
+	if key not in digests:
+		digest = hashlib.sha256()
+		update_object(digest, obj, depsgraph, use_vertex_colors)
+		digests[key] = digest.digest()
+	return digests[key]
+
+
+
+def update_object(hash, obj, depsgraph, use_vertex_colors=True):
+	"""Hash the evaluated mesh buffers, shading, world matrix and materials of an object.
+	Modes that generate vertex colors skip them, the bake itself overwrites them."""
+	obj_eval = obj.evaluated_get(depsgraph)
+	mesh = obj_eval.to_mesh()
+
+	update_buffer(hash, mesh.vertices, 'co', np.float32, 3)
+	update_buffer(hash, mesh.loops, 'vertex_index', np.int32)
+	update_buffer(hash, mesh.polygons, 'loop_total', np.int32)
+	update_buffer(hash, mesh.polygons, 'material_index', np.int32)
+
+	# Shading: smooth faces, sharp edges, auto smooth and custom normals all end up in the split normals
+	update_buffer(hash, mesh.polygons, 'use_smooth', bool)
+	update_buffer(hash, mesh.edges, 'use_edge_sharp', bool)
+	hash.update(repr((mesh.use_auto_smooth, mesh.auto_smooth_angle)).encode())
+	mesh.calc_normals_split()
+	update_buffer(hash, mesh.loops, 'normal', np.float32, 3)
+	if mesh.uv_layers.active:
+		update_buffer(hash, mesh.uv_layers.active.data, 'uv', np.float32, 2)
+	if use_vertex_colors and mesh.vertex_colors.active:
+		update_buffer(hash, mesh.vertex_colors.active.data, 'color', np.float32, 4)
+
+	hash.update(np.array(obj.matrix_world, dtype=np.float64).tobytes())
+	obj_eval.to_mesh_clear()
+
+	for slot in obj.material_slots:
+		update_material(hash, slot.material)
+
+
+
+# Node properties that only change the node editor
+node_properties_ui = {
+	'rna_type', 'name', 'label', 'location', 'width', 'width_hidden', 'height', 'dimensions', 'select',
+	'show_options', 'show_preview', 'show_texture', 'hide', 'use_custom_color', 'color', 'type'
+}
+
+
+
+def update_material(hash, material):
+	"""Hash the settings and node tree of a material, its name does not change the bake"""
+	if material is None:
+		hash.update(b"None")
+		return
+	hash.update(repr((material.use_nodes, tuple(material.diffuse_color))).encode())
+	if material.use_nodes and material.node_tree:
+		update_node_tree(hash, material.node_tree, set())
+
+
+
+def update_node_tree(hash, tree, trees):
+	"""Hash nodes with their properties and input values, images and links. Node groups are followed once."""
+	for node in sorted(tree.nodes, key=lambda node: node.name):
+		# Target of the bake itself, see op_bake.setup_image_bake_node()
+		if node.name == "bake":
+			continue
+
+		hash.update(repr((node.name, node.bl_idname)).encode())
+		for prop in node.bl_rna.properties:
+			if prop.identifier not in node_properties_ui and not prop.identifier.startswith('bl_') and prop.type in {'BOOLEAN', 'INT', 'FLOAT', 'STRING', 'ENUM'}:
+				hash.update(repr((prop.identifier, get_value(getattr(node, prop.identifier)))).encode())
+		for socket in node.inputs:
+			if hasattr(socket, 'default_value'):
+				hash.update(repr((socket.identifier, get_value(socket.default_value))).encode())
+
+		if getattr(node, 'color_ramp', None):
+			hash.update(repr((node.color_ramp.interpolation, [(element.position, tuple(element.color)) for element in node.color_ramp.elements])).encode())
+		if getattr(node, 'image', None):
+			update_image(hash, node.image)
+		group = getattr(node, 'node_tree', None)
+		if group and group.name not in trees:
+			trees.add(group.name)
+			update_node_tree(hash, group, trees)
+
+	links = [(link.from_node.name, link.from_socket.identifier, link.to_node.name, link.to_socket.identifier) for link in tree.links]
+	hash.update(repr(sorted(links)).encode())
+
+
+
+def update_image(hash, image):
+	"""Hash the source of an image, the pixels when they only live in memory"""
+	hash.update(repr((image.source, image.filepath, tuple(image.size), image.colorspace_settings.name)).encode())
+	path = bpy.path.abspath(image.filepath)
+	if image.source == 'FILE' and not image.is_dirty and not image.packed_file and os.path.isfile(path):
+		hash.update(repr(os.path.getmtime(path)).encode())
+	elif image.has_data:
+		pixels = utilities_image.get_pixels(image)
+		hash.update(pixels.tobytes())
+
+
+
+def update_buffer(hash, collection, attribute, dtype, size=1):
+	buffer = np.empty(len(collection) * size, dtype=dtype)
+	collection.foreach_get(attribute, buffer)
+	hash.update(buffer.tobytes())
+
+
+
+def get_value(value):
+	# Enum flags come as sets, keep their order stable across sessions
+	if isinstance(value, (set, frozenset)):
+		return tuple(sorted(value))
+	if hasattr(value, '__len__') and not isinstance(value, str):
+		return tuple(value)
+	return value
+
+
+
+def get_path(key):
+	return utilities_image.get_image_path(get_directory(), key, get_preferences().bake_32bit_float == '32')
+
+
+
+def load(key, name):
+	"""Image of a cache hit loaded as 'name', None on a miss"""
+	path = get_path(key)
+	if not os.path.isfile(path):
+		return None
+
+	print("Bake cache hit '{}'".format(name))
+	# Most recently used
+	os.utime(path, None)
+	return utilities_image.load_image(path, name)
+
+
+
+def store(key, image):
+	utilities_image.save_image(image, get_path(key))
+	prune(get_preferences().bake_cache_size * 1024 * 1024)
+
+
+
+def prune(limit):
+	"""Remove the least recently used files until the cache fits into 'limit' bytes"""
+	directory = get_directory()
+	entries = []
+	for name in os.listdir(directory):
+		path = os.path.join(directory, name)
+		if os.path.isfile(path):
+			stat = os.stat(path)
+			entries.append((stat.st_mtime, stat.st_size, path))
+
+	total = sum(entry[1] for entry in entries)
+	for mtime, size, path in sorted(entries):
+		if total <= limit:
+			break
+		try:
+			os.remove(path)
+		except OSError:
+			# Another Blender, e.g. a bake farm worker, removed it first
+			pass
+		total-= size
+
+
+
+def clear():
+	prune(0)
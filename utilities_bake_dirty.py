@@ -0,0 +1,159 @@
+import bpy
+import hashlib
+import numpy as np
+from bpy.app.handlers import persistent
+
+from . import utilities_uv_view
+from . import utilities_bake_cache
+
+
+# Per set name: object names, their fingerprints and the modes baked since the objects last changed
+baked = {}
+# Per set name: UV triangles (n,3,2) of the low poly objects at the last bake
+baked_uvs = {}
+# Object name to the name of its baked set
+object_sets = {}
+
+
+
+def get_object_names(set):
+	return frozenset(obj.name for obj in (set.objects_low + set.objects_cage + set.objects_high + set.objects_float))
+
+
+
+def get_fingerprint(obj, depsgraph):
+	"""Digest of the evaluated geometry, UVs, world matrix and materials of an object.
+	Vertex colors are left out, modes like id_element write them during the bake."""
+	digest = hashlib.sha256()
+	utilities_bake_cache.update_object(digest, obj, depsgraph, False)
+	return digest.digest()
+
+
+
+def get_fingerprints(set, depsgraph):
+	objects = set.objects_low + set.objects_cage + set.objects_high + set.objects_float
+	return {obj.name : get_fingerprint(obj, depsgraph) for obj in objects}
+
+
+
+def get_snapshot(sets):
+	"""Fingerprints of the sets to compare against when a bake started earlier finishes, see mark_baked()"""
+	depsgraph = bpy.context.evaluated_depsgraph_get()
+	return {set.name : get_fingerprints(set, depsgraph) for set in sets}
+
+
+
+def is_dirty(set, mode):
+	"""True when the set was not baked in this mode since its objects changed geometry, transform or material"""
+	if set.name not in baked:
+		return True
+	entry = baked[set.name]
+	return mode not in entry['modes'] or entry['objects'] != get_object_names(set)
+
+
+
+def get_dirty(sets, mode):
+	return [set for set in sets if is_dirty(set, mode)]
+
+
+
+def mark_baked(sets, queue, snapshot=None):
+	"""Mark the sets clean for the baked modes. With a snapshot from the start of the bake
+	sets that changed in the meantime stay dirty."""
+	depsgraph = bpy.context.evaluated_depsgraph_get()
+	for set in sets:
+		names = get_object_names(set)
+		fingerprints = get_fingerprints(set, depsgraph)
+		if snapshot is not None and snapshot.get(set.name) != fingerprints:
+			mark_dirty(set.name)
+			continue
+
+		if set.name not in baked or baked[set.name]['fingerprints'] != fingerprints:
+			baked[set.name] = {'objects' : names, 'fingerprints' : fingerprints, 'modes' : frozenset()}
+		baked[set.name]['modes'] = baked[set.name]['modes'] | frozenset(queue)
+		for name in names:
+			object_sets[name] = set.name
+		baked_uvs[set.name] = get_uv_triangles(set)
+
+
+
+def mark_dirty(name):
+	if name in baked:
+		del baked[name]
+
+
+
+def check_object(obj, depsgraph):
+	"""Mark the set of the object dirty when its fingerprint differs from the last bake"""
+	set_name = object_sets.get(obj.name)
+	if set_name not in baked:
+		return
+	fingerprint = baked[set_name]['fingerprints'].get(obj.name)
+	if fingerprint != get_fingerprint(obj, depsgraph):
+		mark_dirty(set_name)
+
+
+
+def get_uv_triangles(set):
+	"""UV coordinates of the loop triangles of all low poly objects as an (n,3,2) array"""
+	triangles = [np.zeros((0, 3, 2), dtype=np.float32)]
+	for obj in set.objects_low:
+		view = utilities_uv_view.UVMeshView(obj)
+		loops, triangle_face = view.get_loop_triangles()
+		triangles.append(view.uvs[loops])
+	return np.concatenate(triangles)
+
+
+
+@persistent
+def on_depsgraph_update(scene, depsgraph=None):
+	if len(baked) == 0:
+		return
+
+	if depsgraph is None:
+		depsgraph = bpy.context.evaluated_depsgraph_get()
+
+	# Compare fingerprints instead of trusting the update flags,
+	# the bake itself swaps materials and writes vertex colors
+	materials = set()
+	for update in depsgraph.updates:
+		id = update.id.original
+		if isinstance(id, bpy.types.Object):
+			if (update.is_updated_geometry or update.is_updated_transform) and id.name in object_sets:
+				check_object(id, depsgraph)
+		elif isinstance(id, bpy.types.Material):
+			materials.add(id.name)
+
+	if len(materials) > 0:
+		for name, set_name in list(object_sets.items()):
+			obj = bpy.data.objects.get(name)
+			if obj and any(slot.material and slot.material.name in materials for slot in obj.material_slots):
+				check_object(obj, depsgraph)
+
+
+
+@persistent
+def on_load(dummy):
+	clear()
+
+
+
+def clear():
+	baked.clear()
+	baked_uvs.clear()
+	object_sets.clear()
+
+
+
+def register():
+	bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update)
+	bpy.app.handlers.load_post.append(on_load)
+
+
+
+def unregister():
+	if on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+		bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update)
+	if on_load in bpy.app.handlers.load_post:
+		bpy.app.handlers.load_post.remove(on_load)
+	clear()
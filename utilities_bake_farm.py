@@ -0,0 +1,263 @@
+import bpy
+import os
+import sys
+import json
+import shutil
+import tempfile
+import subprocess
+
+from . import settings
+from . import utilities_bake as ub
+from . import op_bake
+from . import utilities_image
+from . import utilities_bake_dirty
+
+
+# Scene settings the workers bake with
+settings_keys = [
+	'size', 'padding', 'bake_samples', 'bake_curvature_size', 'bake_wireframe_size', 'bake_bevel_size', 'bake_bevel_samples',
+	'bake_thickness_distance', 'bake_thickness_contrast', 'bake_ray_distance', 'bake_force_single', 'bake_sampling', 'bake_tile_size', 'bake_filter', 'bake_use_cache'
+]
+preferences_keys = ['swizzle_y_coordinate', 'bake_32bit_float']
+
+# Python run by each 'blender -b' worker, enables the addon and bakes its job of the manifest
+worker_expression = "import addon_utils, importlib; addon_utils.enable('{0}', default_set=False); importlib.import_module('{0}.utilities_bake_farm').run_worker()"
+
+
+
+class Bake_farm:
+	"""Background Blender processes baking the sets of a saved copy of the .blend in parallel"""
+	directory = ""
+	manifest = {}
+	sets = []
+	queue = []
+	processes = []
+	logs = []
+	snapshot = {}
+
+	def __init__(self, queue, sets, workers, threads):
+		self.directory = tempfile.mkdtemp(prefix="textools_bake_")
+		self.processes = []
+		self.logs = []
+		self.sets = list(sets)
+		self.queue = queue
+		# Objects as the workers bake them, changes while they run keep the sets dirty
+		self.snapshot = utilities_bake_dirty.get_snapshot(sets)
+
+		# Workers read the file as it is now, including unsaved changes
+		blend = os.path.join(self.directory, "bake.blend")
+		bpy.ops.wm.save_as_mainfile(filepath=blend, copy=True)
+
+		self.manifest = get_manifest(queue, sets, workers, threads, self.directory, blend)
+		with open(os.path.join(self.directory, "manifest.json"), 'w') as file:
+			json.dump(self.manifest, file, indent=1)
+
+
+	def start(self):
+		path = os.path.join(self.directory, "manifest.json")
+		for index in range(len(self.manifest['jobs'])):
+			command = [
+				bpy.app.binary_path, '-b', self.manifest['blend'],
+				'-t', str(self.manifest['threads']),
+				'--python-exit-code', '1',
+				'--python-expr', worker_expression.format(__package__),
+				'--', path, str(index)
+			]
+			log = open(self.get_log_path(index), 'w')
+			self.logs.append(log)
+			self.processes.append(subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT))
+
+
+	def is_done(self):
+		return all(process.poll() is not None for process in self.processes)
+
+
+	def stop(self):
+		for process in self.processes:
+			if process.poll() is None:
+				process.kill()
+				process.wait()
+		self.close()
+
+
+	def close(self):
+		for log in self.logs:
+			log.close()
+		self.logs = []
+
+
+	def get_log_path(self, index):
+		return os.path.join(self.directory, "worker_{}.log".format(index))
+
+
+	def collect(self):
+		"""Load the baked images into bpy.data.images.
+		Returns the images, the names of missing images and (exit code, log path) of failed workers."""
+		self.close()
+
+		# Images of a failed worker may be incomplete, they count as missing
+		failed = []
+		failed_names = []
+		for index, process in enumerate(self.processes):
+			if process.returncode != 0:
+				failed.append((process.returncode, self.get_log_path(index)))
+				failed_names.extend(get_job_image_names(self.manifest, self.manifest['jobs'][index]))
+
+		images = []
+		missing = []
+		for name in get_image_names(self.manifest):
+			path = utilities_image.get_image_path(self.directory, name, self.manifest['preferences']['bake_32bit_float'] == '32')
+			if name not in failed_names and os.path.isfile(path):
+				images.append(utilities_image.load_image(path, name))
+			else:
+				missing.append(name)
+
+		# Keep the worker logs to look into failed bakes
+		if len(missing) == 0:
+			shutil.rmtree(self.directory, ignore_errors=True)
+
+		return images, missing, failed
+
+
+
+def get_manifest(queue, sets, workers, threads, directory, blend):
+	"""Job manifest, the sets are split into one job per worker"""
+	scene_settings = bpy.context.scene.texToolsSettings
+	preferences = bpy.context.preferences.addons[__package__].preferences
+
+	jobs = get_jobs(sets, workers, scene_settings.bake_force_single)
+	if threads <= 0:
+		# Split the CPU cores evenly between the workers
+		threads = max(1, (os.cpu_count() or 1) // len(jobs)) if jobs else 1
+
+	return {
+		'blend' : blend,
+		'directory' : directory,
+		'queue' : queue,
+		'threads' : threads,
+		'settings' : {key : get_value(getattr(scene_settings, key)) for key in settings_keys},
+		'preferences' : {key : getattr(preferences, key) for key in preferences_keys},
+		'jobs' : [[get_set_item(set) for set in job] for job in jobs]
+	}
+
+
+
+def get_jobs(sets, workers, bake_single):
+	"""Split the sets into at most 'workers' jobs of similar polygon count"""
+	# Single texture mode bakes all sets into one image
+	if bake_single:
+		return [list(sets)] if len(sets) > 0 else []
+
+	jobs = [[] for i in range(max(1, min(workers, len(sets))))]
+	loads = [0]*len(jobs)
+	for set in sorted(sets, key=get_set_cost, reverse=True):
+		index = loads.index(min(loads))
+		jobs[index].append(set)
+		loads[index]+= get_set_cost(set)
+
+	return [job for job in jobs if len(job) > 0]
+
+
+
+def get_set_cost(set):
+	return sum(len(obj.data.polygons) for obj in (set.objects_low + set.objects_high + set.objects_float))
+
+
+
+def get_set_item(set):
+	return {
+		'name' : set.name,
+		'low' : [obj.name for obj in set.objects_low],
+		'cage' : [obj.name for obj in set.objects_cage],
+		'high' : [obj.name for obj in set.objects_high],
+		'float' : [obj.name for obj in set.objects_float]
+	}
+
+
+
+def get_value(value):
+	# Vector properties as JSON lists
+	if hasattr(value, '__len__') and not isinstance(value, str):
+		return list(value)
+	return value
+
+
+
+def get_image_names(manifest):
+	names = []
+	for job in manifest['jobs']:
+		for name in get_job_image_names(manifest, job):
+			if name not in names:
+				names.append(name)
+	return names
+
+
+
+def get_job_image_names(manifest, job):
+	names = []
+	for mode in manifest['queue']:
+		for item in job:
+			name = "{}_{}".format(job[0]['name'] if manifest['settings']['bake_force_single'] else item['name'], mode)
+			if name not in names:
+				names.append(name)
+	return names
+
+
+
+class Worker_report:
+	"""Stands in for the operator in op_bake.bake(), reports go to the worker log"""
+	def report(self, type, message):
+		print("{}: {}".format(", ".join(type), message))
+
+
+
+def run_worker():
+	"""Entry point of a worker: 'blender -b bake.blend --python-expr ... -- manifest.json index'"""
+	argv = sys.argv[sys.argv.index('--') + 1:]
+	with open(argv[0]) as file:
+		manifest = json.load(file)
+	job = manifest['jobs'][int(argv[1])]
+
+	scene_settings = bpy.context.scene.texToolsSettings
+	for key, value in manifest['settings'].items():
+		setattr(scene_settings, key, value)
+	preferences = bpy.context.preferences.addons[__package__].preferences
+	for key, value in manifest['preferences'].items():
+		setattr(preferences, key, value)
+
+	settings.sets = [get_bake_set(item) for item in job]
+	ub.store_bake_settings()
+
+	images = op_bake.bake(
+		self = Worker_report(),
+		queue = manifest['queue'],
+		size = scene_settings.size,
+		bake_single = scene_settings.bake_force_single,
+		sampling_scale = int(scene_settings.bake_sampling),
+		samples = scene_settings.bake_samples,
+		ray_distance = scene_settings.bake_ray_distance,
+		sets = settings.sets,
+		tile_size = int(scene_settings.bake_tile_size)
+	)
+	# Non zero exit code of the worker, see Bake_farm.collect()
+	if images is None:
+		raise RuntimeError("Bake failed")
+
+	is_float_32 = manifest['preferences']['bake_32bit_float'] == '32'
+	for image in (images or []):
+		image.filepath_raw = utilities_image.get_image_path(manifest['directory'], image.name, is_float_32)
+		image.file_format = 'OPEN_EXR' if is_float_32 else 'PNG'
+		image.save()
+		print("Saved '{}'".format(image.filepath_raw))
+
+
+
+def get_bake_set(item):
+	objects = bpy.data.objects
+	return ub.BakeSet(
+		item['name'],
+		[objects[name] for name in item['low']],
+		[objects[name] for name in item['cage']],
+		[objects[name] for name in item['high']],
+		[objects[name] for name in item['float']]
+	)
@@ -0,0 +1,246 @@
+import bpy
+import os
+import numpy as np
+
+
+# Lobes of the Lanczos kernel
+lanczos_size = 3
+
+
+
+def get_pixels(image, out=None):
+	"""Image pixels as an (height, width, 4) float32 array, rows from the bottom.
+	Reads into 'out' when it has the right shape instead of allocating."""
+	out = get_buffer(out, (image.size[1], image.size[0], 4))
+
+	if hasattr(image.pixels, 'foreach_get'):
+		image.pixels.foreach_get(out.ravel())
+	else:
+		# Blender before 2.83 has no bulk access on pixels
+		out.ravel()[:] = image.pixels[:]
+	return out
+
+
+
+def get_buffer(buffer, shape):
+	"""Reuse a float32 buffer of the same shape, allocate a new one otherwise"""
+	if buffer is None or buffer.shape != tuple(shape) or buffer.dtype != np.float32:
+		return np.empty(shape, dtype=np.float32)
+	return buffer
+
+
+
+def set_pixels(image, pixels):
+	"""Write an (height, width, 4) array of the image size back in one call"""
+	if hasattr(image.pixels, 'foreach_set'):
+		image.pixels.foreach_set(np.ascontiguousarray(pixels, dtype=np.float32).ravel())
+	else:
+		image.pixels[:] = pixels.ravel()
+	image.update()
+
+
+
+def set_size(image, width, height):
+	"""Resize the image buffer, generated images skip the resampling of image.scale as their pixels are written next"""
+	if image.source == 'GENERATED':
+		image.generated_width = width
+		image.generated_height = height
+	if image.size[0] != width or image.size[1] != height:
+		image.scale(width, height)
+
+
+
+def resample_image(image, width, height, filter='BOX'):
+	"""Replace image.scale(), downsample the pixels in NumPy with a box or Lanczos filter"""
+	if image.size[0] == width and image.size[1] == height:
+		return
+	pixels = resample(get_pixels(image), width, height, filter)
+	set_size(image, width, height)
+	set_pixels(image, pixels)
+
+
+
+def copy_pixels(source, target):
+	"""Copy all pixels of an image into another one, resized to the source size"""
+	pixels = get_pixels(source)
+	set_size(target, source.size[0], source.size[1])
+	set_pixels(target, pixels)
+
+
+
+def resample(pixels, width, height, filter='BOX', out=None, buffers=None):
+	"""Resample an (h, w, c) array to (height, width, c).
+	Integer factors use the box filter unless Lanczos is asked for, any other factor uses Lanczos.
+	A dict passed as buffers keeps the Lanczos intermediates for the next call of the same size."""
+	h, w = pixels.shape[0], pixels.shape[1]
+	if h == height and w == width:
+		if out is None:
+			return pixels
+		out = get_buffer(out, pixels.shape)
+		out[:] = pixels
+		return out
+
+	is_integer = h % height == 0 and w % width == 0 and h >= height and w >= width
+	if filter == 'BOX' and is_integer:
+		return downsample_box(pixels, h // height, w // width, out)
+
+	# Separable, rows first then columns
+	if buffers is None:
+		buffers = {}
+	shape_rows = (height, w) + pixels.shape[2:]
+	shape_columns = (height, width) + pixels.shape[2:]
+	buffers['rows'] = get_buffer(buffers.get('rows'), shape_rows)
+	buffers['rows_tap'] = get_buffer(buffers.get('rows_tap'), shape_rows)
+	buffers['columns_tap'] = get_buffer(buffers.get('columns_tap'), shape_columns)
+	resample_axis(pixels, height, 0, buffers['rows'], buffers['rows_tap'])
+	return resample_axis(buffers['rows'], width, 1, out, buffers['columns_tap'])
+
+
+
+def downsample_box(pixels, factor_y, factor_x=None, out=None):
+	"""Average each block of factor_y x factor_x pixels"""
+	if factor_x is None:
+		factor_x = factor_y
+	h, w, c = pixels.shape
+	blocks = pixels.reshape(h // factor_y, factor_y, w // factor_x, factor_x, c)
+	out = get_buffer(out, (h // factor_y, w // factor_x, c))
+	np.mean(blocks, axis=(1, 3), out=out)
+	return out
+
+
+
+def upsample_nearest(pixels, factor, out=None):
+	"""Repeat each pixel into a factor x factor block, writes into 'out' without temporaries"""
+	h, w, c = pixels.shape
+	out = get_buffer(out, (h * factor, w * factor, c))
+	out.reshape(h, factor, w, factor, c)[:] = pixels[:, None, :, None, :]
+	return out
+
+
+
+def get_filter_support(filter='BOX'):
+	"""Reach of the downsample filter beyond its own pixel, in output pixels"""
+	if filter == 'LANCZOS':
+		return lanczos_size
+	return 0
+
+
+
+def get_lanczos_weights(size_in, size_out):
+	"""Source indices and normalized weights per output sample as two (size_out, taps) arrays"""
+	scale = size_in / size_out
+	# Widen the kernel when downsampling to filter out frequencies above the new size
+	support = lanczos_size * max(scale, 1.0)
+	taps = int(np.ceil(support)) * 2 + 1
+
+	centers = (np.arange(size_out) + 0.5) * scale - 0.5
+	indices = np.floor(centers).astype(np.int64)[:, None] + np.arange(-(taps // 2), taps - taps // 2)[None, :]
+	x = (indices - centers[:, None]) / max(scale, 1.0)
+	weights = np.sinc(x) * np.sinc(x / lanczos_size)
+	weights[np.abs(x) >= lanczos_size] = 0
+
+	weights/= weights.sum(axis=1, keepdims=True)
+	# Clamp to the edge pixels
+	return np.clip(indices, 0, size_in - 1), weights.astype(np.float32)
+
+
+
+def resample_axis(pixels, size, axis, out=None, tmp=None):
+	"""Lanczos resampling along one axis, one gather per kernel tap into the reused tmp buffer"""
+	indices, weights = get_lanczos_weights(pixels.shape[axis], size)
+	shape = list(pixels.shape)
+	shape[axis] = size
+	out = get_buffer(out, shape)
+	tmp = get_buffer(tmp, shape)
+	weight_shape = [1] * pixels.ndim
+	weight_shape[axis] = size
+
+	out.fill(0)
+	for tap in range(indices.shape[1]):
+		np.take(pixels, indices[:, tap], axis=axis, out=tmp)
+		np.multiply(tmp, weights[:, tap].reshape(weight_shape), out=tmp)
+		out+= tmp
+	return out
+
+
+
+def get_image_path(directory, name, is_float_32):
+	# EXR keeps 32 bit floats, PNG the exact bytes of 8 bit images
+	return os.path.join(directory, name + (".exr" if is_float_32 else ".png"))
+
+
+
+def save_image(image, path):
+	"""Save the pixels to a PNG or EXR file through a temporary copy, the image keeps its own path and format"""
+	copy = bpy.data.images.new("TT_save", width=image.size[0], height=image.size[1], float_buffer=image.is_float)
+	copy.colorspace_settings.name = image.colorspace_settings.name
+	set_pixels(copy, get_pixels(image))
+	copy.filepath_raw = path
+	copy.file_format = 'OPEN_EXR' if path.endswith(".exr") else 'PNG'
+	copy.save()
+	bpy.data.images.remove(copy)
+
+
+
+def load_image(path, name):
+	"""Copy the pixels of a baked file into a generated image of the same name, like a bake in this session"""
+	loaded = bpy.data.images.load(path)
+
+	image = bpy.data.images.get(name)
+	if image and image.source == 'FILE':
+		image.user_clear()
+		bpy.data.images.remove(image)
+		image = None
+
+	if image is None:
+		image = bpy.data.images.new(name, width=loaded.size[0], height=loaded.size[1], float_buffer=loaded.is_float)
+		image.colorspace_settings.name = 'sRGB'
+
+	copy_pixels(loaded, image)
+	image.file_format = 'TARGA'
+
+	bpy.data.images.remove(loaded)
+	return image
+
+
+
+def get_triangles_mask(triangles, width, height):
+	"""Mask of the pixels with their center inside any of the (n,3,2) UV triangles"""
+	mask = np.zeros((height, width), dtype=bool)
+	# Pixel centers sit at integer coordinates
+	points = np.asarray(triangles, dtype=np.float64) * (width, height) - 0.5
+	for a, b, c in points:
+		x_min = max(0, int(np.ceil(min(a[0], b[0], c[0]))))
+		x_max = min(width - 1, int(np.floor(max(a[0], b[0], c[0]))))
+		y_min = max(0, int(np.ceil(min(a[1], b[1], c[1]))))
+		y_max = min(height - 1, int(np.floor(max(a[1], b[1], c[1]))))
+		if x_min > x_max or y_min > y_max:
+			continue
+
+		y, x = np.mgrid[y_min:y_max + 1, x_min:x_max + 1]
+		edges = [
+			(b[0] - a[0]) * (y - a[1]) - (b[1] - a[1]) * (x - a[0]),
+			(c[0] - b[0]) * (y - b[1]) - (c[1] - b[1]) * (x - b[0]),
+			(a[0] - c[0]) * (y - c[1]) - (a[1] - c[1]) * (x - c[0])
+		]
+		# Either winding, flipped UV faces count as well
+		inside = ((edges[0] >= 0) & (edges[1] >= 0) & (edges[2] >= 0)) | ((edges[0] <= 0) & (edges[1] <= 0) & (edges[2] <= 0))
+		mask[y_min:y_max + 1, x_min:x_max + 1]|= inside
+	return mask
+
+
+
+def dilate_mask(mask, iterations):
+	"""Grow a mask by 'iterations' pixels including diagonals, like the bake margin"""
+	for i in range(iterations):
+		grown = mask.copy()
+		grown[1:, :]|= mask[:-1, :]
+		grown[:-1, :]|= mask[1:, :]
+		grown[:, 1:]|= mask[:, :-1]
+		grown[:, :-1]|= mask[:, 1:]
+		grown[1:, 1:]|= mask[:-1, :-1]
+		grown[:-1, :-1]|= mask[1:, 1:]
+		grown[1:, :-1]|= mask[:-1, 1:]
+		grown[:-1, 1:]|= mask[1:, :-1]
+		mask = grown
+	return mask
@@ -0,0 +1,178 @@
+import bpy
+import zlib
+import array
+from bpy.app.handlers import persistent
+
+
+# Cached islands per (mesh, UV layer), see get() and store()
+entries = {}
+
+
+
+class Island_cache_entry:
+	fingerprint = None
+	counts = None			# Selection counts when the fingerprint was taken
+	islands = []			# Lists of face indices per island
+	face_to_island = {}		# Face index to island index
+	is_updated = False		# Mesh changed since the fingerprint, see get()
+
+	def __init__(self, fingerprint, counts, islands):
+		self.fingerprint = fingerprint
+		self.counts = counts
+		self.islands = islands
+		self.face_to_island = {}
+		for i in range(len(islands)):
+			for index in islands[i]:
+				self.face_to_island[index] = i
+		self.is_updated = False
+
+
+
+def get_key(obj):
+	mesh = obj.data
+	uv_name = mesh.uv_layers.active.name if mesh.uv_layers.active else ''
+	return (mesh.as_pointer(), uv_name)
+
+
+
+def get_fingerprint(obj):
+	"""Cheap content hash of the active UV layer, loop topology and face selection"""
+	mesh = obj.data
+	if obj.mode == 'EDIT':
+		# Sync BMesh edits back to the mesh data so foreach_get reads current values
+		obj.update_from_editmode()
+
+	count_loops = len(mesh.loops)
+	count_faces = len(mesh.polygons)
+
+	uvs = array.array('f', [0.0]) * (count_loops * 2)
+	if mesh.uv_layers.active:
+		mesh.uv_layers.active.data.foreach_get('uv', uvs)
+
+	verts = array.array('i', [0]) * count_loops
+	mesh.loops.foreach_get('vertex_index', verts)
+
+	selection = array.array('b', [0]) * count_faces
+	mesh.polygons.foreach_get('select', selection)
+
+	crc = zlib.crc32(uvs.tobytes())
+	crc = zlib.crc32(verts.tobytes(), crc)
+	crc = zlib.crc32(selection.tobytes(), crc)
+
+	return (count_loops, count_faces, crc)
+
+
+
+def get_selection_counts(obj):
+	"""Selected vert, edge and face counts, read from the edit BMesh without a copy"""
+	mesh = obj.data
+	return (mesh.total_vert_sel, mesh.total_edge_sel, mesh.total_face_sel)
+
+
+
+def get(obj):
+	"""Returns the cached entry of the object or None when missing or outdated"""
+	key = get_key(obj)
+	if key not in entries:
+		return None
+
+	entry = entries[key]
+	counts = get_selection_counts(obj)
+	# Unchanged since the fingerprint, skip the copy of the edit mesh
+	if not entry.is_updated and entry.counts == counts:
+		return entry
+
+	if entry.fingerprint != get_fingerprint(obj):
+		del entries[key]
+		return None
+
+	entry.counts = counts
+	entry.is_updated = False
+	return entry
+
+
+
+def store(obj, islands):
+	"""Cache islands given as lists of BMFaces, returns the new entry"""
+	entry = Island_cache_entry(get_fingerprint(obj), get_selection_counts(obj), [[face.index for face in island] for island in islands])
+	entries[get_key(obj)] = entry
+	return entry
+
+
+
+def refresh(obj):
+	"""Keep the island membership after a transform that did not change UV connectivity, e.g. move, rotate or scale of whole islands"""
+	key = get_key(obj)
+	if key in entries:
+		entry = entries[key]
+		entry.fingerprint = get_fingerprint(obj)
+		entry.counts = get_selection_counts(obj)
+		entry.is_updated = False
+
+
+
+def mark_updated(obj):
+	"""Check the fingerprint on the next lookup, for changes made before the depsgraph reports them"""
+	pointer = obj.data.as_pointer()
+	for key, entry in entries.items():
+		if key[0] == pointer:
+			entry.is_updated = True
+
+
+
+def clear(obj=None):
+	if obj is None:
+		entries.clear()
+	else:
+		key = get_key(obj)
+		if key in entries:
+			del entries[key]
+
+
+
+def get_faces(entry, bm):
+	"""Resolve cached face indices into BMFaces"""
+	bm.faces.ensure_lookup_table()
+	return [[bm.faces[index] for index in island] for island in entry.islands]
+
+
+
+@persistent
+def on_depsgraph_update(scene, depsgraph=None):
+	if depsgraph is None:
+		depsgraph = bpy.context.evaluated_depsgraph_get()
+
+	# Mesh pointers of any update, selection changes included
+	pointers = set()
+	for update in depsgraph.updates:
+		id = update.id.original
+		if isinstance(id, bpy.types.Object) and id.type == 'MESH':
+			pointers.add(id.data.as_pointer())
+		elif isinstance(id, bpy.types.Mesh):
+			pointers.add(id.as_pointer())
+
+	# Entries are checked against their fingerprint on the next lookup, refreshed ones still match
+	for key, entry in entries.items():
+		if key[0] in pointers:
+			entry.is_updated = True
+
+
+
+@persistent
+def on_load(dummy):
+	entries.clear()
+
+
+
+def register():
+	bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update)
+	bpy.app.handlers.load_post.append(on_load)
+
+
+
+def unregister():
+	if on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+		bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update)
+	if on_load in bpy.app.handlers.load_post:
+		bpy.app.handlers.load_post.remove(on_load)
+	entries.clear()
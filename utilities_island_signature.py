@@ -0,0 +1,178 @@
+import bpy
+from collections import defaultdict
+
+
+# Rounds of neighbour label refinement, enough to tell apart islands of equal counts
+iterations = 3
+
+
+
+class Island_signature:
+	"""Topology key of a UV island, islands with the same key have the same face adjacency"""
+	faces = []
+	obj = None
+	countFaces = 0
+	countVerts = 0
+	area = 0
+	labels = {}		# Refined label per face
+	key = None
+
+	def __init__(self, faces, obj=None):
+		self.faces = faces
+		self.obj = obj
+		self.countFaces = len(faces)
+		self.area = sum(face.calc_area() for face in faces)
+
+		# Unique verts in a set, degree histogram of the linked edges and faces
+		verts = {vert for face in faces for vert in face.verts}
+		self.countVerts = len(verts)
+		degrees = defaultdict(int)
+		for vert in verts:
+			degrees[(len(vert.link_edges), len(vert.link_faces))]+= 1
+
+		self.labels = get_face_labels(faces)
+		histogram = defaultdict(int)
+		for label in self.labels.values():
+			histogram[label]+= 1
+
+		self.key = (
+			self.countFaces,
+			self.countVerts,
+			tuple(sorted(degrees.items())),
+			hash(tuple(sorted(histogram.items())))
+		)
+
+
+	def isEqual(self, other):
+		if self.key != other.key:
+			return False
+
+		# area needs to be 70%+ identical
+		if max(self.area, other.area) > 0 and min(self.area, other.area)/max(self.area, other.area) < 0.7:
+			return False
+
+		return True
+
+
+
+def get_face_labels(faces):
+	"""Weisfeiler-Lehman refinement of the face adjacency graph within the island.
+	Starts from the corner count and island degree of each face, then hashes in the sorted labels of the neighbours."""
+	island = set(faces)
+	neighbours = {}
+	for face in faces:
+		neighbours[face] = [other for edge in face.edges for other in edge.link_faces if other != face and other in island]
+
+	labels = {face : hash((len(face.loops), len(neighbours[face]))) for face in faces}
+	for i in range(iterations):
+		labels = {face : hash((labels[face], tuple(sorted(labels[other] for other in neighbours[face])))) for face in faces}
+	return labels
+
+
+
+def get_index(signatures):
+	"""Buckets of signatures by topology key"""
+	buckets = defaultdict(list)
+	for signature in signatures:
+		buckets[signature.key].append(signature)
+	return buckets
+
+
+
+def get_identical_groups(signatures):
+	"""Group signatures of identical islands in O(n): bucket by key, compare areas only within a bucket.
+	Returns lists of signatures, the first of each group is its master."""
+	groups = []
+	for bucket in get_index(signatures).values():
+		unmatched = bucket
+		while unmatched:
+			master = unmatched[0]
+			group = [master]
+			remaining = []
+			for signature in unmatched[1:]:
+				if master.isEqual(signature):
+					group.append(signature)
+				else:
+					remaining.append(signature)
+			groups.append(group)
+			unmatched = remaining
+
+	return groups
+
+
+
+def get_loop_matches(master, other, is_mirror=False):
+	"""Candidate loop correspondences between two islands of the same key, as lists of (loop_master, loop_other).
+	Seeds at the rarest face label and grows across shared edges, one candidate per seed face and corner offset.
+	With is_mirror the reversed winding is tried as well."""
+	counts = defaultdict(int)
+	for label in master.labels.values():
+		counts[label]+= 1
+	seed = min(master.faces, key=lambda face: counts[master.labels[face]])
+	label = master.labels[seed]
+
+	island_a = set(master.faces)
+	island_b = set(other.faces)
+	directions = (1, -1) if is_mirror else (1,)
+	for face in other.faces:
+		if other.labels[face] != label or len(face.loops) != len(seed.loops):
+			continue
+		for direction in directions:
+			for offset in range(len(seed.loops)):
+				matches = grow_loop_matches(master, other, island_a, island_b, seed, face, offset, direction)
+				if matches:
+					yield matches
+
+
+
+def grow_loop_matches(master, other, island_a, island_b, face_a, face_b, offset, direction):
+	"""Match faces from a seed pair, the first loop of face_a maps to loop 'offset' of face_b.
+	Returns None when the topology does not line up."""
+	matched = {face_a : face_b}
+	matched_b = {face_b}
+	matches = []
+	queue = [(face_a, face_b, 0, offset)]
+	while queue:
+		face_a, face_b, index_a, index_b = queue.pop()
+		count = len(face_a.loops)
+		for i in range(count):
+			loop_a = face_a.loops[(index_a + i) % count]
+			loop_b = face_b.loops[(index_b + i * direction) % count]
+			matches.append((loop_a, loop_b))
+
+			# Neighbour across the edge of loop_a, the same edge starts at the previous loop with reversed winding
+			edge_b = loop_b if direction == 1 else loop_b.link_loop_prev
+			next_a = loop_a.link_loop_radial_next.face
+			next_b = edge_b.link_loop_radial_next.face
+			is_linked_a = next_a != face_a and next_a in island_a
+			is_linked_b = next_b != face_b and next_b in island_b
+			if is_linked_a != is_linked_b:
+				return None
+			if not is_linked_a:
+				continue
+
+			if next_a in matched:
+				if matched[next_a] != next_b:
+					return None
+				continue
+			if next_b in matched_b:
+				return None
+			if len(next_a.loops) != len(next_b.loops) or master.labels[next_a] != other.labels[next_b]:
+				return None
+
+			# Align the corners of the neighbours on the shared vertex
+			vert_a = loop_a.vert
+			vert_b = loop_b.vert
+			index_next_a = [loop.vert for loop in next_a.loops].index(vert_a)
+			verts_b = [loop.vert for loop in next_b.loops]
+			if vert_b not in verts_b:
+				return None
+			index_next_b = verts_b.index(vert_b)
+
+			matched[next_a] = next_b
+			matched_b.add(next_b)
+			queue.append((next_a, next_b, index_next_a, index_next_b))
+
+	if len(matched) != len(master.faces):
+		return None
+	return matches
@@ -3,41 +3,38 @@ import bmesh
 import operator
 import time
 import math
+import numpy as np
 from mathutils import Vector
+from bpy.app.handlers import persistent
 
 
 image_material_prefix = "TT_checker_"
 
 
+# Image name per material node tree pointer, see get_node_tree_image()
+node_tree_images = {}
+
+
+
 # Return all faces of selected objects or only selected faces
 def get_selected_object_faces():
+	"""Face indices per object, read from the mesh data without switching modes"""
 	object_faces_indexies = {}
 
-	previous_mode = bpy.context.object.mode
-
 	if bpy.context.object.mode == 'EDIT':
-		# Only selected Mesh faces
-		obj = bpy.context.active_object
-		if obj.type == 'MESH' and obj.data.uv_layers:
-			bm = bmesh.from_edit_mesh(obj.data)
-			bm.faces.ensure_lookup_table()
-			object_faces_indexies[obj] = [face.index for face in bm.faces if face.select]
+		# Only selected Mesh faces of the objects in edit mode
+		for obj in bpy.context.objects_in_mode_unique_data:
+			if obj.type == 'MESH' and obj.data.uv_layers:
+				# Sync BMesh selection to the mesh data
+				obj.update_from_editmode()
+				selection = np.zeros(len(obj.data.polygons), dtype=bool)
+				obj.data.polygons.foreach_get('select', selection)
+				object_faces_indexies[obj] = np.flatnonzero(selection)
 	else:
 		# Selected objects with all faces each
-		selected_objects = [obj for obj in bpy.context.selected_objects]
-		for obj in selected_objects:
+		for obj in bpy.context.selected_objects:
 			if obj.type == 'MESH' and obj.data.uv_layers:
-				bpy.ops.object.mode_set(mode='OBJECT')
-				bpy.ops.object.select_all(action='DESELECT')
-				bpy.context.view_layer.objects.active = obj
-				obj.select_set(True)
-
-				bpy.ops.object.mode_set(mode='EDIT')
-				bm = bmesh.from_edit_mesh(obj.data)
-				bm.faces.ensure_lookup_table()
-				object_faces_indexies[obj] = [face.index for face in bm.faces]
-
-	bpy.ops.object.mode_set(mode=previous_mode)
+				object_faces_indexies[obj] = np.arange(len(obj.data.polygons))
 
 	return object_faces_indexies
 
@@ -45,9 +42,6 @@ def get_selected_object_faces():
 
 def get_object_texture_image(obj):
 
-	previous_mode = bpy.context.active_object.mode
-	bpy.ops.object.mode_set(mode='OBJECT')
-
 	if bpy.context.scene.render.engine == 'BLENDER_RENDER':
 		# Search in UV editor background image
 		if len(obj.data.uv_textures) > 0:
@@ -61,17 +55,16 @@ def get_object_texture_image(obj):
 			if slot_mat.material:
 
 				# Check for traditional texture slots in material
-				for slot_tex in slot_mat.material.texture_slots:
+				for slot_tex in getattr(slot_mat.material, 'texture_slots', []):
 					if slot_tex and slot_tex.texture and hasattr(slot_tex.texture , 'image'):
 						return slot_tex.texture.image
 
 				# Check if material uses Nodes
 				if hasattr(slot_mat.material , 'node_tree'):
 					if slot_mat.material.node_tree:
-						for node in slot_mat.material.node_tree.nodes:
-							if type(node) is bpy.types.ShaderNodeTexImage:
-								if node.image:
-									return node.image
+						image = get_node_tree_image(slot_mat.material.node_tree)
+						if image:
+							return image
 
 	
 
@@ -79,6 +72,62 @@ def get_object_texture_image(obj):
 
 
 
+def get_node_tree_image(node_tree):
+	"""First image texture node of a node tree, cached until node trees change"""
+	key = node_tree.as_pointer()
+	if key in node_tree_images:
+		name = node_tree_images[key]
+		if name is None:
+			return None
+		if name in bpy.data.images:
+			return bpy.data.images[name]
+
+	image = None
+	for node in node_tree.nodes:
+		if type(node) is bpy.types.ShaderNodeTexImage:
+			if node.image:
+				image = node.image
+				break
+
+	node_tree_images[key] = image.name if image else None
+	return image
+
+
+
+@persistent
+def on_depsgraph_update(scene, depsgraph=None):
+	if depsgraph is None:
+		depsgraph = bpy.context.evaluated_depsgraph_get()
+
+	# Any material, node tree or image edit can change the lookup
+	for update in depsgraph.updates:
+		if isinstance(update.id, (bpy.types.Material, bpy.types.NodeTree, bpy.types.Image)):
+			node_tree_images.clear()
+			return
+
+
+
+@persistent
+def on_load(dummy):
+	node_tree_images.clear()
+
+
+
+def register():
+	bpy.app.handlers.depsgraph_update_post.append(on_depsgraph_update)
+	bpy.app.handlers.load_post.append(on_load)
+
+
+
+def unregister():
+	if on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+		bpy.app.handlers.depsgraph_update_post.remove(on_depsgraph_update)
+	if on_load in bpy.app.handlers.load_post:
+		bpy.app.handlers.load_post.remove(on_load)
+	node_tree_images.clear()
+
+
+
 def image_resize(image, size_x, size_y):
 	if image and image.source == 'FILE' or image.source == 'GENERATED':
 		image.generated_width = int(size_x)
@@ -119,6 +168,94 @@ def get_checker_name(mode, size_x, size_y):
 
 
 
+class Texel_density:
+	"""World and texture area of every face from the loop triangles, read in bulk.
+	Density follows the original measure: sum of sqrt(texture area in pixels) over sum of sqrt(world area)."""
+	obj = None
+	size = (0, 0)
+	area_vt = None		# World space area per face
+	area_uv = None		# Texture space area per face in pixels
+
+	def __init__(self, obj, size_x, size_y):
+		self.obj = obj
+		self.size = (size_x, size_y)
+		mesh = obj.data
+
+		if obj.mode == 'EDIT':
+			# Sync BMesh edits to the mesh data, polygon indices match BMesh face indices
+			obj.update_from_editmode()
+		mesh.calc_loop_triangles()
+
+		count_triangles = len(mesh.loop_triangles)
+		triangle_loops = np.empty(count_triangles * 3, dtype=np.int32)
+		mesh.loop_triangles.foreach_get('loops', triangle_loops)
+		triangle_face = np.empty(count_triangles, dtype=np.int32)
+		mesh.loop_triangles.foreach_get('polygon_index', triangle_face)
+
+		loop_vert = np.empty(len(mesh.loops), dtype=np.int32)
+		mesh.loops.foreach_get('vertex_index', loop_vert)
+		verts = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+		mesh.vertices.foreach_get('co', verts)
+		uvs = np.zeros(len(mesh.loops) * 2, dtype=np.float32)
+		if mesh.uv_layers.active:
+			mesh.uv_layers.active.data.foreach_get('uv', uvs)
+
+		# World matrix applied once to all verts
+		matrix = np.array(obj.matrix_world, dtype=np.float64)
+		verts = verts.reshape(-1, 3).astype(np.float64) @ matrix[:3,:3].T + matrix[:3,3]
+
+		# Non square textures are measured in the space of the longer side, see get_area_triangle_uv
+		scale = np.array(self.size, dtype=np.float64) / max(size_x, size_y)
+		uvs = uvs.reshape(-1, 2).astype(np.float64) / scale
+
+		triangle_loops = triangle_loops.reshape(-1, 3)
+		triangles_vt = verts[loop_vert[triangle_loops]]
+		triangles_uv = uvs[triangle_loops]
+
+		cross_vt = np.cross(triangles_vt[:,1] - triangles_vt[:,0], triangles_vt[:,2] - triangles_vt[:,0])
+		area_vt = np.linalg.norm(cross_vt, axis=1) * 0.5
+		edge_b = triangles_uv[:,1] - triangles_uv[:,0]
+		edge_c = triangles_uv[:,2] - triangles_uv[:,0]
+		area_uv = np.abs(edge_b[:,0] * edge_c[:,1] - edge_b[:,1] * edge_c[:,0]) * 0.5 * min(size_x, size_y)**2
+
+		count_faces = len(mesh.polygons)
+		self.area_vt = np.bincount(triangle_face, weights=area_vt, minlength=count_faces)
+		self.area_uv = np.bincount(triangle_face, weights=area_uv, minlength=count_faces)
+
+
+
+	def get_faces(self):
+		"""Density per face, 0 for faces without area"""
+		sum_vt = np.sqrt(self.area_vt)
+		return np.divide(np.sqrt(self.area_uv), sum_vt, out=np.zeros_like(sum_vt), where=sum_vt > 0)
+
+
+
+	def get_sums(self, face_group, count):
+		"""Summed sqrt areas per group, (sum_vt, sum_uv), face_group holds a group index per face or -1"""
+		face_group = np.asarray(face_group)
+		is_group = face_group >= 0
+		sum_vt = np.bincount(face_group[is_group], weights=np.sqrt(self.area_vt[is_group]), minlength=count)
+		sum_uv = np.bincount(face_group[is_group], weights=np.sqrt(self.area_uv[is_group]), minlength=count)
+		return sum_vt, sum_uv
+
+
+
+	def get_groups(self, face_group, count):
+		"""Density per group, e.g. per island from UVMeshView.get_face_islands()"""
+		sum_vt, sum_uv = self.get_sums(face_group, count)
+		return np.divide(sum_uv, sum_vt, out=np.zeros_like(sum_vt), where=(sum_vt > 0) & (sum_uv > 0))
+
+
+
+	def get_object(self, faces=None):
+		"""Density of the whole object or the faces of an index list or mask"""
+		face_group = np.full(len(self.area_vt), -1, dtype=np.int32)
+		face_group[np.arange(len(self.area_vt)) if faces is None else faces] = 0
+		return float(self.get_groups(face_group, 1)[0])
+
+
+
 def get_area_triangle_uv(A,B,C, size_x, size_y):
 	scale_x = size_x / max(size_x, size_y)
 	scale_y = size_y / max(size_x, size_y)
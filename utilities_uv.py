@@ -2,97 +2,138 @@ import bpy
 import bmesh
 import operator
 import time
+import numpy as np
 from mathutils import Vector
 from collections import defaultdict
+from contextlib import contextmanager
 from math import pi
 
 from . import settings
 from . import utilities_ui
+from . import utilities_island_cache
+from . import utilities_uv_view
 
-def selection_store():
-	bm = bmesh.from_edit_mesh(bpy.context.active_object.data);
-	uv_layer = bm.loops.layers.uv.verify();
+class Selection_snapshot:
+	"""Vertex, edge, face and UV loop selection of an object as packed boolean arrays"""
 
-	# https://blender.stackexchange.com/questions/5781/how-to-list-all-selected-elements-in-python
-	# print("selectionStore")
-	settings.selection_uv_mode = bpy.context.scene.tool_settings.uv_select_mode
-	settings.selection_uv_pivot = bpy.context.space_data.pivot_point
-	
-	settings.selection_uv_pivot_pos = bpy.context.space_data.cursor.location.copy()
-
-	#VERT Selection
-	settings.selection_mode = tuple(bpy.context.scene.tool_settings.mesh_select_mode)
-	settings.selection_vert_indexies = []
-	for vert in bm.verts:
-		if vert.select:
-			settings.selection_vert_indexies.append(vert.index)
-
-	settings.selection_face_indexies = []
-	for face in bm.faces:
-		if face.select:
-			settings.selection_face_indexies.append(face.index)
+	def __init__(self, obj):
+		self.obj = obj
+		mesh = obj.data
 
+		# https://blender.stackexchange.com/questions/5781/how-to-list-all-selected-elements-in-python
+		self.uv_mode = bpy.context.scene.tool_settings.uv_select_mode
+		self.mode = tuple(bpy.context.scene.tool_settings.mesh_select_mode)
+		self.uv_pivot = None
+		self.uv_pivot_pos = None
+		if hasattr(bpy.context.space_data, 'pivot_point') and hasattr(bpy.context.space_data, 'cursor'):
+			self.uv_pivot = bpy.context.space_data.pivot_point
+			self.uv_pivot_pos = bpy.context.space_data.cursor.location.copy()
 
-	#Face selections (Loops)
-	settings.selection_uv_loops = []
-	for face in bm.faces:
-		for loop in face.loops:
-			if loop[uv_layer].select:
-				settings.selection_uv_loops.append( [face.index, loop.vert.index] )
+		if obj.mode == 'EDIT':
+			obj.update_from_editmode()
 
+		self.verts = np.zeros(len(mesh.vertices), dtype=bool)
+		mesh.vertices.foreach_get('select', self.verts)
+		self.edges = np.zeros(len(mesh.edges), dtype=bool)
+		mesh.edges.foreach_get('select', self.edges)
+		self.faces = np.zeros(len(mesh.polygons), dtype=bool)
+		mesh.polygons.foreach_get('select', self.faces)
+		self.uvs = np.zeros(len(mesh.loops) if mesh.uv_layers.active else 0, dtype=bool)
+		if mesh.uv_layers.active:
+			mesh.uv_layers.active.data.foreach_get('select', self.uvs)
 
 
-def selection_restore(bm = None, uv_layer = None):
+	def restore(self):
+		obj = self.obj
+		if obj.mode != 'EDIT':
+			bpy.ops.object.mode_set(mode = 'EDIT')
+
+		bpy.context.scene.tool_settings.uv_select_mode = self.uv_mode
+		bpy.context.scene.tool_settings.mesh_select_mode = self.mode
+		if self.uv_pivot and hasattr(bpy.context.space_data, 'pivot_point'):
+			bpy.context.space_data.pivot_point = self.uv_pivot
+			bpy.context.space_data.cursor.location = self.uv_pivot_pos
+
+		# Raw flags in a single pass per element type, no select mode flushing
+		bm = bmesh.from_edit_mesh(obj.data)
+		for vert, select in zip(bm.verts, self.verts.tolist()):
+			vert.select = select
+		for edge, select in zip(bm.edges, self.edges.tolist()):
+			edge.select = select
+		for face, select in zip(bm.faces, self.faces.tolist()):
+			face.select = select
 
-	if bpy.context.object.mode != 'EDIT':
-		bpy.ops.object.mode_set(mode = 'EDIT')
+		if len(self.uvs) > 0:
+			uv_layer = bm.loops.layers.uv.verify()
+			loops = (loop for face in bm.faces for loop in face.loops)
+			for loop, select in zip(loops, self.uvs.tolist()):
+				loop[uv_layer].select = select
 
-	if not bm:
-		bm = bmesh.from_edit_mesh(bpy.context.active_object.data);
-	if not uv_layer:
-		uv_layer = bm.loops.layers.uv.verify();
+		bmesh.update_edit_mesh(obj.data, loop_triangles=False, destructive=False)
 
-	# print("selectionRestore")
-	bpy.context.scene.tool_settings.uv_select_mode = settings.selection_uv_mode
-	bpy.context.space_data.pivot_point = settings.selection_uv_pivot
 
-	contextViewUV = utilities_ui.GetContextViewUV()
-	if contextViewUV:
-		bpy.ops.uv.cursor_set(contextViewUV, location=settings.selection_uv_pivot_pos)
 
+@contextmanager
+def selection_preserved(objects=None):
+	"""Store the selection once and restore it on exit.
+	Nested use, and selection_store/selection_restore calls inside, reuse the outer snapshot."""
+	if settings.selection_depth == 0:
+		selection_snapshots_create(objects)
+	settings.selection_depth+= 1
+	try:
+		yield settings.selection_snapshots
+	finally:
+		settings.selection_depth-= 1
+		if settings.selection_depth == 0:
+			for snapshot in settings.selection_snapshots:
+				snapshot.restore()
 
-	bpy.ops.mesh.select_all(action='DESELECT')
 
-	if hasattr(bm.verts, "ensure_lookup_table"): 
-		bm.verts.ensure_lookup_table()
-		# bm.edges.ensure_lookup_table()
-		bm.faces.ensure_lookup_table()
 
-	#FACE selection
-	bpy.ops.mesh.select_mode(use_extend=False, use_expand=False, type='FACE')
-	for index in settings.selection_face_indexies:
-		if index < len(bm.faces):
-			bm.faces[index].select = True
+def selection_snapshots_create(objects=None):
+	if objects is None:
+		objects = get_edit_objects() or [bpy.context.active_object]
+	settings.selection_snapshots = [Selection_snapshot(obj) for obj in objects]
 
-	#VERT Selection
-	bpy.ops.mesh.select_mode(use_extend=False, use_expand=False, type='VERT')
-	for index in settings.selection_vert_indexies:
-		if index < len(bm.verts):
-			bm.verts[index].select = True
 
-	#Selection Mode
-	bpy.context.scene.tool_settings.mesh_select_mode = settings.selection_mode
 
+def selection_store(objects=None):
+	if settings.selection_depth > 0:
+		return
+	selection_snapshots_create(objects)
 
-	#UV Face-UV Selections (Loops)
-	bpy.ops.uv.select_all(contextViewUV, action='DESELECT')
-	for uv_set in settings.selection_uv_loops:
-		for loop in bm.faces[ uv_set[0] ].loops:
-			if loop.vert.index == uv_set[1]:
-				loop[uv_layer].select = True
-				break
 
-	bpy.context.scene.update()
+
+def selection_restore(bm = None, uv_layer = None):
+	if settings.selection_depth > 0:
+		return
+	for snapshot in settings.selection_snapshots:
+		snapshot.restore()
+
+
+
+def get_edit_objects():
+	"""Mesh objects with UV maps in (multi object) edit mode, the active object first"""
+	objects = [obj for obj in bpy.context.objects_in_mode_unique_data if obj.type == 'MESH' and obj.data.uv_layers]
+	if bpy.context.active_object in objects:
+		objects.remove(bpy.context.active_object)
+		objects.insert(0, bpy.context.active_object)
+	return objects
+
+
+
+def get_edit_islands(objects=None):
+	"""Selected UV islands of every object in edit mode as (obj, islands, view) tuples.
+	Each object reads its BMesh, islands and UV arrays once."""
+	if objects is None:
+		objects = get_edit_objects()
+	result = []
+	for obj in objects:
+		bm = bmesh.from_edit_mesh(obj.data)
+		uv_layer = bm.loops.layers.uv.verify()
+		islands = getSelectionIslands(bm, uv_layer, obj)
+		result.append((obj, islands, utilities_uv_view.UVMeshView(obj)))
+	return result
 
 
 
@@ -192,95 +233,105 @@ def get_uv_to_vert(bm, uv_layer):
 
 
 
-def getSelectionBBox():
-	bm = bmesh.from_edit_mesh(bpy.context.active_object.data);
-	uv_layer = bm.loops.layers.uv.verify();
-	
-	bbox = {}
-	
-	boundsMin = Vector((99999999.0,99999999.0))
-	boundsMax = Vector((-99999999.0,-99999999.0))
-	boundsCenter = Vector((0.0,0.0))
-	countFaces = 0;
-	
-	for face in bm.faces:
-		if face.select:
-			for loop in face.loops:
-				if loop[uv_layer].select is True:
-					uv = loop[uv_layer].uv
-					boundsMin.x = min(boundsMin.x, uv.x)
-					boundsMin.y = min(boundsMin.y, uv.y)
-					boundsMax.x = max(boundsMax.x, uv.x)
-					boundsMax.y = max(boundsMax.y, uv.y)
-			
-					boundsCenter+= uv
-					countFaces+=1
-	
-	bbox['min'] = boundsMin
-	bbox['max'] = boundsMax
-	bbox['width'] = (boundsMax - boundsMin).x
-	bbox['height'] = (boundsMax - boundsMin).y
-	
-	if countFaces == 0:
-		bbox['center'] = boundsMin
-	else:
-		bbox['center'] = boundsCenter / countFaces
+def getSelectionBBox(objects=None):
+	# Bulk read of the UV layer instead of walking faces and loops in Python
+	if objects is None:
+		return utilities_uv_view.UVMeshView(bpy.context.active_object).get_bbox()
+	# Combined bounds frame of several objects
+	return utilities_uv_view.get_bbox_views([utilities_uv_view.UVMeshView(obj) for obj in objects])
+
 
-	bbox['area'] = bbox['width'] * bbox['height']
-	bbox['minLength'] = min(bbox['width'], bbox['height'])
-				
-	return bbox;
 
+def get_islands(bm, uv_layer, faces=None, tolerance=0.00001):
+	"""Returns UV islands as lists of faces, grouped in a single pass over the face loops.
+	Two faces belong to the same island when they share an edge and both edge loops agree on their UV coordinates."""
+	if faces is None:
+		faces = bm.faces
 
+	faces = list(faces)
+	face_to_index = {face:i for i, face in enumerate(faces)}
 
-def getSelectionIslands(bm=None, uv_layer=None):
+	# Union-find over face positions
+	parent = list(range(len(faces)))
+	size = [1]*len(faces)
+
+	def find(i):
+		while parent[i] != i:
+			parent[i] = parent[parent[i]]
+			i = parent[i]
+		return i
+
+	for i, face in enumerate(faces):
+		for loop in face.loops:
+			loop_other = loop.link_loop_radial_next
+			if loop_other == loop:
+				continue
+
+			j = face_to_index.get(loop_other.face)
+			if j is None or j == i:
+				continue
+
+			root_i = find(i)
+			root_j = find(j)
+			if root_i == root_j:
+				continue
+
+			# Match both ends of the shared edge, the other loop can run in either direction
+			if loop_other.vert == loop.vert:
+				pairs = ((loop, loop_other), (loop.link_loop_next, loop_other.link_loop_next))
+			else:
+				pairs = ((loop, loop_other.link_loop_next), (loop.link_loop_next, loop_other))
+
+			is_connected = True
+			for loop_a, loop_b in pairs:
+				uv_a = loop_a[uv_layer].uv
+				uv_b = loop_b[uv_layer].uv
+				if abs(uv_a.x - uv_b.x) > tolerance or abs(uv_a.y - uv_b.y) > tolerance:
+					is_connected = False
+					break
+
+			if is_connected:
+				if size[root_i] < size[root_j]:
+					root_i, root_j = root_j, root_i
+				parent[root_j] = root_i
+				size[root_i]+= size[root_j]
+
+	# Collect faces per root, in order of first appearance
+	islands = {}
+	for i, face in enumerate(faces):
+		root = find(i)
+		if root not in islands:
+			islands[root] = [face]
+		else:
+			islands[root].append(face)
+
+	return list(islands.values())
+
+
+
+def getSelectionIslands(bm=None, uv_layer=None, obj=None):
+	if obj == None:
+		obj = bpy.context.active_object
 	if bm == None:
-		bm = bmesh.from_edit_mesh(bpy.context.active_object.data)
+		bm = bmesh.from_edit_mesh(obj.data)
 		uv_layer = bm.loops.layers.uv.verify()
 
 	#Reference A: https://github.com/nutti/Magic-UV/issues/41
 	#Reference B: https://github.com/c30ra/uv-align-distribute/blob/v2.2/make_island.py
 
-	#Extend selection
+	# Only faces visible in the UV editor take part, reuse cached islands while the mesh is unchanged
+	bm.faces.index_update()
+	entry = utilities_island_cache.get(obj)
+	if entry:
+		islands = utilities_island_cache.get_faces(entry, bm)
+	else:
+		faces_visible = [face for face in bm.faces if face.select]
+		islands = get_islands(bm, uv_layer, faces_visible)
+		utilities_island_cache.store(obj, islands)
+
+	# Without sync keep islands that are linked to a UV selection, same as 'uv.select_linked'
 	if bpy.context.scene.tool_settings.use_uv_select_sync == False:
-		bpy.ops.uv.select_linked()#extend=False)
- 
-	#Collect selected UV faces
-	faces_selected = [];
-	for face in bm.faces:
-		if face.select and face.loops[0][uv_layer].select:
-			faces_selected.append(face)
-		
-	#Collect UV islands
-	# faces_parsed = []
-	faces_unparsed = faces_selected.copy()
-	islands = []
-
-	for face in faces_selected:
-		if face in faces_unparsed:
-
-			#Select single face
-			bpy.ops.uv.select_all(action='DESELECT')
-			face.loops[0][uv_layer].select = True;
-			bpy.ops.uv.select_linked()#extend=False)#Extend selection
-			
-			#Collect faces
-			islandFaces = [face];
-			for faceAll in faces_unparsed:
-				if faceAll != face and faceAll.select and faceAll.loops[0][uv_layer].select:
-					islandFaces.append(faceAll)
-			
-			for faceAll in islandFaces:
-				faces_unparsed.remove(faceAll)
-
-			#Assign Faces to island
-			islands.append(islandFaces)
-	
-	#Restore selection 
-	# for face in faces_selected:
-	# 	for loop in face.loops:
-	# 		loop[uv_layer].select = True
-
-	
+		islands = [island for island in islands if any(loop[uv_layer].select for face in island for loop in face.loops)]
+
 	print("Islands: {}x".format(len(islands)))
 	return islands
@@ -0,0 +1,395 @@
+import numpy as np
+
+
+
+def get_convex_hull(points):
+	"""2D convex hull with Andrew's monotone chain in O(n log n), counter clockwise without repeated end point"""
+	points = np.unique(np.asarray(points, dtype=np.float64), axis=0)	# Sorted by x, then y
+	if len(points) < 3:
+		return points
+
+	def cross(o, a, b):
+		return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+	points = points.tolist()
+	lower = []
+	for p in points:
+		while len(lower) >= 2 and cross(lower[-2], lower[-1], p) <= 0:
+			lower.pop()
+		lower.append(p)
+
+	upper = []
+	for p in reversed(points):
+		while len(upper) >= 2 and cross(upper[-2], upper[-1], p) <= 0:
+			upper.pop()
+		upper.append(p)
+
+	return np.array(lower[:-1] + upper[:-1])
+
+
+
+def get_min_area_rect(points):
+	"""Exact minimum area bounding rectangle with rotating calipers in O(h) over the convex hull.
+	One side of the optimal rectangle is collinear with a hull edge, the extreme points of the
+	other three sides only ever advance while walking the edges.
+	Returns (angle, width, height): rotating the points by angle aligns the rectangle with the UV axes."""
+	hull = get_convex_hull(points)
+	if len(hull) < 2:
+		return 0.0, 0.0, 0.0
+	if len(hull) == 2:
+		# Collinear points, the rectangle runs along their direction
+		edge = hull[1] - hull[0]
+		return get_rect_at(hull, [get_angle_folded(np.arctan2(edge[1], edge[0]))])
+
+	hull_list = hull.tolist()
+	count = len(hull_list)
+
+	def dot(index, direction):
+		point = hull_list[index % count]
+		return point[0] * direction[0] + point[1] * direction[1]
+
+	angles = []
+	areas = []
+	right = top = left = None
+	for i in range(count):
+		x0, y0 = hull_list[i]
+		x1, y1 = hull_list[(i + 1) % count]
+		length = np.hypot(x1 - x0, y1 - y0)
+		u = ((x1 - x0) / length, (y1 - y0) / length)
+		v = (-u[1], u[0])	# Inwards on a counter clockwise hull
+
+		if right is None:
+			right = max(range(count), key=lambda k: dot(k, u))
+			top = max(range(count), key=lambda k: dot(k, v))
+			left = min(range(count), key=lambda k: dot(k, u))
+		else:
+			for step in range(count):
+				if dot(right + 1, u) <= dot(right, u):
+					break
+				right+= 1
+			for step in range(count):
+				if dot(top + 1, v) <= dot(top, v):
+					break
+				top+= 1
+			for step in range(count):
+				if dot(left + 1, u) >= dot(left, u):
+					break
+				left+= 1
+
+		width = dot(right, u) - dot(left, u)
+		height = dot(top, v) - dot(i, v)
+		angles.append(np.arctan2(u[1], u[0]))
+		areas.append(width * height)
+
+	# Prefer the current orientation, then the smallest rotation among equal areas
+	angles = [get_angle_folded(angle) for angle in angles]
+	size = hull.max(axis=0) - hull.min(axis=0)
+	angles.insert(0, 0.0)
+	areas.insert(0, size[0] * size[1])
+	return get_rect_at(hull, angles, areas)
+
+
+
+def get_angle_folded(angle):
+	"""Edge angle folded into [-45°, 45°), the remaining quarter turns give the same rectangle"""
+	return (angle + np.pi/4) % (np.pi/2) - np.pi/4
+
+
+
+def get_rect_at(hull, angles, areas=None):
+	"""Best of the candidate angles by area as (angle, width, height), without areas the first one"""
+	angles = np.asarray(angles, dtype=np.float64)
+	best = 0
+	if areas is not None:
+		areas = np.asarray(areas, dtype=np.float64)
+		candidates = np.flatnonzero(areas <= areas.min() * (1 + 1e-6))
+		best = candidates[np.argmin(np.abs(angles[candidates]))]
+
+	cos = np.cos(-angles[best])
+	sin = np.sin(-angles[best])
+	x = cos * hull[:,0] - sin * hull[:,1]
+	y = sin * hull[:,0] + cos * hull[:,1]
+	return float(-angles[best]), float(x.max() - x.min()), float(y.max() - y.min())
+
+
+
+def get_clusters(points, distance=0.0000001):
+	"""Cluster coincident points in linear time with a spatial hash grid of cell size 'distance'.
+	Each point joins the first cluster whose seed lies within distance, only the 3x3 neighbour cells are searched.
+	Returns (cluster index per point, cluster count)"""
+	points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+	if len(points) == 0:
+		return np.zeros(0, dtype=np.int64), 0
+
+	# Exact duplicates are the common case (loops of one UV vertex), hash those once
+	points, inverse = np.unique(points, axis=0, return_inverse=True)
+	cells = np.floor(points / distance).astype(np.int64).tolist()
+	points = points.tolist()
+
+	distance_sq = distance * distance
+	grid = {}	# Cell to seed cluster indices
+	seeds = []
+	ids = []
+	for point, cell in zip(points, cells):
+		x, y = point
+		cx, cy = cell
+
+		match = -1
+		for dx in (-1, 0, 1):
+			for dy in (-1, 0, 1):
+				for id in grid.get((cx+dx, cy+dy), ()):
+					if match != -1 and id > match:
+						continue
+					sx, sy = seeds[id]
+					if (x-sx)*(x-sx) + (y-sy)*(y-sy) <= distance_sq:
+						match = id
+
+		if match == -1:
+			match = len(seeds)
+			seeds.append(point)
+			grid.setdefault((cx, cy), []).append(match)
+		ids.append(match)
+
+	ids = np.array(ids, dtype=np.int64)[inverse.reshape(-1)]
+
+	# Number clusters in order of first appearance
+	first = np.full(len(seeds), len(ids), dtype=np.int64)
+	np.minimum.at(first, ids, np.arange(len(ids)))
+	remap = np.empty(len(seeds), dtype=np.int64)
+	remap[np.argsort(first)] = np.arange(len(seeds))
+	return remap[ids], len(seeds)
+
+
+
+def get_bounds_pairs(bounds_min, bounds_max, epsilon=0.000001, chunk=65536):
+	"""Sweep and prune of axis aligned boxes along U, (n,2) arrays of min and max corners.
+	Returns (k,2) index pairs i < j whose boxes overlap by more than epsilon, touching boxes do not count."""
+	bounds_min = np.asarray(bounds_min, dtype=np.float64).reshape(-1, 2)
+	bounds_max = np.asarray(bounds_max, dtype=np.float64).reshape(-1, 2)
+	count = len(bounds_min)
+	if count < 2:
+		return np.zeros((0, 2), dtype=np.int64)
+
+	# Each box only needs to be tested against the following boxes that start before it ends
+	order = np.argsort(bounds_min[:,0], kind='stable')
+	starts = bounds_min[order,0]
+	ends = np.searchsorted(starts, bounds_max[order,0] - epsilon, side='left')
+	pairs = [np.zeros((0, 2), dtype=np.int64)]
+	for left, right in get_pairs_ranges(np.arange(count) + 1, np.maximum(ends, np.arange(count) + 1), chunk):
+		a = order[left]
+		b = order[right]
+		overlap = np.minimum(bounds_max[a], bounds_max[b]) - np.maximum(bounds_min[a], bounds_min[b])
+		keep = np.all(overlap > epsilon, axis=1)
+		pairs.append(np.stack((np.minimum(a, b), np.maximum(a, b)), axis=1)[keep])
+	return np.concatenate(pairs)
+
+
+
+def get_pairs_ranges(starts, ends, chunk=65536):
+	"""Flat index pairs (i, j) for every i and each j in range(starts[i], ends[i]).
+	Yields (left, right) arrays of at most chunk pairs, dense ranges never allocate all their pairs at once."""
+	starts = np.asarray(starts, dtype=np.int64)
+	counts = np.maximum(np.asarray(ends, dtype=np.int64) - starts, 0)
+	offsets = np.cumsum(counts)
+	total = int(offsets[-1]) if len(offsets) > 0 else 0
+	for start in range(0, total, chunk):
+		flat = np.arange(start, min(start + chunk, total), dtype=np.int64)
+		left = np.searchsorted(offsets, flat, side='right')
+		right = flat - (offsets[left] - counts[left]) + starts[left]
+		yield left, right
+
+
+
+def get_grid_pairs(boxes_min, boxes_max, epsilon=0.000001, chunk=65536, groups=None):
+	"""Pairs of boxes that share a cell of a uniform grid, yields chunks of two index arrays.
+	Each pair is reported once, in the first cell both boxes cover.
+	With groups, an index per box, only boxes of the same group pair up.
+	The cell size is the average box size but at most 1024 cells per side."""
+	extent = boxes_max.max(axis=0) - boxes_min.min(axis=0)
+	cell = max(float((boxes_max - boxes_min).max(axis=1).mean()), float(extent.max()) / 1024, epsilon)
+	origin = boxes_min.min(axis=0)
+	cell_min = np.floor((boxes_min - origin) / cell).astype(np.int64)
+	cell_max = np.floor((boxes_max - origin) / cell).astype(np.int64)
+
+	# One entry per covered cell of each box
+	span = cell_max - cell_min + 1
+	counts = span[:,0] * span[:,1]
+	entry = np.repeat(np.arange(len(boxes_min)), counts)
+	local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+	cell_x = cell_min[entry,0] + local % span[entry,0]
+	cell_y = cell_min[entry,1] + local // span[entry,0]
+	count_y = int(cell_max[:,1].max()) + 1
+	cell_keys = cell_x * count_y + cell_y
+	if groups is not None:
+		# Every group gets its own cells
+		count_cells = (int(cell_max[:,0].max()) + 1) * count_y
+		cell_keys+= np.asarray(groups, dtype=np.int64)[entry] * count_cells
+
+	for left, right in get_bucket_pairs(cell_keys, chunk):
+		a = entry[left]
+		b = entry[right]
+		# Boxes sharing several cells only count in the lowest shared one
+		keep = (cell_x[left] == np.maximum(cell_min[a,0], cell_min[b,0])) & (cell_y[left] == np.maximum(cell_min[a,1], cell_min[b,1]))
+		yield a[keep], b[keep]
+
+
+
+def get_bucket_pairs(keys, chunk=65536):
+	"""Pairs of positions in keys with the same key, yields chunks of two index arrays"""
+	order = np.argsort(keys, kind='stable')
+	end = np.searchsorted(keys[order], keys[order], side='right')
+	for left, right in get_pairs_ranges(np.arange(len(keys)) + 1, end, chunk):
+		yield order[left], order[right]
+
+
+
+def get_raster_pairs(triangles, resolution=1024, chunk=65536, groups=None):
+	"""Pairs of triangles that cover the same pixel center of a resolution x resolution raster over 0-1 UV space,
+	yields chunks of two index arrays. Work grows with the covered pixels, not the triangle count.
+	With groups, an index per triangle, only triangles of the same group pair up."""
+	triangles = np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 2) * resolution - 0.5
+	pixel_min = np.ceil(triangles.min(axis=1)).astype(np.int64)
+	pixel_max = np.floor(triangles.max(axis=1)).astype(np.int64)
+	span = np.maximum(pixel_max - pixel_min + 1, 0)
+	counts = span[:,0] * span[:,1]
+
+	# Candidate pixel centers per triangle bounds
+	entry = np.repeat(np.arange(len(triangles)), counts)
+	local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+	x = pixel_min[entry,0] + local % np.maximum(span[entry,0], 1)
+	y = pixel_min[entry,1] + local // np.maximum(span[entry,0], 1)
+
+	# Keep centers inside the triangle, edge functions of either winding
+	a = triangles[entry,0]
+	b = triangles[entry,1]
+	c = triangles[entry,2]
+	def side(p0, p1):
+		return (p1[:,0] - p0[:,0]) * (y - p0[:,1]) - (p1[:,1] - p0[:,1]) * (x - p0[:,0])
+	sides = np.stack((side(a, b), side(b, c), side(c, a)), axis=1)
+	inside = np.all(sides >= 0, axis=1) | np.all(sides <= 0, axis=1)
+
+	# Wrap into the raster so tiles outside 0-1 still compare
+	keys = (x[inside] % resolution) * resolution + (y[inside] % resolution)
+	entry = entry[inside]
+	if groups is not None:
+		keys+= np.asarray(groups, dtype=np.int64)[entry] * (resolution * resolution)
+	for left, right in get_bucket_pairs(keys, chunk):
+		yield entry[left], entry[right]
+
+
+
+def get_triangles_overlap(triangles_a, triangles_b, epsilon=0.000001):
+	"""Exact 2D triangle triangle intersection with the separating axis theorem, (n,3,2) arrays compared row by row.
+	Triangles that only share an edge or a corner, or overlap by less than epsilon, do not intersect."""
+	triangles_a = np.asarray(triangles_a, dtype=np.float64)
+	triangles_b = np.asarray(triangles_b, dtype=np.float64)
+
+	# Edge normals of both triangles are the only candidate separating axes
+	edges = np.concatenate((
+		np.roll(triangles_a, -1, axis=1) - triangles_a,
+		np.roll(triangles_b, -1, axis=1) - triangles_b
+	), axis=1)
+	axes = np.stack((-edges[:,:,1], edges[:,:,0]), axis=2)
+	length = np.linalg.norm(axes, axis=2, keepdims=True)
+	axes = np.divide(axes, length, out=np.zeros_like(axes), where=length > 0)
+
+	projection_a = np.einsum('nai,nvi->nav', axes, triangles_a)
+	projection_b = np.einsum('nai,nvi->nav', axes, triangles_b)
+	overlap = np.minimum(projection_a.max(axis=2), projection_b.max(axis=2)) - np.maximum(projection_a.min(axis=2), projection_b.min(axis=2))
+
+	# Degenerate edges give a zero axis, which separates as zero area triangles never overlap
+	return np.all(overlap > epsilon, axis=1)
+
+
+
+def get_island_overlaps(triangles, triangle_island, bounds_min, bounds_max, epsilon=0.000001, chunk=65536):
+	"""Pairs of islands whose UV triangles truly intersect.
+	triangles (n,3,2) with the island index of each triangle, island bounds as (m,2) min and max corners.
+	Candidate island pairs come from sweep and prune, candidate triangle pairs from a uniform grid of the triangles.
+	Returns (k,2) island index pairs i < j"""
+	triangles = np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 2)
+	triangle_island = np.asarray(triangle_island, dtype=np.int64)
+	count_islands = len(bounds_min)
+
+	candidates = get_bounds_pairs(bounds_min, bounds_max, epsilon, chunk)
+	if len(candidates) == 0 or len(triangles) == 0:
+		return np.zeros((0, 2), dtype=np.int64)
+	candidate_keys = candidates[:,0] * count_islands + candidates[:,1]
+
+	# Only triangles of islands in a candidate pair take part
+	relevant = np.zeros(count_islands, dtype=bool)
+	relevant[candidates.ravel()] = True
+	indices = np.flatnonzero(relevant[triangle_island])
+	triangles_min = triangles[indices].min(axis=1)
+	triangles_max = triangles[indices].max(axis=1)
+
+	# Exact tests chunk by chunk, skip island pairs that are already confirmed
+	overlaps = set()
+	for left, right in get_grid_pairs(triangles_min, triangles_max, epsilon, chunk):
+		a = indices[left]
+		b = indices[right]
+		island_a = np.minimum(triangle_island[a], triangle_island[b])
+		island_b = np.maximum(triangle_island[a], triangle_island[b])
+
+		keys = island_a * count_islands + island_b
+		keep = (island_a != island_b) & np.isin(keys, candidate_keys)
+		if overlaps:
+			keep&= ~np.isin(keys, np.fromiter(overlaps, dtype=np.int64, count=len(overlaps)))
+		hits = get_triangles_overlap(triangles[a[keep]], triangles[b[keep]], epsilon)
+		overlaps.update(keys[keep][hits].tolist())
+
+	keys = np.array(sorted(overlaps), dtype=np.int64)
+	return np.stack((keys // count_islands, keys % count_islands), axis=1)
+
+
+
+def get_rigid_transform(source, target, is_mirror=False):
+	"""Best rotation and translation of the source points onto the target points in the least squares sense (Kabsch).
+	With is_mirror a reflection is allowed as well. Returns (matrix, pivot, offset, error) for
+	matrix @ (p - pivot) + pivot + offset, see UVMeshView.transform(), and the mean squared distance."""
+	source = np.asarray(source, dtype=np.float64).reshape(-1, 2)
+	target = np.asarray(target, dtype=np.float64).reshape(-1, 2)
+	center_source = source.mean(axis=0)
+	center_target = target.mean(axis=0)
+
+	u, s, vt = np.linalg.svd((source - center_source).T @ (target - center_target))
+	matrix = vt.T @ u.T
+	if not is_mirror and np.linalg.det(matrix) < 0:
+		vt[-1]*= -1
+		matrix = vt.T @ u.T
+
+	moved = (source - center_source) @ matrix.T + center_target
+	error = float(np.mean(np.sum((moved - target)**2, axis=1)))
+	return matrix, center_source, center_target - center_source, error
+
+
+
+def get_self_overlaps(triangles, triangle_face, triangle_island, method='GRID', resolution=1024, epsilon=0.000001, chunk=65536):
+	"""Faces that overlap other faces of their own island, e.g. islands that fold over themselves.
+	triangles (n,3,2) with the face and island index of each triangle.
+	Candidate triangle pairs come from a uniform grid ('GRID') or a coverage raster ('RASTER'), confirmed by exact tests.
+	Returns the unique face indices"""
+	triangles = np.asarray(triangles, dtype=np.float64).reshape(-1, 3, 2)
+	triangle_face = np.asarray(triangle_face, dtype=np.int64)
+	triangle_island = np.asarray(triangle_island, dtype=np.int64)
+	if len(triangles) < 2:
+		return np.zeros(0, dtype=np.int64)
+
+	# Islands key their own cells, triangles of stacked islands never pair up
+	if method == 'RASTER':
+		candidates = get_raster_pairs(triangles, resolution, chunk, triangle_island)
+	else:
+		candidates = get_grid_pairs(triangles.min(axis=1), triangles.max(axis=1), epsilon, chunk, triangle_island)
+
+	faces = []
+	for a, b in candidates:
+		# Triangles of different faces, raster pairs repeat per shared pixel
+		keep = triangle_face[a] != triangle_face[b]
+		pairs = np.stack((np.minimum(a, b), np.maximum(a, b)), axis=1)[keep]
+		pairs = np.unique(pairs, axis=0)
+		hits = get_triangles_overlap(triangles[pairs[:,0]], triangles[pairs[:,1]], epsilon)
+		faces.append(triangle_face[pairs[hits].ravel()])
+
+	if len(faces) == 0:
+		return np.zeros(0, dtype=np.int64)
+	return np.unique(np.concatenate(faces))
@@ -0,0 +1,333 @@
+import bpy
+import bmesh
+import numpy as np
+from mathutils import Vector
+
+from . import utilities_island_cache
+
+
+
+class UVMeshView:
+	"""Snapshot of the active UV layer as contiguous NumPy arrays, indexed by mesh loop.
+	Read in bulk with foreach_get, modify 'uvs' in place and call write() once."""
+
+	def __init__(self, obj):
+		self.obj = obj
+		self.mesh = obj.data
+		self.is_edit = obj.mode == 'EDIT'
+
+		if self.is_edit:
+			# Sync BMesh edits to the mesh data, loops are ordered by BMesh face order
+			obj.update_from_editmode()
+
+		mesh = self.mesh
+		count_loops = len(mesh.loops)
+		count_faces = len(mesh.polygons)
+		uv_layer = mesh.uv_layers.active
+
+		self.uvs = np.zeros((count_loops, 2), dtype=np.float32)
+		self.uv_select = np.zeros(count_loops, dtype=bool)
+		if uv_layer:
+			uv_layer.data.foreach_get('uv', self.uvs.ravel())
+			uv_layer.data.foreach_get('select', self.uv_select)
+		self.uvs_read = self.uvs.copy()
+
+		self.loop_vert = np.empty(count_loops, dtype=np.int32)
+		mesh.loops.foreach_get('vertex_index', self.loop_vert)
+		self.loop_edge = np.empty(count_loops, dtype=np.int32)
+		mesh.loops.foreach_get('edge_index', self.loop_edge)
+
+		self.face_start = np.empty(count_faces, dtype=np.int32)
+		mesh.polygons.foreach_get('loop_start', self.face_start)
+		self.face_total = np.empty(count_faces, dtype=np.int32)
+		mesh.polygons.foreach_get('loop_total', self.face_total)
+		self.face_select = np.zeros(count_faces, dtype=bool)
+		mesh.polygons.foreach_get('select', self.face_select)
+
+		self.loop_face = np.repeat(np.arange(count_faces, dtype=np.int32), self.face_total)
+
+		# Edit mode BMLoops in mesh loop order, see get_bmesh_loops()
+		self.bm = None
+		self.bm_loops = None
+
+
+
+	def get_selected_loops(self):
+		"""Mask of loops selected in the UV editor, same rules as utilities_uv.get_selected_uvs"""
+		return self.face_select[self.loop_face] & self.uv_select
+
+
+
+	def get_loop_next(self):
+		"""Index of the next loop within the same face"""
+		index = np.arange(len(self.loop_face), dtype=np.int32)
+		index_next = index + 1
+		face_end = self.face_start + self.face_total
+		index_next[face_end - 1] = self.face_start
+		return index_next
+
+
+
+	def get_loop_triangles(self):
+		"""Triangulation of the faces as (n,3) loop indices and the face index of each triangle"""
+		mesh = self.mesh
+		mesh.calc_loop_triangles()
+		count = len(mesh.loop_triangles)
+		triangles = np.empty(count * 3, dtype=np.int32)
+		mesh.loop_triangles.foreach_get('loops', triangles)
+		triangle_face = np.empty(count, dtype=np.int32)
+		mesh.loop_triangles.foreach_get('polygon_index', triangle_face)
+		return triangles.reshape(-1, 3), triangle_face
+
+
+
+	def get_bbox(self, mask=None):
+		"""Bounds of the masked loop UVs, same dict layout as utilities_uv.getSelectionBBox"""
+		if mask is None:
+			mask = self.get_selected_loops()
+		return get_bbox_uvs(self.uvs[mask])
+
+
+
+	def get_face_islands(self, islands):
+		"""Island index per face from lists of BMFaces, -1 for faces outside any island"""
+		face_island = np.full(len(self.face_start), -1, dtype=np.int32)
+		for i in range(len(islands)):
+			face_island[[face.index for face in islands[i]]] = i
+		return face_island
+
+
+
+	def get_loop_islands(self, islands):
+		"""Island index per loop from lists of BMFaces, -1 for loops outside any island"""
+		return self.get_face_islands(islands)[self.loop_face]
+
+
+
+	def get_island_bounds(self, islands):
+		"""Bounds of all islands with one segmented reduction over the loop UVs.
+		Returns a dict of arrays with one row per island: min, max, center, width, height and area."""
+		count = len(islands)
+		loop_island = self.get_loop_islands(islands)
+
+		# Group loops per island, reduce each contiguous segment
+		order = np.argsort(loop_island, kind='stable')
+		order = order[loop_island[order] >= 0]
+		ids = loop_island[order]
+		uvs = self.uvs[order].astype(np.float64)
+
+		bounds = {
+			'min' : np.zeros((count, 2)),
+			'max' : np.zeros((count, 2)),
+			'center' : np.zeros((count, 2))
+		}
+		if len(ids) > 0:
+			starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+			present = ids[starts]
+			counts = np.diff(np.r_[starts, len(ids)])
+			bounds['min'][present] = np.minimum.reduceat(uvs, starts, axis=0)
+			bounds['max'][present] = np.maximum.reduceat(uvs, starts, axis=0)
+			bounds['center'][present] = np.add.reduceat(uvs, starts, axis=0) / counts[:,None]
+
+		size = bounds['max'] - bounds['min']
+		bounds['width'] = size[:,0]
+		bounds['height'] = size[:,1]
+		bounds['area'] = size[:,0] * size[:,1]
+		return bounds
+
+
+
+	def get_island_loops(self, islands):
+		"""Loop indices split per island with one sort, one index array per island"""
+		loop_island = self.get_loop_islands(islands)
+		order = np.argsort(loop_island, kind='stable')
+		order = order[loop_island[order] >= 0]
+		counts = np.bincount(loop_island[order], minlength=len(islands))
+		return np.split(order, np.cumsum(counts)[:-1])
+
+
+
+	def get_island_uvs(self, islands):
+		"""Loop UVs split per island, one (n,2) array per island"""
+		return [self.uvs[loops].astype(np.float64) for loops in self.get_island_loops(islands)]
+
+
+
+	def get_island_bboxes(self, islands):
+		"""Per island bounds as a list of dicts, same layout as utilities_uv.getSelectionBBox"""
+		bounds = self.get_island_bounds(islands)
+		bboxes = []
+		for i in range(len(islands)):
+			bbox = {}
+			bbox['min'] = Vector(bounds['min'][i])
+			bbox['max'] = Vector(bounds['max'][i])
+			bbox['center'] = Vector(bounds['center'][i])
+			bbox['width'] = float(bounds['width'][i])
+			bbox['height'] = float(bounds['height'][i])
+			bbox['area'] = float(bounds['area'][i])
+			bbox['minLength'] = min(bbox['width'], bbox['height'])
+			bboxes.append(bbox)
+		return bboxes
+
+
+
+	def get_face_areas_signed(self):
+		"""Signed UV area per face with the shoelace formula, negative when the face is flipped"""
+		uvs = self.uvs.astype(np.float64)
+		uvs_next = uvs[self.get_loop_next()]
+		cross = uvs[:,0] * uvs_next[:,1] - uvs_next[:,0] * uvs[:,1]
+		if len(cross) == 0:
+			return np.zeros(len(self.face_start))
+		return np.add.reduceat(cross, self.face_start) * 0.5
+
+
+
+	def get_boundary_edges(self, faces=None, tolerance=0.00001):
+		"""Indices of mesh edges on a UV island border, without seams or operators.
+		An edge is a border when it has a single face or its loops disagree on the UV coordinates of its verts.
+		Optional faces is a boolean mask of the faces taking part."""
+		loop_next = self.get_loop_next()
+		loops = np.arange(len(self.loop_face))
+		if faces is not None:
+			loops = loops[np.asarray(faces, dtype=bool)[self.loop_face]]
+		if len(loops) == 0:
+			return np.zeros(0, dtype=np.int32)
+
+		# UVs of both edge ends, ordered by vertex index so loops of either winding compare equal
+		uv_a = self.uvs[loops]
+		uv_b = self.uvs[loop_next[loops]]
+		is_swapped = self.loop_vert[loops] > self.loop_vert[loop_next[loops]]
+		uv_low = np.where(is_swapped[:,None], uv_b, uv_a)
+		uv_high = np.where(is_swapped[:,None], uv_a, uv_b)
+
+		# Compare every loop of an edge with the first loop of that edge
+		edges = self.loop_edge[loops]
+		order = np.argsort(edges, kind='stable')
+		edges = edges[order]
+		uv_low = uv_low[order]
+		uv_high = uv_high[order]
+		first = np.searchsorted(edges, edges, side='left')
+		is_split = np.any(np.abs(uv_low - uv_low[first]) > tolerance, axis=1) | np.any(np.abs(uv_high - uv_high[first]) > tolerance, axis=1)
+
+		counts = np.bincount(edges)
+		boundary = np.zeros(len(counts), dtype=bool)
+		boundary[edges[is_split]] = True
+		boundary[counts == 1] = True
+		return np.flatnonzero(boundary).astype(np.int32)
+
+
+
+	def get_faces_flipped(self):
+		"""Mask of faces with clockwise UV winding"""
+		return self.get_face_areas_signed() < 0
+
+
+
+	def get_island_flip_ratios(self, islands):
+		"""Share of flipped faces per island, 0 when none and 1 when the whole island is mirrored"""
+		face_island = self.get_face_islands(islands)
+		is_island = face_island >= 0
+		ids = face_island[is_island]
+		counts = np.bincount(ids, minlength=len(islands))
+		flipped = np.bincount(ids, weights=self.get_faces_flipped()[is_island], minlength=len(islands))
+		return flipped / np.maximum(counts, 1)
+
+
+
+	def transform(self, mask, matrix=None, pivot=(0.0, 0.0), offset=(0.0, 0.0)):
+		"""Affine transform of the masked loop UVs: matrix @ (uv - pivot) + pivot + offset"""
+		uvs = self.uvs[mask].astype(np.float64)
+		if matrix is not None:
+			pivot = np.asarray(pivot, dtype=np.float64)
+			uvs = (uvs - pivot) @ np.asarray(matrix, dtype=np.float64).T + pivot
+		self.uvs[mask] = uvs + np.asarray(offset, dtype=np.float64)
+
+
+
+	def transform_islands(self, islands, offsets=None, matrices=None, pivots=None):
+		"""Batch affine transforms with one row per island, all islands in a single array operation.
+		offsets (n,2), matrices (n,2,2) and pivots (n,2), see transform()"""
+		loop_island = self.get_loop_islands(islands)
+		mask = loop_island >= 0
+		ids = loop_island[mask]
+		uvs = self.uvs[mask].astype(np.float64)
+
+		if matrices is not None:
+			matrices = np.asarray(matrices, dtype=np.float64)[ids]
+			pivot = np.zeros((len(ids), 2)) if pivots is None else np.asarray(pivots, dtype=np.float64)[ids]
+			uvs = np.einsum('nij,nj->ni', matrices, uvs - pivot) + pivot
+		if offsets is not None:
+			uvs+= np.asarray(offsets, dtype=np.float64)[ids]
+
+		self.uvs[mask] = uvs
+
+
+
+	def get_bmesh_loops(self):
+		"""Edit mode BMLoops in mesh loop order, walked once per view and reused by every write()"""
+		if self.bm_loops is None or not self.bm.is_valid:
+			self.bm = bmesh.from_edit_mesh(self.mesh)
+			self.bm_loops = [loop for face in self.bm.faces for loop in face.loops]
+		return self.bm_loops
+
+
+
+	def write(self):
+		"""Write modified UVs back in one pass"""
+		changed = np.flatnonzero(np.any(self.uvs != self.uvs_read, axis=1))
+		if len(changed) == 0:
+			return
+
+		if self.is_edit:
+			# Edit mode keeps its own BMesh copy, assign the changed loops only
+			loops = self.get_bmesh_loops()
+			uv_layer = self.bm.loops.layers.uv.verify()
+			for index in changed.tolist():
+				loops[index][uv_layer].uv = self.uvs[index]
+			bmesh.update_edit_mesh(self.mesh)
+		else:
+			self.mesh.uv_layers.active.data.foreach_set('uv', self.uvs.ravel())
+			self.mesh.update()
+
+		self.uvs_read[:] = self.uvs
+		utilities_island_cache.mark_updated(self.obj)
+
+
+
+def get_matrix_rotation(angle):
+	"""2D rotation matrix, counter clockwise in UV space"""
+	c = np.cos(angle)
+	s = np.sin(angle)
+	return np.array([[c, -s], [s, c]])
+
+
+
+def get_matrix_scale(scale_x, scale_y):
+	return np.array([[scale_x, 0.0], [0.0, scale_y]])
+
+
+
+def get_bbox_uvs(uvs):
+	"""Bounds of an (n,2) UV array, same dict layout as utilities_uv.getSelectionBBox"""
+	bbox = {}
+	if len(uvs) == 0:
+		bbox['min'] = Vector((99999999.0,99999999.0))
+		bbox['max'] = Vector((-99999999.0,-99999999.0))
+		bbox['center'] = bbox['min']
+	else:
+		bbox['min'] = Vector(uvs.min(axis=0))
+		bbox['max'] = Vector(uvs.max(axis=0))
+		bbox['center'] = Vector(uvs.mean(axis=0, dtype=np.float64))
+
+	bbox['width'] = (bbox['max'] - bbox['min']).x
+	bbox['height'] = (bbox['max'] - bbox['min']).y
+	bbox['area'] = bbox['width'] * bbox['height']
+	bbox['minLength'] = min(bbox['width'], bbox['height'])
+	return bbox
+
+
+
+def get_bbox_views(views):
+	"""Combined bounds of the selected UVs of several objects"""
+	uvs = [view.uvs[view.get_selected_loops()] for view in views]
+	return get_bbox_uvs(np.concatenate(uvs) if uvs else np.zeros((0, 2), dtype=np.float32))